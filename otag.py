@@ -1,10 +1,15 @@
 import os
 import json
 import pickle
+import queue
 import random
+import traceback
+import multiprocessing
 from pathlib import Path
+from functools import partial
+from contextlib import nullcontext
 from importlib import import_module
-from typing import Optional, Sequence, Tuple, Dict, Union, Any, Type
+from typing import Optional, Sequence, Tuple, Dict, Union, Any, Type, List
 
 import numpy as np
 import pandas as pd
@@ -12,6 +17,8 @@ import pandas as pd
 from visualizador.placa_em_balanço import calcular_convergência, mostrar_ambiente
 from suporte.elementos_finitos.definição_de_problema import Problema
 from suporte.algoritmo_genético import Ambiente
+from suporte.memória import orçamento_de_memória
+from suporte.ilhas import comparar_com_população_única, evoluir_em_ilhas
 
 
 ClasseAmbiente = Type[Ambiente]
@@ -26,9 +33,24 @@ info_gerações = []
 
 situação_de_projeto = "placa_em_balanço"
 parâmetros = "padrão.json"
+# "Kane_e_Schoenauer_estacionário.py" recebe os filhos em regime estacionário, sem barreira entre gerações
 ambiente = "Kane_e_Schoenauer.py"
 problema = "P_no_meio_da_extremidade_direita.py"
 
+# Limite de memória dos caches e históricos da execução, como "8GB"; sem limite se None
+memória_máxima: Optional[str] = None
+
+# Banco SQLite em que os resumos de fenótipos são reaproveitados entre execuções, como
+# "~/.cache/otag/fenótipos.sqlite"; sem persistência em disco se None
+cache_persistente_de_fenótipos: Optional[str] = None
+
+# Variáveis que definem uma execução, reproduzidas em cada processo de execuções_em_paralelo
+_configuração = ("situação_de_projeto", "parâmetros", "ambiente", "problema", "memória_máxima",
+                 "cache_persistente_de_fenótipos")
+
+# Trava das tabelas de resultados compartilhadas entre os processos de execuções_em_paralelo
+_trava_dos_resultados = nullcontext()
+
 
 def mudar(variável: str, valor: Any = "valor", interativo: bool = False) -> None:
     if interativo:
@@ -43,7 +65,8 @@ def mudar(variável: str, valor: Any = "valor", interativo: bool = False) -> Non
 def interativo(padrão: bool = False,
                gerações: int = 20,
                execução_longa: bool = False,
-               sementes: Optional[Sequence[int]] = None
+               sementes: Optional[Sequence[int]] = None,
+               processos: int = 1
                ) -> Ambiente:
 
     global situação_de_projeto, parâmetros, ambiente, problema
@@ -57,7 +80,11 @@ def interativo(padrão: bool = False,
     AmbienteDeProjeto, ProblemaDefinido, parâmetros_do_problema = conseguir_construtores()
 
     if execução_longa:
-        amb = execução_completa(construtores=(AmbienteDeProjeto, ProblemaDefinido, parâmetros_do_problema))
+        amb = execução_completa(construtores=(AmbienteDeProjeto, ProblemaDefinido, parâmetros_do_problema),
+                                processos=processos)
+    elif sementes is not None and processos != 1:
+        amb = execuções_em_paralelo(gerações, sementes,
+                                    (AmbienteDeProjeto, ProblemaDefinido, parâmetros_do_problema), processos)[-1]
     elif sementes is not None:
         for sem in sementes:
             amb = execução_típica(gerações,
@@ -101,10 +128,7 @@ def _formatação_casos_mistos(s: str, reunir: str = " ") -> str:
 
 def conseguir_construtores() -> ConjuntoDeConstrutores:
     # Alcança e processa os parâmetros do problema
-    with open(raiz / "situações_de_projeto" / situação_de_projeto / "parâmetros" / parâmetros,
-              encoding="utf-8") as arquivo:
-        parâmetros_do_problema = json.load(arquivo)
-        _processar(parâmetros_do_problema)
+    parâmetros_do_problema = _carregar_parâmetros(parâmetros)
 
     # Alcança a definição do problema
     nome_da_classe_do_problema = "".join(p.capitalize() for p in situação_de_projeto.split("_"))
@@ -118,6 +142,43 @@ def conseguir_construtores() -> ConjuntoDeConstrutores:
     return AmbienteDeProjeto, ProblemaDefinido, parâmetros_do_problema
 
 
+def _carregar_parâmetros(arquivo_de_parâmetros: str) -> Dict[str, Union[str, int, float]]:
+    with open(raiz / "situações_de_projeto" / situação_de_projeto / "parâmetros" / arquivo_de_parâmetros,
+              encoding="utf-8") as arquivo:
+        parâmetros_do_problema = json.load(arquivo)
+        _processar(parâmetros_do_problema)
+
+    # Se pedido, resultados de execuções anteriores são reaproveitados, desde que a física coincida
+    if cache_persistente_de_fenótipos is not None:
+        parâmetros_do_problema.setdefault("CACHE_PERSISTENTE_DE_FENÓTIPOS",
+                                          str(Path(cache_persistente_de_fenótipos).expanduser()))
+
+    return parâmetros_do_problema
+
+
+def varrer_cenários(amb: Ambiente, cenários: Sequence[str]) -> pd.DataFrame:
+    """Avalia a população do ambiente em cada cenário (arquivo de parâmetros) fornecido sem resolvê-la novamente. Os
+    cenários só podem diferir dos parâmetros do ambiente naqueles que apenas escalam os deslocamentos."""
+    problema_do_ambiente = amb.problema
+    escaláveis = set(problema_do_ambiente.parâmetros_escaláveis)
+
+    valores_de = []
+    for cenário in cenários:
+        parâmetros_do_cenário = _carregar_parâmetros(cenário)
+        divergentes = [k for k in set(parâmetros_do_cenário) | set(problema_do_ambiente.parâmetros_do_problema)
+                       if k not in escaláveis
+                       and parâmetros_do_cenário.get(k) != problema_do_ambiente.parâmetros_do_problema.get(k)]
+        if divergentes:
+            raise ValueError(f"O cenário {cenário} difere do ambiente em parâmetros que não apenas escalam os "
+                             f"deslocamentos: {sorted(divergentes)}")
+        valores_de.append({k: parâmetros_do_cenário[k] for k in escaláveis})
+
+    tabela = problema_do_ambiente.varrer(amb.população, valores_de)
+    tabela["Cenário"] = [cenários[k][:-5] for k in tabela["Cenário"]]
+
+    return tabela
+
+
 def _processar(parâmetros_do_problema: Dict[str, str]) -> None:
     for k, v in parâmetros_do_problema.items():
         if v[0] not in "0123456789":
@@ -129,13 +190,94 @@ def _processar(parâmetros_do_problema: Dict[str, str]) -> None:
 
 
 def execução_completa(amb: Optional[Ambiente] = None,
-                      construtores: Optional[ConjuntoDeConstrutores] = None
+                      construtores: Optional[ConjuntoDeConstrutores] = None,
+                      processos: int = 1
                       ) -> Ambiente:
+    if processos != 1:
+        return execuções_em_paralelo(300, range(10 + 1), construtores, processos)[-1]
+
     for semente in range(10 + 1):
         amb = execução_típica(300, construtores=construtores, sem=semente)
     return amb
 
 
+def execuções_em_paralelo(n: int,
+                          sementes: Sequence[int],
+                          construtores: Optional[ConjuntoDeConstrutores] = None,
+                          processos: Optional[int] = None
+                          ) -> List[Ambiente]:
+    """
+    Executa uma execução típica de n gerações para cada semente, em até processos processos simultâneos (os núcleos do
+    processador, se None), e retorna os ambientes finais na ordem das sementes.
+
+    Cada semente é executada num processo novo, em que semente, info_gerações, os geradores de números aleatórios e os
+    caches de classe começam do zero, e salva seus estados e figuras na sua própria pasta. Os processos não são daemô-
+    nicos, pois seus ambientes podem iniciar os próprios processos trabalhadores. As escritas nas tabelas de comparação
+    de resultados, compartilhadas por todas as sementes, são feitas uma de cada vez. Se alguma semente falhar, as
+    demais são encerradas e a falha é relatada num RuntimeError.
+    """
+    contexto = multiprocessing.get_context()
+    configuração = {variável: globals()[variável] for variável in _configuração}
+    trava, resultados = contexto.Lock(), contexto.Queue()
+    processos = processos if processos is not None else multiprocessing.cpu_count()
+
+    ambientes: List[Ambiente] = [None] * len(sementes)
+    a_iniciar = list(enumerate(sementes))
+    em_curso: Dict[int, multiprocessing.Process] = {}
+    falha = None
+
+    try:
+        while (a_iniciar or em_curso) and falha is None:
+            while a_iniciar and len(em_curso) < processos:
+                k, sem = a_iniciar.pop(0)
+                em_curso[k] = contexto.Process(target=_executar_semente,
+                                               args=(k, n, sem, construtores, configuração, trava, resultados))
+                em_curso[k].start()
+
+            # O ambiente é recebido antes de aguardar o fim do processo, que não termina com a fila por esvaziar
+            try:
+                tipo, k, conteúdo = resultados.get(timeout=1)
+            except queue.Empty:
+                interrompidos = [k for k, processo in em_curso.items() if processo.exitcode not in (None, 0)]
+                if interrompidos:
+                    falha = (f"O processo da semente {sementes[interrompidos[0]]} terminou com o código "
+                             f"{em_curso[interrompidos[0]].exitcode}")
+                continue
+
+            if tipo == "fim":
+                ambientes[k] = conteúdo
+            else:
+                falha = f"A semente {sementes[k]} falhou:\n{conteúdo}"
+            em_curso.pop(k).join()
+    finally:
+        for processo in em_curso.values():
+            processo.terminate()
+            processo.join()
+
+    if falha is not None:
+        raise RuntimeError(falha)
+
+    return ambientes
+
+
+def _iniciar_processo_de_semente(configuração: Dict[str, Any], trava: Any) -> None:
+    global _trava_dos_resultados
+    globals().update(configuração)
+    _trava_dos_resultados = trava
+
+
+def _executar_semente(k: int, n: int, sem: int, construtores: Optional[ConjuntoDeConstrutores],
+                      configuração: Dict[str, Any], trava: Any, resultados: Any) -> None:
+    try:
+        _iniciar_processo_de_semente(configuração, trava)
+        amb = execução_típica(n, sem=sem, construtores=construtores if construtores is not None
+                              else conseguir_construtores())
+        resultados.put(("fim", k, amb))
+
+    except Exception:
+        resultados.put(("erro", k, traceback.format_exc()))
+
+
 def execução_típica(n: int,
                     sem: int = 0,
                     amb: Optional[Ambiente] = None,
@@ -163,11 +305,55 @@ def execução_típica(n: int,
     if hasattr(amb, "finalizar"):
         amb.finalizar()
 
+    print(f"> Cache de genes: {amb.genes_testados.estatísticas()}")
+
     salvar_resultado(amb)
 
     return amb
 
 
+def execução_em_ilhas(n: int,
+                      ilhas: int = 4,
+                      migrantes: int = 2,
+                      intervalo: int = 10,
+                      topologia: str = "anel",
+                      sem: int = 0,
+                      construtores: Optional[ConjuntoDeConstrutores] = None,
+                      comparar: bool = False
+                      ) -> Ambiente:
+    """Evolui n gerações de várias populações em processos paralelos, com migrações periódicas entre elas, e retorna o
+    ambiente da ilha com o melhor indivíduo. Se comparar, mede também a convergência e o tempo de uma única população
+    evoluída neste processo, e relata as acelerações obtidas."""
+    global semente
+    semente = sem
+    orçamento_de_memória.configurar(memória_máxima)
+
+    construir = partial(_construir_ambiente, construtores if construtores is not None else conseguir_construtores())
+
+    print(f">> Executando em {ilhas} ilhas ({topologia}, {migrantes} migrantes a cada {intervalo} gerações): \n"
+          f"       {ambiente[:-3]}({problema[:-3]}({parâmetros[:-5]})),\n"
+          f"       semente={sem}\n")
+
+    if comparar:
+        comparação = comparar_com_população_única(construir, ilhas, n, migrantes, intervalo, topologia, sem)
+        resultado = comparação["ilhas"]
+        print(f"> População única: adaptação {comparação['convergência_da_população_única'][-1]:.4f} em "
+              f"{comparação['tempo_da_população_única']:.1f} s")
+        print(f"> Ilhas: adaptação {resultado.convergência[-1]:.4f} em {resultado.tempo:.1f} s")
+        print(f"> Aceleração: {comparação['aceleração']:.2f}x no tempo total e "
+              f"{comparação['aceleração_até_a_mesma_adaptação']:.2f}x até a mesma adaptação")
+    else:
+        resultado = evoluir_em_ilhas(construir, ilhas, n, migrantes, intervalo, topologia, sem)
+        print(f"> Ilhas: adaptação {resultado.convergência[-1]:.4f} em {resultado.tempo:.1f} s")
+
+    return resultado.ambientes[int(np.argmax(resultado.melhores[-1]))]
+
+
+def _construir_ambiente(construtores: ConjuntoDeConstrutores, ilha: int) -> Ambiente:
+    Amb, Prob, Param = construtores
+    return Amb(Prob(Param))
+
+
 def _iniciar_ambiente(sem: int, amb: Ambiente, construtores: ConjuntoDeConstrutores) -> Ambiente:
     if not ((amb is None) ^ (construtores is None)):
         raise ValueError(f"Um, e apenas um, dentre o Ambiente ou o Conjunto de Construtores deve ser fornecido. "
@@ -178,6 +364,8 @@ def _iniciar_ambiente(sem: int, amb: Ambiente, construtores: ConjuntoDeConstruto
         global semente
         semente = sem
 
+    orçamento_de_memória.configurar(memória_máxima)
+
     if construtores:
         Amb, Prob, Param = construtores
         amb = Amb(Prob(Param))
@@ -246,12 +434,6 @@ def salvar_resultado(amb: Ambiente) -> None:
     caminho = raiz / "situações_de_projeto" / situação_de_projeto / "resultados" / pasta_do_contexto
     caminho.mkdir(parents=True, exist_ok=True)
 
-    if (caminho / "comparação_de_resultados.csv").exists():
-        tabela = pd.read_csv(caminho / "comparação_de_resultados.csv")
-    else:
-        tabela = pd.DataFrame(columns=["Semente", "Gerações", "Indivíduo_mais_apto",
-                                       "Adaptação", "Índice_de_Convergência", "alfa_0", "e"])
-
     prj = amb.população[0]
     conv, idc = calcular_convergência(amb)
 
@@ -263,13 +445,26 @@ def salvar_resultado(amb: Ambiente) -> None:
                           "alfa_0": [amb.problema.alfa_0],
                           "e": [amb.problema.e]})
 
-    tabela = tabela.append(linha)
-    tabela.drop_duplicates(inplace=True)
-    tabela.to_csv(caminho / "comparação_de_resultados.csv", index=False)
+    acrescentar_à_tabela(caminho / "comparação_de_resultados.csv", linha)
 
     mostrar_ambiente(amb, semente=semente, arquivo=(caminho / f"semente_{semente}.png"))
 
 
+def acrescentar_à_tabela(arquivo: Path, linha: pd.DataFrame) -> None:
+    """Acrescenta a linha à tabela de comparação de resultados, criando-a se preciso. Sob execuções_em_paralelo, os pro-
+    cessos leem e reescrevem a tabela um de cada vez."""
+    with _trava_dos_resultados:
+        if arquivo.exists():
+            tabela = pd.read_csv(arquivo)
+        else:
+            tabela = pd.DataFrame(columns=["Semente", "Gerações", "Indivíduo_mais_apto",
+                                           "Adaptação", "Índice_de_Convergência", "alfa_0", "e"])
+
+        tabela = tabela.append(linha)
+        tabela.drop_duplicates(inplace=True)
+        tabela.to_csv(arquivo, index=False)
+
+
 def carregar_estado(semente: int = 0, geração: int = 1) -> Optional[Ambiente]:
     caminho = _localização_dos_dados(geração, semente)
 
@@ -1,12 +1,19 @@
 from dataclasses import dataclass, field
-from typing import Optional, List, Tuple, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Sequence, Set, Tuple, TypeVar
 import multiprocessing
-import random
+import multiprocessing.managers
+import sys
 
 import numpy as np
 from more_itertools import grouper
 
-from suporte.algoritmo_genético import Ambiente, Indivíduo
+from suporte.algoritmo_genético import Ambiente, Indivíduo, intervalos_ambíguos
+from suporte.cache import tamanho_aproximado, tornar_compartilhado
+from suporte.elementos_finitos import Malha
+from suporte.elementos_finitos.resolvedores import resolvedores_iterativos
+from suporte.memória import Componente, orçamento_de_memória
+from suporte.paralelismo import FilaDeAvaliação, ModeloDeCusto
 
 
 T = TypeVar("T")
@@ -19,21 +26,53 @@ class AmbienteDeProjeto(Ambiente):
                  indivíduos: Optional[List['Projeto']] = None,
                  n_de_indivíduos: int = 125,
                  probabilidade_de_mutar: float = 0.01/100,
-                 paralelização: bool = False):
+                 paralelização: bool = False,
+                 máximo_de_genes_testados: Optional[int] = 100_000,
+                 máximo_de_bytes_dos_genes_testados: Optional[int] = None,
+                 avaliações_esperadas: Optional[int] = None,
+                 evitar_duplicatas: bool = False,
+                 executor: str = "serial",
+                 processos: Optional[int] = None,
+                 semente: Optional[int] = None,
+                 fator_de_espera: Optional[float] = None,
+                 espera_mínima: float = 1.0,
+                 adaptação_dos_esgotados: float = 0.0):
+
+        # Paralelização é o mesmo que o executor de processos: ambos avaliam os genes pela fila de avaliação
+        if paralelização:
+            executor = "processos"
 
         self.problema = problema
-        self.paralelizado = paralelização
+        self.paralelizado = executor == "processos"
+        self.fator_de_espera = fator_de_espera
+        self.espera_mínima = espera_mínima
+        self.adaptação_dos_esgotados = adaptação_dos_esgotados
+        self.fenótipos_esgotados: Set[Tuple[bytes, bool]] = set()
+        self.modelo_de_custo = ModeloDeCusto()
         self.n_de_indivíduos = n_de_indivíduos
+        self._roleta: Optional[Tuple[int, np.ndarray]] = None
         self.índice_de_convergência = 0
-
-        super().__init__(indivíduos=indivíduos, probabilidade_de_mutar=probabilidade_de_mutar)
+        self.iterações_de_referência: Optional[float] = None
+        self._gerenciador_de_caches: Optional[multiprocessing.managers.SyncManager] = None
+        self._fila_de_avaliação: Optional[FilaDeAvaliação] = None
+
+        super().__init__(indivíduos=indivíduos,
+                         probabilidade_de_mutar=probabilidade_de_mutar,
+                         máximo_de_genes_testados=máximo_de_genes_testados,
+                         máximo_de_bytes_dos_genes_testados=máximo_de_bytes_dos_genes_testados,
+                         avaliações_esperadas=avaliações_esperadas,
+                         evitar_duplicatas=evitar_duplicatas,
+                         executor=executor,
+                         processos=processos,
+                         semente=semente)
 
     def geração_0(self) -> List['Projeto']:
+        geradores = self.fluxos.geradores(0, "geração_0", self.n_de_indivíduos)
         return [Projeto(gene, nome=f"Proj_{i + 1}")
-                for i, gene in enumerate(self.problema.geração_0(self.n_de_indivíduos))]
+                for i, gene in enumerate(self.problema.geração_0(self.n_de_indivíduos, geradores=geradores))]
 
     def próxima_geração(self) -> 'AmbienteDeProjeto':
-        self.problema.alfa = self.problema.alfa_0 * (1.01 ** self.n_da_geração)
+        self._atualizar_alfa()
 
         print(f"\nGeração {self.n_da_geração}"
               f"\n===========")
@@ -44,8 +83,15 @@ class AmbienteDeProjeto(Ambiente):
 
         self.n_da_geração += 1
 
+        orçamento_de_memória.reequilibrar()
+        print(f"> Memória: {orçamento_de_memória.relatório()}")
+
         return self
 
+    def _atualizar_alfa(self) -> None:
+        """Ajusta ao número da geração corrente a penalização do deslocamento excedente, que cresce 1% por geração."""
+        self.problema.alfa = self.problema.alfa_0 * (1.01 ** self.n_da_geração)
+
     def seleção_natural(self) -> None:
         """Testa os indivíduos ainda não adaptados da população"""
         if self.paralelizado:
@@ -53,47 +99,456 @@ class AmbienteDeProjeto(Ambiente):
         else:
             self.seleção_natural_em_série()
 
+        if self.problema.resolvedor in resolvedores_iterativos:
+            self._refinar_adaptações_ambíguas()
+            print(f"> Iterações do resolvedor nesta geração: {sum(proj.iterações for proj in self.população)}")
+
         self.população.sort(reverse=True)
 
+        if self.problema.resolvedor in resolvedores_iterativos and self.problema.pré_condicionador != "jacobi":
+            self._atualizar_pré_condicionador()
+
+    def _atualizar_pré_condicionador(self) -> None:
+        """
+        Refaz o pré-condicionador compartilhado quando as resoluções da geração exigiram, em média, mais iterações que o
+        fator de degradação do problema permite em relação às observadas na geração seguinte à sua construção.
+
+        O projeto representativo é a elite ou, se o problema pedir, o consenso da população: o gene em que cada bit
+        assume o valor da maioria. Se o consenso não puder ser resolvido, a elite é usada.
+        """
+        iterações = [proj.iterações for proj in self.população if proj.iterações > 0]
+        if not iterações:
+            return
+        média = np.mean(iterações)
+
+        if self.problema.pré_condicionador_compartilhado is not None:
+            if self.iterações_de_referência is None:
+                self.iterações_de_referência = média
+                return
+            if média <= self.problema.fator_de_degradação_do_pré_condicionador * self.iterações_de_referência:
+                return
+
+        representativo = self.população[0]
+        if self.problema.pré_condicionador == "consenso":
+            consenso = Projeto(np.mean([proj.gene for proj in self.população], axis=0) >= 0.5, nome="Consenso")
+            if self.problema.compartilhar_pré_condicionador_de(consenso):
+                representativo = consenso
+            else:
+                self.problema.compartilhar_pré_condicionador_de(representativo)
+        else:
+            self.problema.compartilhar_pré_condicionador_de(representativo)
+
+        self.iterações_de_referência = None
+        if self._fila_de_avaliação is not None:
+            self._fila_de_avaliação.atualizar(self.problema)
+        print(f"> Pré-condicionador compartilhado refeito a partir de {representativo.nome} "
+              f"({média:.1f} iterações por resolução nesta geração)")
+
     def seleção_natural_em_paralelo(self) -> None:
-        """Distribui entre os núcleos do processador o trabalho de conseguir a adaptação de cada projeto."""
-        with multiprocessing.Pool() as fila_de_processamento:
-            self.população = fila_de_processamento.map(self._conseguir_adaptação, self.população)
+        """Distribui entre os núcleos do processador o trabalho de conseguir a adaptação de cada projeto.
+
+        É o caminho de toda seleção com executor "processos" ou paralelização: os prazos, as penalizações e a ordem de
+        envio descritos abaixo valem para ambos. Os trabalhadores, até processos deles, são iniciados na primeira
+        seleção em paralelo, com uma cópia do problema, e reaproveitados nas seguintes. O cache de genes é consultado
+        neste processo, e cada gene ainda desconhecido é avaliado uma só vez: os genes seguem compactados num bloco de
+        memória compartilhada e os trabalhadores escrevem noutro as grandezas de avaliação_de_gene. Antes do envio, os
+        fenótipos dos genes são identificados aqui e só um gene de cada fenótipo é enviado; os demais recebem suas res-
+        postas, com a própria área desconectada. As resoluções poupadas por genes e fenótipos repetidos são informadas
+        a cada geração. Os caches de fenótipos passam a ser compartilhados entre este processo e os trabalhadores, de
+        modo que um resultado obtido por qualquer um deles não é recalculado no resto da execução.
+
+        Com fator_de_espera, a resolução que passar desse múltiplo da mediana das durações, ou de espera_mínima segun-
+        dos, é abandonada, e os projetos do seu fenótipo recebem adaptação_dos_esgotados, sem respostas físicas. O
+        fenótipo não volta a ser enviado nas gerações seguintes. A mediana, os percentis 90 e 99 e a máxima das dura-
+        ções das resoluções são informados a cada geração.
+
+        Se o problema estimar os graus de liberdade de um fenótipo, pela máscara que identificar_fenótipos retorna, a
+        duração de cada resolução é prevista por eles, com o modelo_de_custo, e os genes mais caros são enviados primei-
+        ro, para que os longos não fiquem para o fim da geração com os demais trabalhadores ociosos. As durações previs-
+        tas e as medidas são comparadas a cada geração, e o modelo é recalibrado com as medidas."""
+        self._compartilhar_caches()
+        if self._fila_de_avaliação is None:
+            self._fila_de_avaliação = FilaDeAvaliação(avaliação_de_gene, self.problema, self.processos,
+                                                      valores_por_resultado=len(_campos_da_avaliação),
+                                                      fator_de_espera=self.fator_de_espera,
+                                                      espera_mínima=self.espera_mínima,
+                                                      resultado_esgotado=_avaliação_esgotada(
+                                                          self.adaptação_dos_esgotados))
+
+        usar_cache_de_genes = self._usar_cache_de_genes()
+        pendentes = {}
+        for proj in self.população:
+            chave = proj.id
+            resultado = (self.genes_testados.obter(chave)
+                         if usar_cache_de_genes and (self.genes_vistos is None or chave in self.genes_vistos)
+                         else None)
+            if resultado is not None:
+                self._restaurar(proj, resultado)
+                proj.adaptação_testada = True
+            else:
+                pendentes.setdefault(chave, []).append(proj)
+
+        # Genes distintos de mesmo fenótipo são resolvidos uma só vez, pelo primeiro deles
+        genes_por_fenótipo = {}
+        máscaras = {}
+        fenótipos, máscaras_dos_fenótipos = self.problema.identificar_fenótipos([projs[0].gene
+                                                                                 for projs in pendentes.values()])
+        for chave, fenótipo, máscara in zip(pendentes, fenótipos, máscaras_dos_fenótipos):
+            genes_por_fenótipo.setdefault(fenótipo, []).append(chave)
+            máscaras.setdefault(fenótipo, máscara)
+
+        # Fenótipos abandonados em gerações anteriores são penalizados sem novo envio
+        a_enviar = [fenótipo for fenótipo in genes_por_fenótipo if fenótipo not in self.fenótipos_esgotados]
+        genes_a_enviar = [pendentes[genes_por_fenótipo[fenótipo][0]][0].gene for fenótipo in a_enviar]
+        graus_de_liberdade = (np.array([self.problema.estimar_graus_de_liberdade(máscaras[fenótipo])
+                                        for fenótipo in a_enviar])
+                              if hasattr(self.problema, "estimar_graus_de_liberdade") else None)
+        custos = self.modelo_de_custo.prever(graus_de_liberdade) if graus_de_liberdade is not None else None
+        avaliações = dict(zip(a_enviar, self._fila_de_avaliação.avaliar_genes(genes_a_enviar, custos)))
+        esgotados = [a_enviar[i] for i in self._fila_de_avaliação.esgotados]
+        self.fenótipos_esgotados.update(esgotados)
+        for fenótipo in genes_por_fenótipo:
+            avaliações.setdefault(fenótipo, _avaliação_esgotada(self.adaptação_dos_esgotados))
+
+        for fenótipo, chaves in genes_por_fenótipo.items():
+            avaliação = avaliações[fenótipo]
+            for chave in chaves:
+                projs = pendentes[chave]
+                avaliação_do_gene = (avaliação if chave == chaves[0]
+                                     else _estender_avaliação(self.problema, avaliação, projs[0].gene))
+                for proj in projs:
+                    _aplicar_avaliação(proj, avaliação_do_gene)
+                if usar_cache_de_genes:
+                    self.genes_testados[chave] = self._resultado_de(projs[0])
+                if self.genes_vistos is not None:
+                    self.genes_vistos.registrar(chave)
+
+        self._informar_resoluções_poupadas(sum(len(projs) for projs in pendentes.values()), len(pendentes),
+                                           len(genes_por_fenótipo))
+
+        if a_enviar:
+            latências = self._fila_de_avaliação.latências[-1]
+            print(f"> Duração das resoluções: mediana {latências['mediana']:.3f} s, p90 {latências['p90']:.3f} s, "
+                  f"p99 {latências['p99']:.3f} s, máxima {latências['máxima']:.3f} s")
+        if a_enviar and graus_de_liberdade is not None:
+            calibração = self.modelo_de_custo.calibrar(graus_de_liberdade, self._fila_de_avaliação.durações)
+            print(f"> Duração prevista pelos graus de liberdade: {custos.sum():.3f} s contra "
+                  f"{np.nansum(self._fila_de_avaliação.durações):.3f} s medidos, razão mediana "
+                  f"{calibração['razão_mediana']:.2f}, correlação {calibração['correlação']:.2f}; modelo recalibrado "
+                  f"para {calibração['coeficiente']:.3g} * gdl ** {calibração['expoente']:.2f} s")
+        if esgotados:
+            print(f"> {len(esgotados)} fenótipos abandonados por exceder {self._fila_de_avaliação.prazo():.3f} s e "
+                  f"penalizados com adaptação {self.adaptação_dos_esgotados}")
+
+        # Os trabalhadores guardam o alfa da sua iniciação: as adaptações são recalculadas com o corrente
+        aplicar_respostas(self.problema, [proj for projs in pendentes.values() for proj in projs])
+
+    def encerrar_executor(self) -> None:
+        """Encerra também os trabalhadores da fila de avaliação, que são recriados na próxima seleção."""
+        super().encerrar_executor()
+        if self._fila_de_avaliação is not None:
+            self._fila_de_avaliação.fechar()
+            self._fila_de_avaliação = None
+
+    def _compartilhar_caches(self) -> None:
+        """Inicia o gerenciador de processos que guarda os caches compartilhados, se ainda não houver um."""
+        if self._gerenciador_de_caches is not None:
+            return
+
+        self._gerenciador_de_caches = multiprocessing.Manager()
+        self.genes_testados = tornar_compartilhado(self.genes_testados, self._gerenciador_de_caches.dict())
+        if hasattr(self.problema, "compartilhar_cache_entre_processos"):
+            self.problema.compartilhar_cache_entre_processos(self._gerenciador_de_caches)
+
+    def __getstate__(self):
+        # O gerenciador só existe no processo que o iniciou; cópias usam os caches por meio das suas referências
+        estado = super().__getstate__()
+        estado["_gerenciador_de_caches"] = None
+        estado["_fila_de_avaliação"] = None
+        estado.pop("_memória_dos_campos", None)
+        return estado
+
+    def _registrar_na_memória(self) -> None:
+        """Registra também no orçamento de memória as malhas, forças e deslocamentos guardados nos projetos da popula-
+        ção, dos quais o problema pode reconstruir os que forem liberados."""
+        super()._registrar_na_memória()
+        self._memória_dos_campos = Componente(self._bytes_dos_campos, self._liberar_campos, self._valor_dos_campos)
+        orçamento_de_memória.registrar("campos_da_população", self._memória_dos_campos)
+
+    def _campos_da_população(self) -> dict:
+        # Projetos copiados na reprodução compartilham os campos dos pais: cada objeto é contado uma só vez
+        return {id(campo): campo for proj in self.população for campo in (proj.u, proj.f, proj.u_em_grade, proj.malha)
+                if campo is not None}
+
+    def _bytes_dos_campos(self) -> int:
+        return sum(self._bytes_do_campo(campo) for campo in self._campos_da_população().values())
+
+    def _bytes_do_campo(self, valor) -> int:
+        """Estima as malhas pelos seus nós e elementos, que tamanho_aproximado não percorre."""
+        return _tamanho_da_malha(valor) if isinstance(valor, Malha) else tamanho_aproximado(valor)
+
+    def _liberar_campos(self, bytes_a_liberar: int) -> int:
+        """Descarta os campos dos projetos menos adaptados, preservando os da elite, até liberar os bytes pedidos."""
+        bytes_antes = bytes_agora = self._bytes_dos_campos()
+        for proj in sorted(self.população)[:-1]:
+            if bytes_antes - bytes_agora >= bytes_a_liberar:
+                break
+            if proj.malha is not None or proj.u is not None:
+                proj.f = proj.u = proj.malha = proj.u_em_grade = None
+                bytes_agora = self._bytes_dos_campos()
+        return bytes_antes - bytes_agora
+
+    def _valor_dos_campos(self) -> float:
+        # Cada projeto com campos poupa no máximo uma resolução, caso venha a ser visualizado
+        com_campos = sum(proj.malha is not None for proj in self.população)
+        return com_campos / max(self._bytes_dos_campos(), 1)
 
     def seleção_natural_em_série(self) -> None:
-        for proj in self.população:
-            self._conseguir_adaptação(proj)
+        self._conseguir_adaptações(self.população)
+
+    def _conseguir_adaptações(self, indivíduos: List['Projeto']) -> None:
+        """
+        Consegue as adaptações neste processo, em série ou nas linhas de execução do executor, resolvendo uma só vez
+        cada fenótipo, como a seleção em paralelo.
+
+        O primeiro gene de cada fenótipo é testado pelo executor. Os demais genes do fenótipo são testados depois, em
+        série, e reaproveitam as respostas do cache de fenótipos do problema, sem que duas linhas de execução resolvam
+        o mesmo fenótipo ao mesmo tempo. Com o executor de processos, cujos resultados ficam nos trabalhadores, vale o
+        teste do Ambiente.
+        """
+        if self.executor == "processos":
+            super()._conseguir_adaptações(indivíduos)
+            return
+
+        usar_cache_de_genes = self._usar_cache_de_genes()
+        pendentes = {}
+        for proj in indivíduos:
+            if not self._restaurar_do_cache(proj):
+                pendentes.setdefault(proj.id, []).append(proj)
+
+        genes_por_fenótipo = {}
+        fenótipos, _ = self.problema.identificar_fenótipos([projs[0].gene for projs in pendentes.values()])
+        for chave, fenótipo in zip(pendentes, fenótipos):
+            genes_por_fenótipo.setdefault(fenótipo, []).append(chave)
+
+        self._testar_lote([pendentes[chaves[0]][0] for chaves in genes_por_fenótipo.values()])
+        for chaves in genes_por_fenótipo.values():
+            for chave in chaves[1:]:
+                self.testar_adaptação(pendentes[chave][0])
+
+        # Sem o cache de genes, os projetos de gene repetido também são testados, pelo cache de fenótipos
+        for testado, *repetidos in pendentes.values():
+            resultado = self._resultado_de(testado)
+            for proj in repetidos:
+                if usar_cache_de_genes:
+                    self._restaurar(proj, resultado)
+                    proj.adaptação_testada = True
+                else:
+                    self.testar_adaptação(proj)
+            self._guardar_no_cache(testado, resultado)
+
+        self._informar_resoluções_poupadas(sum(len(projs) for projs in pendentes.values()), len(pendentes),
+                                           len(genes_por_fenótipo))
+
+    @staticmethod
+    def _informar_resoluções_poupadas(n_de_pendentes: int, n_de_genes: int, n_de_fenótipos: int) -> None:
+        print(f"> {n_de_pendentes - n_de_fenótipos} resoluções poupadas nesta geração: {n_de_pendentes - n_de_genes} "
+              f"por genes e {n_de_genes - n_de_fenótipos} por fenótipos repetidos")
+
+    def _usar_cache_de_genes(self) -> bool:
+        # Com resolvedores iterativos, o cache de genes guardaria adaptações aproximadas sem seus intervalos. O cache de
+        # fenótipos do problema, que registra a tolerância de cada resultado, é consultado diretamente
+        return self.problema.resolvedor not in resolvedores_iterativos
+
+    def _indivíduo_de(self, gene: 'Matriz') -> 'Projeto':
+        return Projeto(gene, nome="Trabalhador")
+
+    def _resultado_de(self, proj: 'Projeto') -> Tuple[float, Optional[Tuple[float, ...]]]:
+        # Alfa muda a cada geração: guarda as respostas físicas para recalcular a adaptação quando o gene reaparecer
+        return proj.adaptação, proj.respostas
+
+    def _restaurar(self, proj: 'Projeto', resultado: Tuple[float, Optional[Tuple[float, ...]]]) -> None:
+        proj.adaptação, proj.respostas = resultado
+        aplicar_respostas(self.problema, [proj])
+
+    def reavaliar(self) -> None:
+        """Recalcula a adaptação de toda a população a partir das respostas físicas já conhecidas, sem novas resolu-
+        ções, e a reordena. Útil depois de mudanças nos parâmetros de penalização do problema."""
+        aplicar_respostas(self.problema, self.população)
+        self.população.sort(reverse=True)
+
+    def _refinar_adaptações_ambíguas(self) -> None:
+        """
+        Aperta a tolerância do resolvedor apenas para os projetos cuja adaptação aproximada pode alterar a seleção.
+
+        São refinados os projetos cujo intervalo de adaptação cruza o corte da elite e os que podem mudar o resultado
+        dos sorteios da roleta da geração, tomados antes da reprodução por _sorteios_da_roleta. A cada rodada a tole-
+        rância é dividida por 100, até atingir a tolerância final do problema. Os intervalos vêm do erro estimado pelo
+        resolvedor, que não é uma cota garantida: a seleção é decidida com a confiança dessa estimativa.
+
+        As novas resoluções seguem pelo executor do ambiente: com processos, pela fila de avaliação, uma por fenótipo.
+        """
+        tolerância = self.problema.tolerância_do_resolvedor
+
+        while tolerância > self.problema.tolerância_final_do_resolvedor:
+            # A roleta sorteia sobre a população ordenada por adaptação
+            self.população.sort(reverse=True)
+            adaptações = np.array([proj.adaptação for proj in self.população], dtype=float)
+            inferiores, superiores = np.array([proj.intervalo_de_adaptação for proj in self.população], dtype=float).T
+
+            a_refinar = (intervalos_ambíguos(inferiores, superiores, cortes=(1,))
+                         | self._ambíguos_na_roleta(adaptações, inferiores, superiores))
+            if not a_refinar.any():
+                break
+
+            tolerância = max(tolerância / 100, self.problema.tolerância_final_do_resolvedor)
+            print(f"> {a_refinar.sum()} projetos refinados com tolerância {tolerância:.0e}")
+
+            self._refinar([proj for proj, refinar in zip(self.população, a_refinar) if refinar], tolerância)
+
+    def _sorteios_da_roleta(self) -> np.ndarray:
+        """Retorna os valores uniformes em [0, 1) que decidem os sorteios da roleta na geração corrente, os mesmos em
+        todas as consultas da geração."""
+        if self._roleta is None or self._roleta[0] != self.n_da_geração:
+            self._roleta = (self.n_da_geração, self.gerador("roleta").random(self.n_de_indivíduos))
+        return self._roleta[1]
+
+    def _ambíguos_na_roleta(self, adaptações: np.ndarray, inferiores: np.ndarray, superiores: np.ndarray) -> np.ndarray:
+        """
+        Identifica os projetos cuja incerteza pode levar algum sorteio da roleta para o outro lado de uma fronteira.
+
+        A roleta acumula as adaptações, na ordem da população, em fronteiras entre 0 e 1, e cada sorteio escolhe o
+        projeto do trecho em que cai. Um sorteio é ambíguo se cai entre os limites que os intervalos de adaptação
+        permitem à fronteira mais próxima. Nesse caso, são refinados os projetos que mais deslocam a fronteira, até que
+        o deslocamento possível dos demais, em primeira ordem, não alcance o sorteio.
+        """
+        ambíguos = np.zeros(len(adaptações), dtype=bool)
+        total = adaptações.sum()
+        if len(adaptações) < 2 or not total > 0:
+            return ambíguos
+
+        acumuladas = np.cumsum(adaptações)[:-1]
+        inferiores_acumulados, superiores_acumulados = np.cumsum(inferiores)[:-1], np.cumsum(superiores)[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mínimas = inferiores_acumulados / (inferiores_acumulados + superiores.sum() - superiores_acumulados)
+            máximas = superiores_acumulados / (superiores_acumulados + inferiores.sum() - inferiores_acumulados)
+
+        índices = np.arange(len(adaptações))
+        for sorteio in self._sorteios_da_roleta():
+            for k in np.flatnonzero((mínimas < sorteio) & (sorteio < máximas)):
+                # Deslocamento da fronteira k por unidade de adaptação de cada projeto, antes e depois dela
+                pesos = np.where(índices <= k, total - acumuladas[k], acumuladas[k]) / total ** 2
+                contribuições = (superiores - inferiores) * pesos
+                ordem = np.argsort(contribuições)
+                margem = abs(sorteio - acumuladas[k] / total)
+                ambíguos[ordem[np.cumsum(contribuições[ordem]) > margem]] = True
+
+        return ambíguos
+
+    def _refinar(self, projs: List['Projeto'], tolerância: float) -> None:
+        """Resolve de novo os projetos com a tolerância fornecida, pelo executor do ambiente, somando as iterações às
+        das resoluções anteriores."""
+        if self.executor == "processos" and self._fila_de_avaliação is not None:
+            self._refinar_em_paralelo(projs, tolerância)
+            return
+
+        def refinar(proj: 'Projeto') -> None:
+            iterações_anteriores = proj.iterações
+            self.problema.testar_adaptação(proj, tolerância=tolerância)
+            proj.iterações += iterações_anteriores
+
+        if self.executor == "threads" and len(projs) > 1:
+            if self._linhas_de_execução is None:
+                self._linhas_de_execução = ThreadPoolExecutor(self.processos)
+            list(self._linhas_de_execução.map(refinar, projs))
+        else:
+            for proj in projs:
+                refinar(proj)
+
+    def _refinar_em_paralelo(self, projs: List['Projeto'], tolerância: float) -> None:
+        """Refina os projetos pela fila de avaliação, com uma resolução por fenótipo. Os trabalhadores recebem o pro-
+        blema com a tolerância fornecida e, ao fim, com a original. Resoluções abandonadas mantêm o resultado ante-
+        rior."""
+        projs_por_fenótipo = {}
+        máscaras = {}
+        fenótipos, máscaras_dos_fenótipos = self.problema.identificar_fenótipos([proj.gene for proj in projs])
+        for proj, fenótipo, máscara in zip(projs, fenótipos, máscaras_dos_fenótipos):
+            projs_por_fenótipo.setdefault(fenótipo, []).append(proj)
+            máscaras.setdefault(fenótipo, máscara)
+        grupos = list(projs_por_fenótipo.values())
+        genes = [grupo[0].gene for grupo in grupos]
+        custos = (self.modelo_de_custo.prever(np.array([self.problema.estimar_graus_de_liberdade(máscaras[fenótipo])
+                                                        for fenótipo in projs_por_fenótipo]))
+                  if hasattr(self.problema, "estimar_graus_de_liberdade") else None)
+
+        tolerância_anterior = self.problema.tolerância_do_resolvedor
+        self.problema.tolerância_do_resolvedor = tolerância
+        self._fila_de_avaliação.atualizar(self.problema)
+        try:
+            avaliações = self._fila_de_avaliação.avaliar_genes(genes, custos)
+            esgotados = set(self._fila_de_avaliação.esgotados)
+        finally:
+            self.problema.tolerância_do_resolvedor = tolerância_anterior
+            self._fila_de_avaliação.atualizar(self.problema)
+
+        for i, (grupo, avaliação) in enumerate(zip(grupos, avaliações)):
+            if i in esgotados:
+                continue
+            for proj in grupo:
+                iterações_anteriores = proj.iterações
+                _aplicar_avaliação(proj, avaliação if proj is grupo[0]
+                                   else _estender_avaliação(self.problema, avaliação, proj.gene))
+                proj.iterações += iterações_anteriores
+
+        aplicar_respostas(self.problema, projs)
 
     def testar_adaptação(self, ind) -> None:
         self.problema.testar_adaptação(ind)
 
     def reprodução(self, população=None) -> None:
         adaptações = np.array([i.adaptação for i in self.população])
-        probabilidades = adaptações / (adaptações.sum())
+        fronteiras = np.cumsum(adaptações / adaptações.sum())
 
-        self.população = [Projeto(p.gene.copy(), p.nome, u=p.u, f=p.f, malha=p.malha)
-                          for p in np.random.choice(self.população,
-                                                    self.n_de_indivíduos,
-                                                    p=probabilidades,
-                                                    replace=True)]
+        # Os sorteios da roleta são os mesmos que guiaram o refinamento das adaptações ambíguas
+        sorteados = np.minimum(np.searchsorted(fronteiras, self._sorteios_da_roleta() * fronteiras[-1], side="right"),
+                               len(self.população) - 1)
+        self.população = [Projeto(p.gene.copy(), p.nome, u=p.u, f=p.f, malha=p.malha, u_em_grade=p.u_em_grade)
+                          for p in (self.população[i] for i in sorteados)]
 
-        for par_de_projetos in grouper(self.população, 2):
-            if np.random.random() < 0.6:
+        for k, par_de_projetos in enumerate(grouper(self.população, 2)):
+            if self.gerador("crossover", k).random() < 0.6:
                 proj1, proj2 = par_de_projetos
                 if proj2 is not None:
-                    self.crossover(proj1, proj2)
+                    self._cruzar_evitando_duplicatas(proj1, proj2, k)
+
+    def _cruzar_evitando_duplicatas(self, proj_1: 'Projeto', proj_2: 'Projeto', índice: int) -> None:
+        """Aplica o crossover e, se evitar_duplicatas, o refaz a partir dos genes originais, até um limite de tentati-
+        vas, enquanto ambos os filhos repetirem genes já vistos."""
+        genes_originais = proj_1.gene.copy(), proj_2.gene.copy()
+        self.crossover(proj_1, proj_2, índice)
+
+        for _ in range(self.tentativas_contra_duplicatas if self.evitar_duplicatas else 0):
+            if not self._já_visto(proj_1.id) or not self._já_visto(proj_2.id):
+                break
+
+            proj_1.gene[:], proj_2.gene[:] = genes_originais
+            proj_1.invalidar_id(), proj_2.invalidar_id()
+            self.crossover(proj_1, proj_2, índice)
 
     def crossover(self, proj_1: 'Projeto', proj_2: 'Projeto', índice=None) -> None:
         altura, largura = proj_1.gene.shape
 
+        # O fluxo do par continua entre os crossovers refeitos contra duplicatas
+        gerador = self.gerador("crossover") if índice is None else self.gerador("crossover", índice)
+
         # Seleciona 2 pontos de corte aleatórios em cada direção e garante que
         # eles sejam distintos e ordenados
-        i1, i2, j1, j2 = (np.random.randint(1,  altura - 1), np.random.randint(1,  altura - 1),
-                          np.random.randint(1, largura - 1), np.random.randint(1, largura - 1))
+        i1, i2, j1, j2 = (gerador.integers(1,  altura - 1), gerador.integers(1,  altura - 1),
+                          gerador.integers(1, largura - 1), gerador.integers(1, largura - 1))
         while i1 == i2:
-            i2 = np.random.randint(1, altura - 1)
+            i2 = gerador.integers(1, altura - 1)
         while j1 == j2:
-            j2 = np.random.randint(1, largura - 1)
+            j2 = gerador.integers(1, largura - 1)
 
         i_b, i_c = max([i1, i2]), min([i1, i2])
         j_d, j_e = max([j1, j2]), min([j1, j2])
@@ -105,7 +560,7 @@ class AmbienteDeProjeto(Ambiente):
         # Seleciona 3 blocos aleatórios a partir das fatias
         blocos = []
         while len(blocos) < 3:
-            bloco = (random.choice(corte_horizontal), random.choice(corte_vertical))
+            bloco = (corte_horizontal[gerador.integers(3)], corte_vertical[gerador.integers(3)])
             if bloco not in blocos:
                 blocos.append(bloco)
 
@@ -119,6 +574,8 @@ class AmbienteDeProjeto(Ambiente):
             proj_1.gene[ibc:ibb, jbe:jbd] = gene_de_p2_antes_do_crossover[ibc:ibb, jbe:jbd]
             proj_2.gene[ibc:ibb, jbe:jbd] = gene_de_p1_antes_do_crossover[ibc:ibb, jbe:jbd]
 
+        proj_1.invalidar_id(), proj_2.invalidar_id()
+
     def mutação(self, população=None) -> None:
         mapa_de_convergência, self.índice_de_convergência = self._calcular_índice_de_convergência()
         print(f"\nMutações (Índice de Convergência: {100*self.índice_de_convergência:.2f}%)"
@@ -143,53 +600,131 @@ class AmbienteDeProjeto(Ambiente):
     def _parábola(V: T) -> T:
         return 4 * (V ** 2) - 4 * V + 1
 
-    def _mutação_baseada_na_população(self, mapa_de_convergência: 'Matriz') -> None:
+    def _mutação_baseada_na_população(self, mapa_de_convergência: 'Matriz',
+                                      numerados: Optional[Sequence[Tuple[int, 'Projeto']]] = None) -> None:
         # Obtém a média, e a média ao quadrado, de cada bit na população
         Médias = mapa_de_convergência
         Médias_2 = Médias ** 2
 
-        # Passível de paralelização
-        for ind in self.população:
+        # Passível de paralelização: cada indivíduo sorteia do fluxo do seu número, por padrão a posição na população
+        for i, ind in (enumerate(self.população) if numerados is None else numerados):
             # Obtém a propabilidade de mutar de cada bit
             probabilidade_de_mutar = (self.probabilidade_de_mutar
                                       + 99 * self.probabilidade_de_mutar * Médias_2
                                       + 99 * self.probabilidade_de_mutar * ind.gene * (1 - 2 * Médias))
 
             # Sorteia os casos em que há mutação
-            mutações = probabilidade_de_mutar > np.random.random(probabilidade_de_mutar.shape)
+            mutações = probabilidade_de_mutar > self.gerador("mutação", i).random(probabilidade_de_mutar.shape)
 
             # Vira os bits que resultaram em mutações
             ind.gene[mutações] = ~ind.gene[mutações]
+            ind.invalidar_id()
 
-    def _mutação_baseada_na_topologia(self) -> None:
+    def _mutação_baseada_na_topologia(self, numerados: Optional[Sequence[Tuple[int, 'Projeto']]] = None) -> None:
         pm = 10 * self.probabilidade_de_mutar
 
-        # Passível de paralelização
-        for ind in self.população:
+        # Passível de paralelização: cada indivíduo sorteia do fluxo do seu número, por padrão a posição na população
+        for i, ind in (enumerate(self.população) if numerados is None else numerados):
+            gerador = self.gerador("mutação_nas_bordas", i)
             gene = ind.gene
             bordas = ((gene ^ np.roll(gene, 1))
                       | (gene ^ np.roll(gene, -1))
                       | (gene ^ np.roll(gene, 1, axis=0))
                       | (gene ^ np.roll(gene, -1, axis=0)))
 
-            aumentar_bordas = True if 0.5 > np.random.random() else False
+            aumentar_bordas = True if 0.5 > gerador.random() else False
             if aumentar_bordas:
                 bordas_sujeitas_a_mutação = ~gene & bordas
             else:
                 bordas_sujeitas_a_mutação = gene & bordas
 
-            bits_virados = (bordas_sujeitas_a_mutação
-                            & np.random.choice((True, False),
-                                               bordas_sujeitas_a_mutação.shape,
-                                               p=(pm, 1 - pm)))
+            bits_virados = bordas_sujeitas_a_mutação & (gerador.random(bordas_sujeitas_a_mutação.shape) < pm)
 
             gene[bits_virados] = ~gene[bits_virados]
+            ind.invalidar_id()
 
     def finalizar(self) -> None:
         print("\nExecução Final"
               "\n--------------")
         self.seleção_natural()
 
+        if self._fila_de_avaliação is not None:
+            self._fila_de_avaliação.fechar()
+            self._fila_de_avaliação = None
+        self.encerrar_executor()
+
+
+def _tamanho_da_malha(malha: Malha) -> int:
+    """Estima os bytes de uma malha a partir dos de um nó e de um elemento representativos."""
+    def tamanho_do_objeto(objeto) -> int:
+        return sys.getsizeof(objeto) + tamanho_aproximado(getattr(objeto, "__dict__", {}))
+
+    tamanho = (tamanho_aproximado(malha.me) + sys.getsizeof(malha.índice_de)
+               + sys.getsizeof(malha.nós) + sys.getsizeof(malha.elementos))
+    if malha.nós:
+        tamanho += len(malha.nós) * tamanho_do_objeto(malha.nós[0])
+    if malha.elementos:
+        tamanho += len(malha.elementos) * tamanho_do_objeto(malha.elementos[0])
+    return tamanho
+
+
+# Grandezas que um trabalhador devolve de cada gene avaliado, na ordem do vetor de avaliação_de_gene, que é a dos
+# campos da avaliação em lote do problema
+_campos_da_avaliação = ("adaptação", "Acon", "Ades", "Dmax", "erro_de_Dmax", "inferior", "superior", "iterações")
+
+
+def avaliação_de_gene(problema: 'Problema', gene: 'Matriz') -> Tuple[float, ...]:
+    """Testa a adaptação de um gene num trabalhador e retorna apenas a adaptação, as respostas físicas, o intervalo de
+    adaptação e as iterações do resolvedor, num vetor de tamanho fixo, sem a malha nem os campos do projeto. Respos-
+    tas ausentes, de projetos desconectados da borda, são representadas por NaN."""
+    avaliação = problema.testar_adaptação_em_lote([gene], nomes=["Trabalhador"])
+    return tuple(float(valores[0]) for valores in avaliação)
+
+
+def _estender_avaliação(problema: 'Problema', avaliação: Sequence[float], gene: 'Matriz') -> Tuple[float, ...]:
+    """Adapta a avaliação de um gene a outro de mesmo fenótipo, que difere apenas pela área desconectada e não exigiu
+    iterações. A adaptação e o intervalo são recalculados depois, por aplicar_respostas."""
+    avaliação = dict(zip(_campos_da_avaliação, (float(valor) for valor in avaliação)))
+    if not np.isnan(avaliação["Acon"]):
+        avaliação["Ades"] = gene.sum() * problema.lado_dos_elementos ** 2 - avaliação["Acon"]
+    avaliação["iterações"] = 0
+    return tuple(avaliação.values())
+
+
+def _avaliação_esgotada(adaptação: float) -> Tuple[float, ...]:
+    """Vetor de avaliação de um gene cuja resolução foi abandonada: a adaptação de penalização, sem respostas físicas
+    nem iterações."""
+    avaliação = dict.fromkeys(_campos_da_avaliação, np.nan)
+    avaliação.update(adaptação=adaptação, inferior=adaptação, superior=adaptação, iterações=0)
+    return tuple(float(valor) for valor in avaliação.values())
+
+
+def _aplicar_avaliação(proj: 'Projeto', avaliação: Sequence[float]) -> None:
+    """Atribui ao projeto as grandezas do vetor retornado por avaliação_de_gene."""
+    adaptação, *respostas, inferior, superior, iterações = (float(valor) for valor in avaliação)
+    proj.adaptação = adaptação
+    proj.respostas = None if np.isnan(respostas[0]) else tuple(respostas)
+    proj.intervalo_de_adaptação = (inferior, superior)
+    proj.iterações = int(iterações)
+    proj.adaptação_testada = True
+
+
+def aplicar_respostas(problema: 'Problema', projetos: List['Projeto']) -> None:
+    """Recalcula, numa única operação vetorizada, a adaptação e o intervalo de adaptação dos projetos que têm
+    respostas físicas, usando os parâmetros de penalização correntes do problema. Projetos sem respostas, como os
+    desconectados da borda, mantêm sua adaptação."""
+    com_respostas = [proj for proj in projetos if proj.respostas is not None]
+    if not com_respostas:
+        return
+
+    Acon, Ades, Dmax, erro_de_Dmax = np.array([proj.respostas for proj in com_respostas], dtype=float).T
+    adaptações = problema.calcular_adaptação(Acon, Ades, Dmax)
+    inferiores, superiores = problema.intervalo_de_adaptação(Acon, Ades, Dmax, erro_de_Dmax)
+
+    for proj, adaptação, inferior, superior in zip(com_respostas, adaptações, inferiores, superiores):
+        proj.adaptação = adaptação
+        proj.intervalo_de_adaptação = (inferior, superior)
+
 
 @dataclass(order=True)
 class Projeto(Indivíduo):
@@ -198,6 +733,7 @@ class Projeto(Indivíduo):
     u: Optional['Vetor'] = field(default=None, compare=False)
     f: Optional['Vetor'] = field(default=None, compare=False)
     malha: Optional['Malha'] = field(default=None, compare=False)
-
-    def __post_init__(self):
-        self.id = self.gene.data.tobytes()
+    u_em_grade: Optional['Matriz'] = field(default=None, compare=False)
+    intervalo_de_adaptação: Optional[Tuple[float, float]] = field(default=None, compare=False)
+    iterações: int = field(default=0, compare=False)
+    respostas: Optional[Tuple[float, ...]] = field(default=None, compare=False)
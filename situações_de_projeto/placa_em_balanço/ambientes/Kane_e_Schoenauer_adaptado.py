@@ -1,10 +1,9 @@
-from typing import Optional, List
-import random
+from typing import Optional, List, Tuple
 
 import numpy as np
 
 from suporte.algoritmo_genético import Ambiente
-from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import Projeto
+from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import Projeto, aplicar_respostas
 
 
 class AmbienteDeProjeto(Ambiente):
@@ -29,14 +28,37 @@ class AmbienteDeProjeto(Ambiente):
         probabilidade de mutar definida na construção da instância.
     testar_adaptação(ind: Projeto) -> None
         Testa a adaptação do indivíduo utilizando a modelagem e as condições de contorno do problema.
+
+    CACHE DE GENES
+    _resultado_de(proj: Projeto) -> Tuple[float, Optional[Tuple[float, ...]]]
+        Guarda as respostas físicas do projeto, além da sua adaptação.
+    _restaurar(proj: Projeto, resultado: Tuple[float, Optional[Tuple[float, ...]]]) -> None
+        Recalcula a adaptação a partir das respostas guardadas com o alfa corrente.
+    _indivíduo_de(gene: Matriz) -> Projeto
+        Cria o projeto em que um processo do executor testa um gene.
     """
 
     def __init__(self,
                  problema: 'Problema',
                  indivíduos: Optional[List[Projeto]] = None,
-                 probabilidade_de_mutar: float = 0.01/100):
+                 probabilidade_de_mutar: float = 0.01/100,
+                 máximo_de_genes_testados: Optional[int] = 100_000,
+                 máximo_de_bytes_dos_genes_testados: Optional[int] = None,
+                 avaliações_esperadas: Optional[int] = None,
+                 evitar_duplicatas: bool = False,
+                 executor: str = "serial",
+                 processos: Optional[int] = None,
+                 semente: Optional[int] = None):
         self.problema = problema
-        super().__init__(indivíduos=indivíduos, probabilidade_de_mutar=probabilidade_de_mutar)
+        super().__init__(indivíduos=indivíduos,
+                         probabilidade_de_mutar=probabilidade_de_mutar,
+                         máximo_de_genes_testados=máximo_de_genes_testados,
+                         máximo_de_bytes_dos_genes_testados=máximo_de_bytes_dos_genes_testados,
+                         avaliações_esperadas=avaliações_esperadas,
+                         evitar_duplicatas=evitar_duplicatas,
+                         executor=executor,
+                         processos=processos,
+                         semente=semente)
 
     def geração_0(self) -> List[Projeto]:
         return [Projeto(gene, nome=f"G0_{i + 1}") for i, gene in enumerate(self.problema.geração_0())]
@@ -57,14 +79,17 @@ class AmbienteDeProjeto(Ambiente):
 
         altura, largura = gene_novo.shape
 
+        # O fluxo do filho continua entre os crossovers refeitos contra duplicatas
+        gerador = self.gerador("crossover", índice)
+
         # Seleciona 2 pontos de corte aleatórios em cada direção e garante que
         # eles sejam distintos e ordenados
-        i1, i2, j1, j2 = (np.random.randint(1,  altura - 1), np.random.randint(1,  altura - 1),
-                          np.random.randint(1, largura - 1), np.random.randint(1, largura - 1))
+        i1, i2, j1, j2 = (gerador.integers(1,  altura - 1), gerador.integers(1,  altura - 1),
+                          gerador.integers(1, largura - 1), gerador.integers(1, largura - 1))
         while i1 == i2:
-            i2 = np.random.randint(1, altura - 1)
+            i2 = gerador.integers(1, altura - 1)
         while j1 == j2:
-            j2 = np.random.randint(1, largura - 1)
+            j2 = gerador.integers(1, largura - 1)
 
         i_b, i_c = max([i1, i2]), min([i1, i2])
         j_d, j_e = max([j1, j2]), min([j1, j2])
@@ -76,7 +101,7 @@ class AmbienteDeProjeto(Ambiente):
         # Seleciona 3 blocos aleatórios a partir das fatias
         blocos = []
         while len(blocos) < 3:
-            bloco = (random.choice(corte_horizontal), random.choice(corte_vertical))
+            bloco = (corte_horizontal[gerador.integers(3)], corte_vertical[gerador.integers(3)])
             if bloco not in blocos:
                 blocos.append(bloco)
 
@@ -103,18 +128,33 @@ class AmbienteDeProjeto(Ambiente):
         Médias = sum([ind.gene for ind in self.população]) / self.n_de_indivíduos
         Médias_2 = Médias ** 2
 
-        for ind in nova_geração:
+        # Cada indivíduo sorteia do seu próprio fluxo
+        for i, ind in enumerate(nova_geração):
             # Obtém a propabilidade de mutar de cada bit
             probabilidade_de_mutar = (self.probabilidade_de_mutar
                                       + 99 * self.probabilidade_de_mutar * Médias_2
                                       + 99 * self.probabilidade_de_mutar * ind.gene * (1 - 2 * Médias))
 
             # Sorteia os casos em que há mutação
-            mutações = probabilidade_de_mutar > np.random.random(probabilidade_de_mutar.shape)
+            mutações = probabilidade_de_mutar > self.gerador("mutação", i).random(probabilidade_de_mutar.shape)
 
             # Vira os bits que resultaram em mutações
             ind.gene[mutações] = ~ind.gene[mutações]
+            ind.invalidar_id()
 
     def testar_adaptação(self, proj: Projeto) -> None:
         """Testa a adaptação do projeto utilizando a modelagem e as condições de contorno do problema."""
         self.problema.testar_adaptação(proj)
+
+    def _resultado_de(self, proj: Projeto) -> Tuple[float, Optional[Tuple[float, ...]]]:
+        """Guarda as respostas físicas do projeto, além da sua adaptação."""
+        return proj.adaptação, proj.respostas
+
+    def _restaurar(self, proj: Projeto, resultado: Tuple[float, Optional[Tuple[float, ...]]]) -> None:
+        """Recalcula a adaptação a partir das respostas guardadas com o alfa corrente."""
+        proj.adaptação, proj.respostas = resultado
+        aplicar_respostas(self.problema, [proj])
+
+    def _indivíduo_de(self, gene: 'Matriz') -> Projeto:
+        """Cria o projeto em que um processo do executor testa um gene."""
+        return Projeto(gene, nome="Trabalhador")
@@ -0,0 +1,65 @@
+import copy
+
+import numpy as np
+
+from suporte.algoritmo_genético import AmbienteEstacionário
+from situações_de_projeto.placa_em_balanço.ambientes import Kane_e_Schoenauer
+from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import Projeto, aplicar_respostas
+
+
+class AmbienteDeProjeto(AmbienteEstacionário, Kane_e_Schoenauer.AmbienteDeProjeto):
+    """
+    Ambiente de Kane e Schoenauer em regime estacionário: os filhos disputam lugar na população assim que seus testes
+    terminam, como no AmbienteEstacionário de suporte.algoritmo_genético, mas são gerados pelos operadores do ambiente
+    de Kane e Schoenauer.
+
+    Cada filho é uma cópia do primeiro de dois pais sorteados pela roleta, cruzada com a do segundo com probabilidade de
+    60% e submetida às mutações baseadas na população e, acima de 75% de convergência, na topologia. Os sorteios do
+    k-ésimo filho saem dos fluxos de índice k de cada operador.
+
+    Alfa segue o mesmo cronograma do ambiente de Kane e Schoenauer, crescendo 1% a cada geração equivalente. Ao fechar
+    uma geração, a adaptação da população é recalculada com o novo alfa a partir das respostas físicas, sem novas reso-
+    luções, e a de cada filho recebido também, antes que dispute seu lugar. As gerações fechadas guardam cópias dos
+    projetos, que não mudam com os alfas seguintes.
+
+    O refinamento das adaptações ambíguas e a atualização do pré-condicionador compartilhado, feitos a cada seleção
+    natural do ambiente de Kane e Schoenauer, não se aplicam a este regime.
+
+    MÉTODOS
+    -------
+    avançar_gerações(self, n: int) -> self
+        Recebe n gerações equivalentes de filhos, com alfa ajustado a cada uma.
+    """
+
+    def avançar_gerações(self, n: int) -> 'AmbienteDeProjeto':
+        self._atualizar_alfa()
+        return super().avançar_gerações(n)
+
+    def _gerar_filho(self, k: int) -> 'Projeto':
+        adaptações = np.array([proj.adaptação for proj in self.população], dtype=float)
+        i, j = self.gerador("reprodução", k).choice(len(self.população), size=2, replace=False,
+                                                    p=adaptações / adaptações.sum())
+
+        filho, outro = (Projeto(p.gene.copy(), p.nome, u=p.u, f=p.f, malha=p.malha, u_em_grade=p.u_em_grade)
+                        for p in (self.população[i], self.população[j]))
+        if self.gerador("crossover", k).random() < 0.6:
+            self.crossover(filho, outro, k)
+
+        mapa_de_convergência, self.índice_de_convergência = self._calcular_índice_de_convergência()
+        self._mutação_baseada_na_população(mapa_de_convergência, [(k, filho)])
+        if self.índice_de_convergência > 0.75:
+            self._mutação_baseada_na_topologia([(k, filho)])
+
+        return filho
+
+    def _substituir(self, filho: 'Projeto', k: int) -> None:
+        # O filho pode ter sido testado antes de alfa mudar
+        aplicar_respostas(self.problema, [filho])
+        super()._substituir(filho, k)
+
+    def _fechar_geração_equivalente(self, ocupação: float) -> None:
+        super()._fechar_geração_equivalente(ocupação)
+
+        self._atualizar_alfa()
+        self.população = [copy.copy(proj) for proj in self.população]
+        self.reavaliar()
@@ -1,32 +1,137 @@
 from itertools import product as produto_cartesiano
-from collections import OrderedDict
-from typing import List, Tuple, Dict, Union, Optional, Callable
-import random
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Union, Optional, Callable, NamedTuple, ClassVar, Sequence
+import os
 
 import numpy as np
+import pandas as pd
+from scipy.ndimage import label as rotular_regiões
 
-from suporte.elementos_finitos import Malha, Nó, Matriz, Vetor
+from suporte.aleatoriedade import FluxosAleatórios
+from suporte.cache import CacheLRU, CacheDosMelhores, CachePersistente, resumo_do_gene, tornar_compartilhado
+from suporte.memória import orçamento_de_memória
+from suporte.elementos_finitos import Malha, MalhaAdaptativa, Nó, Matriz, Vetor
 from suporte.elementos_finitos.definição_de_problema import Problema, Máscara
 from suporte.elementos_finitos.membrana_quadrada import MembranaQuadrada, K_base
+from suporte.elementos_finitos.curvas_de_preenchimento import chaves_da_curva, reordenar
+from suporte.elementos_finitos.resolvedores import resolvedores_iterativos
 
 
 Gene = Matriz
 FunçãoMontadora = Callable[[Malha, Matriz, int], Matriz]
 
 
+class Respostas(NamedTuple):
+    """Respostas físicas de um projeto conectado à borda, das quais sua adaptação é calculada para quaisquer
+    parâmetros de penalização.
+
+    ATRIBUTOS
+    ---------
+    Acon        : float -- Área conectada, em m²
+    Ades        : float -- Área desconectada, em m²
+    Dmax        : float -- Deslocamento máximo, em m
+    erro_de_Dmax: float -- Estimativa do erro em Dmax deixado pelo resolvedor iterativo; nulo na resolução direta
+    """
+
+    Acon: float
+    Ades: float
+    Dmax: float
+    erro_de_Dmax: float = 0.0
+
+
+class ResumoDoFenótipo(NamedTuple):
+    """Respostas de um fenótipo guardadas no cache amplo, para parâmetros escaláveis unitários.
+
+    ATRIBUTOS
+    ---------
+    Dmax        : float -- Deslocamento máximo
+    erro_de_Dmax: float -- Estimativa do erro em Dmax deixado pelo resolvedor iterativo
+    tolerância  : float -- Tolerância relativa com que o sistema foi resolvido; nula na resolução direta
+    """
+
+    Dmax: float
+    erro_de_Dmax: float
+    tolerância: float
+
+
+class AvaliaçãoEmLote(NamedTuple):
+    """Adaptações e respostas físicas de um lote de genes, com uma posição por gene em cada vetor. As respostas dos
+    genes desconectados da borda, cuja adaptação é 0, são NaN.
+
+    ATRIBUTOS
+    ---------
+    adaptação   : Vetor -- Adaptações com os parâmetros de penalização correntes
+    Acon        : Vetor -- Áreas conectadas, em m²
+    Ades        : Vetor -- Áreas desconectadas, em m²
+    Dmax        : Vetor -- Deslocamentos máximos, em m
+    erro_de_Dmax: Vetor -- Estimativas do erro em Dmax deixado pelo resolvedor iterativo
+    inferior    : Vetor -- Limites inferiores dos intervalos de adaptação
+    superior    : Vetor -- Limites superiores dos intervalos de adaptação
+    iterações   : Vetor -- Iterações do resolvedor iterativo em cada gene resolvido
+    """
+
+    adaptação: Vetor
+    Acon: Vetor
+    Ades: Vetor
+    Dmax: Vetor
+    erro_de_Dmax: Vetor
+    inferior: Vetor
+    superior: Vetor
+    iterações: Vetor
+
+
+class CamposDoFenótipo(NamedTuple):
+    """Forças e deslocamentos de um fenótipo, em precisão simples e para parâmetros escaláveis unitários, guardados
+    no cache dos fenótipos mais adaptados.
+
+    ATRIBUTOS
+    ---------
+    f: Vetor -- Forças nodais, incluindo as reações dos apoios
+    u: Vetor -- Deslocamentos nodais, na ordem dos nós da malha do fenótipo
+    """
+
+    f: Vetor
+    u: Vetor
+
+
 class PlacaEmBalanço(Problema):
-    """Implementação do problema da Placa em Balanço 2x1"""
+    """Implementação do problema da Placa em Balanço 2x1
+
+    Na elasticidade linear, os deslocamentos são proporcionais a P / (E·t). O cache de fenótipos guarda, portanto, as
+    respostas de carga, módulo de Young e espessura unitários, que servem a qualquer cenário de mesma física (mesma
+    malha, coeficiente de Poisson e condições de contorno) após multiplicadas pelo fator de escala do cenário.
+    """
 
     Monitorador = Problema.Monitorador
 
-    def __init__(self, parâmetros_do_problema, método_padrão=None):
-        # Inicia um cache de fenótipos
-        self.fenótipos_testados = Cache(maxsize=300)
+    # Parâmetros dos quais os deslocamentos dependem apenas pelo fator de escala P / (E·t)
+    parâmetros_escaláveis: ClassVar[Tuple[str, ...]] = ("MAGNITUDE_DA_CARGA_APLICADA",
+                                                         "MÓDULO_DE_YOUNG_DO_MATERIAL",
+                                                         "ESPESSURA_DO_ELEMENTO")
+
+    # Caches de fenótipos compartilhados entre instâncias de mesma física, identificados por chave_física
+    caches_compartilhados: ClassVar[Dict[Tuple, Tuple[CacheLRU, CacheDosMelhores]]] = {}
 
+    def __init__(self, parâmetros_do_problema, método_padrão=None):
         super().__init__(parâmetros_do_problema, método_padrão)
         self._digerir(parâmetros_do_problema)
         self._iniciar_resolvedor()
 
+        # Inicia o cache de fenótipos em dois níveis, próprio ou compartilhado com os cenários de mesma física: um
+        # amplo, só com os resumos das respostas, e um pequeno, com os campos completos dos fenótipos mais adaptados
+        caches = (CacheLRU(máximo_de_entradas=self.máximo_de_fenótipos_testados),
+                  CacheDosMelhores(capacidade=self.máximo_de_campos_guardados))
+        if self.compartilhar_fenótipos:
+            caches = self.caches_compartilhados.setdefault(self.chave_física, caches)
+        self.fenótipos_testados, self.campos_dos_melhores = caches
+        self._registrar_na_memória()
+
+        # Abre, se pedido, o cache em disco que guarda os resumos dos fenótipos entre execuções
+        self.fenótipos_persistidos: Optional[CachePersistente] = None
+        if self.caminho_do_cache_persistente is not None:
+            self.fenótipos_persistidos = CachePersistente(self.caminho_do_cache_persistente, self.impressão_física())
+
     def _digerir(self, parâmetros_do_problema):
         self.n: int = parâmetros_do_problema["ORDEM_DE_REFINAMENTO_DA_MALHA"]
         if self.n % 2 != 0:
@@ -42,16 +147,107 @@ class PlacaEmBalanço(Problema):
         self.lado_dos_elementos = 1/self.n
         self.alfa = self.alfa_0
 
+        # Determina se os deslocamentos também devem ser armazenados numa grade (n + 1) x (2n + 1) x 2 alinhada à
+        # discretização do espaço de projeto, independente da ordem dos nós de cada fenótipo
+        self.resultados_em_grade: bool = parâmetros_do_problema.get("FORMATO_DOS_DESLOCAMENTOS", "vetor") == "grade"
+
+        # Determina a ordem dos nós e elementos na malha: a do caminho percorrido pelo algoritmo de busca ou a de uma
+        # curva de preenchimento do espaço ("morton" ou "hilbert") calculada sobre as coordenadas da grade
+        self.ordenação_da_malha: str = parâmetros_do_problema.get("ORDENAÇÃO_DA_MALHA", "busca")
+        if self.ordenação_da_malha != "busca" and self.ordenação_da_malha not in chaves_da_curva:
+            raise ValueError(f"Ordenação da malha desconhecida: {self.ordenação_da_malha}. Escolha dentre "
+                             f"{['busca'] + list(chaves_da_curva)}.")
+
+        # Determina até que nível blocos sólidos 2^k x 2^k do fenótipo são aglutinados num único elemento. No nível 0,
+        # padrão, a malha é uniforme
+        self.nível_máximo_de_aglutinação: int = parâmetros_do_problema.get("NÍVEL_MÁXIMO_DE_AGLUTINAÇÃO", 0)
+
+        # Determina quantas linhas de execução o montador paralelo usa
+        self.linhas_de_execução: int = parâmetros_do_problema.get("LINHAS_DE_EXECUÇÃO_DA_MONTAGEM", os.cpu_count())
+
+        # Determina como o sistema linear é resolvido. Resolvedores iterativos partem de uma tolerância frouxa, que o
+        # ambiente aperta até a final apenas para os projetos cuja adaptação precisa ser conhecida com mais exatidão
+        self.resolvedor: str = parâmetros_do_problema.get("RESOLVEDOR_DO_SISTEMA_LINEAR", "direto")
+        if self.resolvedor != "direto" and self.resolvedor not in resolvedores_iterativos:
+            raise ValueError(f"Resolvedor do sistema linear desconhecido: {self.resolvedor}. Escolha dentre "
+                             f"{['direto'] + sorted(resolvedores_iterativos)}.")
+        self.tolerância_do_resolvedor: float = parâmetros_do_problema.get("TOLERÂNCIA_INICIAL_DO_RESOLVEDOR", 1e-2)
+        self.tolerância_final_do_resolvedor: float = parâmetros_do_problema.get("TOLERÂNCIA_FINAL_DO_RESOLVEDOR",
+                                                                                 1e-10)
+
+        # Determina o pré-condicionador dos resolvedores iterativos: o de Jacobi ou a fatoração da rigidez de um projeto
+        # representativo da população ("elite" ou "consenso"), refeita quando as iterações por resolução crescem mais
+        # que o fator de degradação em relação às observadas logo após sua construção
+        self.pré_condicionador: str = parâmetros_do_problema.get("PRÉ_CONDICIONADOR_DO_RESOLVEDOR", "jacobi")
+        if self.pré_condicionador not in ("jacobi", "elite", "consenso"):
+            raise ValueError(f"Pré-condicionador desconhecido: {self.pré_condicionador}. Escolha dentre "
+                             f"['jacobi', 'elite', 'consenso'].")
+        self.fator_de_degradação_do_pré_condicionador: float = parâmetros_do_problema.get(
+            "FATOR_DE_DEGRADAÇÃO_DO_PRÉ_CONDICIONADOR", 1.5)
+
+        # Fração máxima de graus de liberdade sem correspondente no representativo para que um projeto use o
+        # pré-condicionador compartilhado. Acima dela, as iterações superam as do pré-condicionador de Jacobi
+        self.discrepância_máxima_do_pré_condicionador: float = parâmetros_do_problema.get(
+            "DISCREPÂNCIA_MÁXIMA_DO_PRÉ_CONDICIONADOR", 0.1)
+
+        # Determina se o cache de fenótipos é compartilhado com outras instâncias cujos parâmetros diferem apenas nos
+        # escaláveis, como os cenários de uma varredura de carga, módulo de Young e espessura
+        self.compartilhar_fenótipos: bool = parâmetros_do_problema.get("COMPARTILHAR_FENÓTIPOS_ENTRE_CENÁRIOS", False)
+
+        # Determina os limites dos dois níveis do cache de fenótipos: quantos resumos de respostas são mantidos e de
+        # quantos dos fenótipos mais adaptados as forças e os deslocamentos são guardados
+        self.máximo_de_fenótipos_testados: int = parâmetros_do_problema.get("MÁXIMO_DE_FENÓTIPOS_TESTADOS", 1_000_000)
+        self.máximo_de_campos_guardados: int = parâmetros_do_problema.get("MÁXIMO_DE_CAMPOS_GUARDADOS", 50)
+
+        # Arquivo do cache persistente de fenótipos, reaproveitado entre execuções e sementes. Sem ele, o cache de
+        # fenótipos dura apenas a execução
+        self.caminho_do_cache_persistente: Optional[str] = parâmetros_do_problema.get("CACHE_PERSISTENTE_DE_FENÓTIPOS")
+
+    @property
+    def fator_de_escala(self) -> float:
+        """Razão P / (E·t) pela qual são multiplicados os deslocamentos obtidos com parâmetros escaláveis unitários."""
+        return self.escala_de(self.parâmetros_do_problema)
+
+    @classmethod
+    def escala_de(cls, parâmetros: Dict[str, float]) -> float:
+        """Calcula o fator de escala P / (E·t) de um conjunto de parâmetros."""
+        P, E, t = (parâmetros[nome] for nome in cls.parâmetros_escaláveis)
+        return P / (E * t)
+
+    @property
+    def chave_física(self) -> Tuple:
+        """Identifica os cenários cujos fenótipos têm as mesmas respostas unitárias: mesma classe de problema, malha,
+        coeficiente de Poisson e forma de construir e guardar os resultados."""
+        return (type(self).__module__, type(self).__qualname__, self.n,
+                self.parâmetros_do_problema["COEFICIENTE_DE_POYSSON"], self.nível_máximo_de_aglutinação,
+                self.ordenação_da_malha, self.resultados_em_grade)
+
+    def impressão_física(self) -> str:
+        """
+        Resume em 128 bits tudo de que as respostas unitárias de um fenótipo dependem: a chave física e a matriz de
+        rigidez local calculada com módulo de Young e espessura unitários.
+
+        Como a matriz é calculada, e não lida do código, alterações na formulação do elemento mudam a impressão e inva-
+        lidam os resultados persistidos com a anterior.
+        """
+        Ke_unitária = K_base.calcular(dict(self._parâmetros_dos_elementos(self.lado_dos_elementos), t=1, E=1))
+        conteúdo = repr(self.chave_física).encode() + np.ascontiguousarray(Ke_unitária, dtype=float).tobytes()
+        return blake2b(conteúdo, digest_size=16).hexdigest()
+
     def _iniciar_resolvedor(self):
         self.Ke: Optional[Matriz] = None
+        self.Kes_por_tamanho: Optional[Dict[int, Matriz]] = None
         self._montador_do: Dict[str, FunçãoMontadora] = {
             "expansão": self.montador_expansão,
             "compacto": self.montador_compacto,
             "OptV1": self.montador_OptV1,
-            "OptV2": self.montador_OptV2
+            "OptV2": self.montador_OptV2,
+            "OptV2_paralelo": self.montador_OptV2_paralelo,
+            "adaptativo": self.montador_adaptativo
         }
 
-    def geração_0(self, n_de_indivíduos: int = 125, espessura_interna_mínima: int = 4) -> List[Gene]:
+    def geração_0(self, n_de_indivíduos: int = 125, espessura_interna_mínima: int = 4,
+                  geradores: Optional[Sequence[np.random.Generator]] = None) -> List[Gene]:
         """
         Gera aleatoriamente 100 projetos de espessura interna mínima igual a t que estão conectados à borda
         e ao ponto de aplicação da carga.
@@ -61,28 +257,38 @@ class PlacaEmBalanço(Problema):
         o ponto de aplicação da carga até a borda. Os nós pertencentes à trajetória percorrida no grafo recebem o valor
         1. O grafo é então traduzido para um gene que inicia uma instância da classe Projeto. Este processo é repetido
         e o resultado de 100 iterações é retornado numa lista.
+
+        Cada projeto é sorteado do seu próprio gerador, o de mesmo índice em geradores. Se eles não forem fornecidos,
+        são derivados de uma semente sorteada do gerador global do numpy.
         """
+        if geradores is None:
+            geradores = FluxosAleatórios().geradores(0, "geração_0", n_de_indivíduos)
 
         genes = []
         for k in range(n_de_indivíduos):
+            gerador = geradores[k]
+
             # Inicia um grafo que representa o preenchimento de cada fatia do espaço de projeto
-            grafo = np.random.choice((True, False), (7, 14))
+            grafo = gerador.random((7, 14)) < 0.5
 
             # Determina os pontos de corte e retorna seus índices i e j
             pontos_de_corte_horizontal = self._fatiar_intervalo(comprimento_total=self.n,
                                                                 número_de_fatias=7,
                                                                 dividir_ao_meio=True,
-                                                                comprimento_mínimo_das_fatias=espessura_interna_mínima)
+                                                                comprimento_mínimo_das_fatias=espessura_interna_mínima,
+                                                                gerador=gerador)
             pontos_de_corte_vertical = self._fatiar_intervalo(comprimento_total=2*self.n,
                                                               número_de_fatias=14,
                                                               dividir_ao_meio=False,
-                                                              comprimento_mínimo_das_fatias=espessura_interna_mínima)
+                                                              comprimento_mínimo_das_fatias=espessura_interna_mínima,
+                                                              gerador=gerador)
 
             # Caminha aleatoriamente pelo grafo desde o ponto de aplicação da força até uma borda,
             # preenchendo as fatias ao longo da trajetória
             trajetória = self._caminhar_até_a_borda(
                 i_partida=int(np.where(pontos_de_corte_horizontal == int(self.n//2))[0]),
-                j_partida=13
+                j_partida=13,
+                gerador=gerador
             )
             grafo[trajetória[0], trajetória[1]] = 1
 
@@ -95,7 +301,7 @@ class PlacaEmBalanço(Problema):
         return genes
 
     @staticmethod
-    def _fatiar_intervalo(comprimento_total: int = 38, número_de_fatias: int = 7,
+    def _fatiar_intervalo(gerador: np.random.Generator, comprimento_total: int = 38, número_de_fatias: int = 7,
                           comprimento_mínimo_das_fatias: int = 4, dividir_ao_meio: bool = False
                           ) -> Vetor:
         """Fatia aleatoriamente um intervalo de comprimento c em f fatias (ou subintervalos) de comprimento mínimo t
@@ -112,8 +318,9 @@ class PlacaEmBalanço(Problema):
 
         # Calcula os índices como o resultado da soma cumulativa do vetor que contém o comprimento de cada
         # subintervalo tomado como o comprimento mínimo somado a uma distribuição aleatória da folga
+        distribuição_da_folga = peb._distribuir(folga, número_de_fatias, gerador)
         índices_dos_pontos_de_corte = np.cumsum([0] + list(np.array(número_de_fatias * [comprimento_mínimo_das_fatias])
-                                                           + np.array(peb._distribuir(folga, número_de_fatias))))
+                                                           + np.array(distribuição_da_folga)))
 
         # Corrige a divisão quando se deseja que haja um corte em c // 2
         if dividir_ao_meio:
@@ -122,19 +329,19 @@ class PlacaEmBalanço(Problema):
         return índices_dos_pontos_de_corte
 
     @staticmethod
-    def _distribuir(folga: int, número_de_fatias: int) -> List[int]:
+    def _distribuir(folga: int, número_de_fatias: int, gerador: np.random.Generator) -> List[int]:
         """Distribui a folga aleatoriamente dentre as fatias"""
 
         distribuição = []
         for _ in range(número_de_fatias):
-            espaço_extra = random.choice(list(range(folga + 1)))
+            espaço_extra = int(gerador.integers(folga + 1))
             folga -= espaço_extra
             distribuição.append(espaço_extra)
 
         if folga > 0:
             distribuição[-1] += folga
 
-        random.shuffle(distribuição)
+        gerador.shuffle(distribuição)
         return distribuição
 
     @staticmethod
@@ -154,7 +361,8 @@ class PlacaEmBalanço(Problema):
                 break
 
     @staticmethod
-    def _caminhar_até_a_borda(i_partida: int = 0, j_partida: int = 13) -> Tuple[List[int], List[int]]:
+    def _caminhar_até_a_borda(gerador: np.random.Generator, i_partida: int = 0, j_partida: int = 13
+                              ) -> Tuple[List[int], List[int]]:
         """Caminha aleatoriamente pelo grafo desde o ponto de aplicação da força até uma borda.̉"""
 
         I = []
@@ -197,7 +405,7 @@ class PlacaEmBalanço(Problema):
                 p = (0.32, 0.32, 0.36)
 
             # Escolhe, finalmente, a direção de movimento
-            mover_para = np.random.choice(direções, p=p)
+            mover_para = direções[gerador.choice(len(direções), p=p)]
 
             # Checa se a borda foi alcançada
             if mover_para == "esquerda" and j == 0:
@@ -228,67 +436,511 @@ class PlacaEmBalanço(Problema):
 
         return gene
 
-    def testar_adaptação(self, proj: 'Projeto') -> None:
+    def testar_adaptação(self, proj: 'Projeto', tolerância: Optional[float] = None) -> None:
         """
         Constrói e testa o fenótipo do projeto.
 
         Caso a malha não esteja conectada à borda, atribui adaptação 0 ao indivíduo e sinaliza na saída do sistema. Caso
         esteja, verifica se um fenótipo idêntico já teve sua adaptação calculada. Caso não tenha, aplica o cálculo da a-
         daptação.
-        """
 
-        # Carrega o lado, em metros, do elemento de membrana quadrada
-        l = self.lado_dos_elementos
+        As respostas físicas das quais a adaptação é calculada ficam em proj.respostas. O cache de fenótipos guarda
+        apenas o deslocamento máximo, seu erro e a tolerância com que foi obtido, não adaptações, de modo que as adapta-
+        ções reaproveitadas refletem os parâmetros de penalização correntes. Se pedido, esses resumos também são persis-
+        tidos em disco e consultados quando faltam na memória. Forças e deslocamentos completos são guardados, em preci-
+        são simples, só para os fenótipos mais adaptados. Os demais projetos reaproveitados do cache ficam sem f, u e
+        malha, que podem ser refeitos por reconstruir_campos. Os valores guardados correspondem a parâmetros escaláveis
+        unitários e são convertidos pelo fator de escala do cenário ao serem lidos.
+
+        Com um resolvedor iterativo, o sistema é resolvido com a tolerância fornecida (ou a inicial, se nenhuma for) e
+        o erro estimado nos deslocamentos delimita o intervalo estimado da adaptação exata. O erro vem do menor valor
+        de Ritz e pode ser subestimado, de modo que o intervalo não é garantido. Resultados em cache só
+        são reaproveitados se foram obtidos com tolerância igual ou menor; caso contrário, os deslocamentos guardados,
+        se houver, servem de chute inicial.
+
+        É um lote de um só gene de testar_adaptação_em_lote, cujos resultados são atribuídos ao projeto junto da malha,
+        das forças e dos deslocamentos.
+        """
+        avaliação, (campos,) = self._testar_lote([proj.gene], [proj.nome], tolerância, com_campos=True)
+        adaptação, Acon, Ades, Dmax, δ, inferior, superior, iterações = (valores[0] for valores in avaliação)
 
-        # Chama o algoritmo de identificação da porção útil do gene e construção do fenótipo.
-        fenótipo, borda_alcançada, elementos_conectados, nós, me = self._determinar_fenótipo(proj.gene, l)
+        proj.iterações = int(iterações)
+        proj.adaptação = adaptação
+        proj.intervalo_de_adaptação = (inferior, superior)
 
-        if not self._atende_os_requisitos_mínimos(proj, fenótipo, borda_alcançada):
-            proj.adaptação = 0
+        if np.isnan(Acon):
+            proj.respostas = None
         else:
-            # Checa se este fenótipo já teve sua adaptação calculada antes
-            if fenótipo.data.tobytes() in self.fenótipos_testados:
-                # Recupera a adaptação do cache
-                proj.adaptação, proj.f, proj.u, proj.malha = self.fenótipos_testados[fenótipo.data.tobytes()]
-                print(f"> Adaptação de {proj.nome} já era conhecida pelo seu fenótipo")
+            proj.respostas = Respostas(Acon, Ades, Dmax, δ)
+            proj.f = proj.u = proj.malha = proj.u_em_grade = None
+            if campos is not None:
+                proj.malha, f, u = campos
+                self._atribuir_campos(proj, f, u)
+
+        proj.adaptação_testada = True
+
+    def testar_adaptação_em_lote(self, genes: Union[Sequence[Gene], np.ndarray], tolerância: Optional[float] = None,
+                                 nomes: Optional[Sequence[str]] = None) -> AvaliaçãoEmLote:
+        """
+        Testa a adaptação de um lote de genes, empilhados num array ou numa sequência, e retorna as adaptações e as
+        respostas físicas de todos num AvaliaçãoEmLote, sem criar projetos nem guardar malhas e campos.
+
+        As etapas que não dependem da resolução de cada fenótipo são feitas para o lote inteiro: os fenótipos saem de
+        uma única rotulação da pilha de genes, as áreas conectadas e desconectadas, de somas sobre as pilhas de fenóti-
+        pos e de genes, e as adaptações e seus intervalos, de uma única chamada vetorizada com os parâmetros de penali-
+        zação correntes. Os fenótipos são consultados nos caches e, se preciso, têm a malha construída e são resolvidos
+        um a um, como em testar_adaptação, cujas regras de cache e de tolerância valem aqui.
+        Genes de mesmo fenótipo no lote são resolvidos uma só vez. Os nomes, usados apenas nas mensagens, são "Gene_k"
+        se não forem fornecidos.
+        """
+        nomes = nomes if nomes is not None else [f"Gene_{k + 1}" for k in range(len(genes))]
+        return self._testar_lote(genes, nomes, tolerância, com_campos=False)[0]
+
+    def _testar_lote(self, genes: Union[Sequence[Gene], np.ndarray], nomes: Sequence[str],
+                     tolerância: Optional[float], com_campos: bool
+                     ) -> Tuple[AvaliaçãoEmLote, List[Optional[Tuple[Malha, Vetor, Vetor]]]]:
+        """Testa o lote e retorna, além da avaliação, a malha, as forças e os deslocamentos de cada gene resolvido ou,
+        se com_campos, reaproveitado do cache dos campos dos melhores; None para os demais."""
+        iterativo = self.resolvedor in resolvedores_iterativos
+        if tolerância is None:
+            tolerância = self.tolerância_do_resolvedor if iterativo else 0.0
+
+        # Carrega o lado, em metros, do elemento de membrana quadrada
+        l = self.lado_dos_elementos
+        escala = self.fator_de_escala
+        P = self.parâmetros_do_problema["MAGNITUDE_DA_CARGA_APLICADA"]
+        n_de_genes = len(genes)
+        if not n_de_genes:
+            return AvaliaçãoEmLote(*(np.empty(0) for _ in AvaliaçãoEmLote._fields)), []
+
+        # Identifica a porção útil de todos os genes de uma vez. Nós e elementos só são construídos, gene a gene, para
+        # os fenótipos conectados que precisarem de malha
+        fenótipos, bordas_alcançadas = self._fenótipos_do_lote(genes)
+        conectados = np.array([self._atende_os_requisitos_mínimos(nome, fenótipo, borda_alcançada)
+                               for nome, fenótipo, borda_alcançada in zip(nomes, fenótipos, bordas_alcançadas)],
+                              dtype=bool)
+
+        # Determina as áreas conectadas e desconectadas. A desconectada depende do gene, não só do fenótipo
+        Acon = fenótipos.sum(axis=(1, 2)) * (l ** 2)
+        Ades = np.stack(genes).sum(axis=(1, 2)) * (l ** 2) - Acon
+        Acon[~conectados] = Ades[~conectados] = np.nan
+
+        Dmax, δ = np.full(n_de_genes, np.nan), np.full(n_de_genes, np.nan)
+        iterações = np.zeros(n_de_genes)
+        campos: List[Optional[Tuple[Malha, Vetor, Vetor]]] = [None] * n_de_genes
+        resolvidos = []
+        primeiro_de_cada_fenótipo: Dict[bytes, int] = {}
+
+        for k in np.flatnonzero(conectados):
+            fenótipo = fenótipos[k]
+            chave = resumo_do_gene(fenótipo)
+
+            # Repete as respostas de um fenótipo já avaliado neste lote. Só a área desconectada, já calculada, difere
+            if chave in primeiro_de_cada_fenótipo:
+                primeiro = primeiro_de_cada_fenótipo[chave]
+                Dmax[k], δ[k], campos[k] = Dmax[primeiro], δ[primeiro], campos[primeiro]
+                print(f"> Adaptação de {nomes[k]} já era conhecida pelo seu fenótipo")
+                continue
+            primeiro_de_cada_fenótipo[chave] = k
+
+            resumo_anterior = self.fenótipos_testados.obter(chave)
+            if resumo_anterior is None and self.fenótipos_persistidos is not None:
+                persistido = self.fenótipos_persistidos.obter(chave)
+                if persistido is not None:
+                    resumo_anterior = self.fenótipos_testados[chave] = ResumoDoFenótipo(*persistido)
+
+            # Checa se este fenótipo já teve sua resposta calculada antes com exatidão suficiente
+            if resumo_anterior is not None and resumo_anterior.tolerância <= tolerância:
+                # Recupera as respostas do cache. A adaptação é recalculada com os parâmetros de penalização correntes
+                Dmax[k], δ[k] = resumo_anterior.Dmax * escala, resumo_anterior.erro_de_Dmax * escala
+
+                guardados = self.campos_dos_melhores.obter(chave) if com_campos else None
+                if guardados is not None:
+                    _, _, elementos_conectados, nós, me = self._determinar_fenótipo(genes[k], l)
+                    malha, _ = self._construir_malha(fenótipo, elementos_conectados, nós, me, l)
+                    campos[k] = (malha, guardados.f * P, guardados.u * escala)
+
+                print(f"> Adaptação de {nomes[k]} já era conhecida pelo seu fenótipo")
             else:
                 # Determina que os tempos de execução de cada etapa da análise por elementos_finitos
                 # finitos sejam mensurados cada vez que o nome do Projeto terminar em "1"
-                monitorar = proj.nome.endswith("1")
+                monitorar = nomes[k].endswith("1")
+
+                _, _, elementos_conectados, nós, me = self._determinar_fenótipo(genes[k], l)
+                malha, método = self._construir_malha(fenótipo, elementos_conectados, nós, me, l)
 
-                proj.f, proj.u, proj.malha = self.resolver_para(
+                # A malha de um mesmo fenótipo é sempre construída na mesma ordem, então deslocamentos menos exatos
+                # guardados em cache são um bom ponto de partida para as iterações
+                guardados = self.campos_dos_melhores.obter(chave) if resumo_anterior is not None else None
+
+                f, u, malha = self.resolver_para(
 
                     monitorar=monitorar,
-                    malha=Malha(elementos_conectados, nós, me),
-                    parâmetros_dos_elementos={"l": l,
-                                              "t": self.parâmetros_do_problema["ESPESSURA_DO_ELEMENTO"],
-                                              "v": self.parâmetros_do_problema["COEFICIENTE_DE_POYSSON"],
-                                              "E": self.parâmetros_do_problema["MÓDULO_DE_YOUNG_DO_MATERIAL"]}
+                    malha=malha,
+                    método=método,
+                    parâmetros_dos_elementos=self._parâmetros_dos_elementos(l),
+                    tolerância=tolerância,
+                    chute_inicial=None if guardados is None else guardados.u * escala
 
                 )
 
-                # Determina as áreas conectadas e desconectadas
-                Acon = fenótipo.sum() * (l ** 2)
-                Ades = proj.gene.sum() * (l ** 2) - Acon
+                campos[k] = (malha, f, u)
 
                 # Calcula o deslocamento máximo como a raiz quadrada do maior
                 # valor de u_x² + u_y² dentre todos os nós da malha
-                n = len(nós)
-                Dmax = np.sqrt(np.sum(proj.u.reshape((n, 2)) ** 2, axis=1).max())
+                if self.resultados_em_grade:
+                    Dmax[k] = self.deslocamento_máximo(self.deslocamentos_em_grade(np.asarray(u, dtype=float), malha))
+                else:
+                    Dmax[k] = np.sqrt(np.sum(np.reshape(u, (len(malha.nós), 2)) ** 2, axis=1).max())
 
-                penalização = Dmax - self.Dlim if Dmax > self.Dlim else 0
+                # O deslocamento de cada nó difere do exato no máximo pela norma do erro em u, aqui apenas estimada
+                if iterativo:
+                    iterações[k] = self.último_resultado_iterativo.iterações
+                    δ[k] = self.último_resultado_iterativo.erro_estimado
+                else:
+                    δ[k] = 0.0
+
+                resolvidos.append((k, chave, f, u))
+
+        # Calcula as adaptações e os intervalos de todo o lote de uma vez. Projetos desconectados têm adaptação 0
+        adaptação, inferior, superior = np.zeros(n_de_genes), np.zeros(n_de_genes), np.zeros(n_de_genes)
+        adaptação[conectados] = self.calcular_adaptação(Acon[conectados], Ades[conectados], Dmax[conectados])
+        inferior[conectados], superior[conectados] = self.intervalo_de_adaptação(Acon[conectados], Ades[conectados],
+                                                                                 Dmax[conectados], δ[conectados])
+
+        for k, chave, f, u in resolvidos:
+            penalização = Dmax[k] - self.Dlim if Dmax[k] > self.Dlim else 0
+
+            if penalização:
+                print(f"> Projeto {nomes[k]} penalizado: Dmax - Dlim = {penalização:.3e} metros")
+
+            print(f"> {nomes[k]} conectado à borda. Adaptação: {adaptação[k]}")
+
+            resumo = ResumoDoFenótipo(Dmax[k] / escala, δ[k] / escala, tolerância)
+            self.fenótipos_testados[chave] = resumo
+            if self.fenótipos_persistidos is not None:
+                self.fenótipos_persistidos[chave] = tuple(float(valor) for valor in resumo)
+            self.campos_dos_melhores.guardar(chave,
+                                             CamposDoFenótipo((f / P).astype(np.float32),
+                                                              (u / escala).astype(np.float32)),
+                                             mérito=superior[k])
+
+        return AvaliaçãoEmLote(adaptação, Acon, Ades, Dmax, δ, inferior, superior, iterações), campos
+
+    def identificar_fenótipo(self, gene: Gene) -> Tuple[bytes, bool]:
+        """Retorna uma chave do fenótipo do gene, sem construir seus nós e elementos nem resolvê-lo. Genes de mesma
+        chave têm as mesmas respostas, exceto pela área desconectada, e basta resolver um deles."""
+        (chave,), _ = self.identificar_fenótipos([gene])
+        return chave
+
+    def identificar_fenótipos(self, genes: Union[Sequence[Gene], np.ndarray]
+                              ) -> Tuple[List[Tuple[bytes, bool]], np.ndarray]:
+        """Retorna as chaves dos fenótipos de um lote de genes, como identificar_fenótipo, e as máscaras empilhadas dos
+        fenótipos, das quais estimar_graus_de_liberdade conta os graus de liberdade das malhas."""
+        fenótipos, bordas_alcançadas = self._fenótipos_do_lote(genes)
+        return ([(resumo_do_gene(fenótipo), bool(borda_alcançada))
+                 for fenótipo, borda_alcançada in zip(fenótipos, bordas_alcançadas)], fenótipos)
+
+    def _fenótipos_do_lote(self, genes: Union[Sequence[Gene], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Determina, numa única rotulação da pilha de genes, as máscaras dos fenótipos que _determinar_fenótipo cons-
+        trói, isto é, as células de cada gene ligadas, por lados, à de aplicação da força, que a busca sempre inclui, e
+        se cada fenótipo alcança a borda. A estrutura da rotulação não liga células de genes vizinhos na pilha."""
+        células = np.array(genes, dtype=bool).reshape(-1, self.n, 2*self.n)
+        i, j = self.n // 2, 2*self.n - 1
+        células[:, i, j] = True
+
+        estrutura = np.zeros((3, 3, 3), dtype=bool)
+        estrutura[1] = [[False, True, False], [True, True, True], [False, True, False]]
+        rótulos, _ = rotular_regiões(células, structure=estrutura)
+        fenótipos = rótulos == rótulos[:, i, j, np.newaxis, np.newaxis]
+        return fenótipos, fenótipos[:, :, 0].any(axis=1)
+
+    def _células_conectadas(self, gene: Gene) -> Matriz:
+        """Determina apenas a máscara do fenótipo do gene que _determinar_fenótipo constrói."""
+        return self._fenótipos_do_lote([gene])[0][0]
 
-                if penalização:
-                    print(f"> Projeto {proj.nome} penalizado: Dmax - Dlim = {penalização:.3e} metros")
+    @staticmethod
+    def estimar_graus_de_liberdade(fenótipo: Matriz) -> int:
+        """Estima, sem construir a malha, o número de graus de liberdade do fenótipo de máscara fornecida, como as de
+        identificar_fenótipos: dois por nó dos cantos das suas células. Aplicada ao gene, conta também as células des-
+        conectadas e supera o da malha. Serve para prever o custo da resolução antes de enviá-la."""
+        células = np.pad(np.asarray(fenótipo, dtype=bool), 1)
+        nós = células[:-1, :-1] | células[:-1, 1:] | células[1:, :-1] | células[1:, 1:]
+        return 2 * int(nós.sum())
+
+    def compartilhar_cache_entre_processos(self, gerenciador: 'SyncManager') -> None:
+        """
+        Apoia o cache amplo de fenótipos num dicionário do gerenciador fornecido, compartilhado por todos os processos
+        que recebem cópias deste problema.
 
-                proj.adaptação = 1 / (Acon + self.e * Ades + self.alfa * penalização)
+        O cache dos campos dos melhores continua próprio de cada processo e não é copiado para os demais, pois seus
+        vetores tornariam cara cada tarefa enviada a eles.
+        """
+        self.fenótipos_testados = tornar_compartilhado(self.fenótipos_testados, gerenciador.dict())
 
-                print(f"> {proj.nome} conectado à borda. Adaptação: {proj.adaptação}")
+    def _registrar_na_memória(self) -> None:
+        """Registra os dois níveis do cache de fenótipos no orçamento de memória da execução. Cada acerto de qualquer
+        um deles poupa uma resolução."""
+        orçamento_de_memória.registrar("fenótipos_testados",
+                                       getattr(self.fenótipos_testados, "local", self.fenótipos_testados))
+        orçamento_de_memória.registrar("campos_dos_melhores", self.campos_dos_melhores)
 
-                self.fenótipos_testados[fenótipo.data.tobytes()] = proj.adaptação, proj.f, proj.u, proj.malha
+    def __getstate__(self):
+        estado = super().__getstate__()
+        estado["campos_dos_melhores"] = CacheDosMelhores(self.campos_dos_melhores.capacidade)
+        return estado
 
-        proj.adaptação_testada = True
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._registrar_na_memória()
 
+    def reconstruir_campos(self, proj: 'Projeto') -> None:
+        """
+        Refaz a malha, as forças e os deslocamentos de um projeto reaproveitado do cache de fenótipos sem eles.
+
+        A malha é reconstruída a partir do gene; forças e deslocamentos vêm do cache dos fenótipos mais adaptados ou,
+        se lá não estiverem, de uma nova resolução. Projetos desconectados da borda ou que já têm seus campos não são
+        alterados.
+        """
+        if proj.u is not None and proj.malha is not None:
+            return
+
+        l = self.lado_dos_elementos
+        fenótipo, borda_alcançada, elementos_conectados, nós, me = self._determinar_fenótipo(proj.gene, l)
+        if not self._atende_os_requisitos_mínimos(proj.nome, fenótipo, borda_alcançada):
+            return
+
+        malha, método = self._construir_malha(fenótipo, elementos_conectados, nós, me, l)
+
+        campos = self.campos_dos_melhores.obter(resumo_do_gene(fenótipo))
+        if campos is not None:
+            f = campos.f * self.parâmetros_do_problema["MAGNITUDE_DA_CARGA_APLICADA"]
+            u = campos.u * self.fator_de_escala
+        else:
+            f, u, malha = self.resolver_para(malha=malha,
+                                             método=método,
+                                             parâmetros_dos_elementos=self._parâmetros_dos_elementos(l),
+                                             tolerância=self.tolerância_final_do_resolvedor)
+
+        proj.malha = malha
+        self._atribuir_campos(proj, f, u)
+
+    def _atribuir_campos(self, proj: 'Projeto', f: Vetor, u: Vetor) -> None:
+        proj.f, proj.u = np.asarray(f, dtype=float), np.asarray(u, dtype=float)
+        proj.u_em_grade = self.deslocamentos_em_grade(proj.u, proj.malha) if self.resultados_em_grade else None
+
+    def compartilhar_pré_condicionador_de(self, proj: 'Projeto') -> bool:
+        """
+        Fatora a rigidez do fenótipo do projeto fornecido para pré-condicionar as resoluções iterativas seguintes.
+
+        Os graus de liberdade são identificados pelas etiquetas (i, j) dos nós, comuns a todos os fenótipos. Retorna
+        False, sem alterar o pré-condicionador vigente, se o projeto não atende os requisitos mínimos para ser resolvido.
+        """
+        l = self.lado_dos_elementos
+        fenótipo, borda_alcançada, elementos_conectados, nós, me = self._determinar_fenótipo(proj.gene, l)
+
+        if not self._atende_os_requisitos_mínimos(proj.nome, fenótipo, borda_alcançada):
+            return False
+
+        malha, método = self._construir_malha(fenótipo, elementos_conectados, nós, me, l)
+        self.compartilhar_pré_condicionador(self._parâmetros_dos_elementos(l), malha, método,
+                                            discrepância_máxima=self.discrepância_máxima_do_pré_condicionador)
+
+        return True
+
+    def _construir_malha(self, fenótipo: Matriz, elementos: List[MembranaQuadrada], nós: List[Nó], me: Matriz, l: float
+                         ) -> Tuple[Malha, Optional[str]]:
+        """Monta a malha uniforme encontrada pela busca ou, se houver aglutinação, a malha adaptativa, e retorna o
+        método de montagem que ela exige."""
+        if self.nível_máximo_de_aglutinação > 0:
+            return self._construir_malha_adaptativa(fenótipo, l), "adaptativo"
+
+        if self.ordenação_da_malha != "busca":
+            elementos, nós, me = self._ordenar_pela_curva(elementos, nós, me)
+
+        return Malha(elementos, nós, me), None
+
+    def _parâmetros_dos_elementos(self, l: float) -> Dict[str, float]:
+        return {"l": l,
+                "t": self.parâmetros_do_problema["ESPESSURA_DO_ELEMENTO"],
+                "v": self.parâmetros_do_problema["COEFICIENTE_DE_POYSSON"],
+                "E": self.parâmetros_do_problema["MÓDULO_DE_YOUNG_DO_MATERIAL"]}
+
+    def calcular_adaptação(self, Acon: Union[float, Vetor], Ades: Union[float, Vetor], Dmax: Union[float, Vetor]
+                           ) -> Union[float, Vetor]:
+        """
+        Calcula a adaptação de projetos conectados à borda, penalizada pela área desconectada e pelo deslocamento exce-
+        dente, com os parâmetros de penalização correntes.
+
+        Aceita tanto as respostas de um projeto quanto vetores com as respostas de vários, de modo que uma população in-
+        teira pode ser reavaliada sem novas resoluções quando alfa muda.
+        """
+        return 1 / (Acon + self.e * Ades + self.alfa * np.maximum(Dmax - self.Dlim, 0))
+
+    def intervalo_de_adaptação(self,
+                               Acon: Union[float, Vetor],
+                               Ades: Union[float, Vetor],
+                               Dmax: Union[float, Vetor],
+                               erro_de_Dmax: Union[float, Vetor] = 0.0
+                               ) -> Tuple[Union[float, Vetor], Union[float, Vetor]]:
+        """Retorna os limites inferior e superior da adaptação quando Dmax é conhecido a menos de erro_de_Dmax. Como a
+        adaptação decresce com Dmax, são as adaptações em Dmax + erro e Dmax - erro."""
+        return (self.calcular_adaptação(Acon, Ades, Dmax + erro_de_Dmax),
+                self.calcular_adaptação(Acon, Ades, np.maximum(Dmax - erro_de_Dmax, 0)))
+
+    def varrer(self, projetos: Sequence['Projeto'], cenários: Sequence[Dict[str, float]]) -> pd.DataFrame:
+        """
+        Calcula o deslocamento máximo e a adaptação de cada projeto em cada cenário de uma varredura dos parâmetros
+        escaláveis, resolvendo cada projeto uma única vez.
+
+        Cada cenário fornece valores para alguns dos parâmetros escaláveis; os omitidos mantêm os da instância. Como
+        Dmax é proporcional a P / (E·t), o de cada cenário é obtido do Dmax já calculado multiplicado pela razão entre
+        os fatores de escala. Projetos ainda não testados são testados antes da varredura.
+        """
+        for cenário in cenários:
+            não_escaláveis = set(cenário) - set(self.parâmetros_escaláveis)
+            if não_escaláveis:
+                raise ValueError(f"Os parâmetros {sorted(não_escaláveis)} não escalam os deslocamentos. Escolha dentre "
+                                 f"{list(self.parâmetros_escaláveis)}.")
+
+        for proj in projetos:
+            if not proj.adaptação_testada:
+                self.testar_adaptação(proj)
+
+        conectados = np.array([proj.respostas is not None for proj in projetos], dtype=bool)
+        Acon, Ades, Dmax = (np.array([getattr(proj.respostas, r) if proj.respostas is not None else np.nan
+                                      for proj in projetos], dtype=float)
+                            for r in ("Acon", "Ades", "Dmax"))
+
+        linhas = []
+        for k, cenário in enumerate(cenários):
+            parâmetros = {nome: cenário.get(nome, self.parâmetros_do_problema[nome])
+                          for nome in self.parâmetros_escaláveis}
+            Dmax_do_cenário = Dmax * self.escala_de(parâmetros) / self.fator_de_escala
+            adaptações = np.where(conectados, self.calcular_adaptação(Acon, Ades, Dmax_do_cenário), 0)
+
+            for proj, Dmax_do_projeto, adaptação in zip(projetos, Dmax_do_cenário, adaptações):
+                linhas.append({"Cenário": k, "Projeto": proj.nome, **parâmetros,
+                               "Dmax": Dmax_do_projeto, "Adaptação": adaptação})
+
+        return pd.DataFrame(linhas)
+
+    def _ordenar_pela_curva(self, elementos: List[MembranaQuadrada], nós: List[Nó], me: Matriz
+                            ) -> Tuple[List[MembranaQuadrada], List[Nó], Matriz]:
+        """Renumera elementos e nós ao longo da curva de preenchimento escolhida para melhorar a localidade dos acessos
+        à memória na montagem e nos produtos K·u."""
+        chaves_de = chaves_da_curva[self.ordenação_da_malha]
+
+        I_nós, J_nós = np.array([nó.etiqueta for nó in nós]).T
+        I_elementos, J_elementos = np.array([elemento.nós[0].etiqueta for elemento in elementos]).T
+
+        return reordenar(elementos, nós, me,
+                         chaves_dos_elementos=chaves_de(I_elementos, J_elementos),
+                         chaves_dos_nós=chaves_de(I_nós, J_nós))
+
+    def _construir_malha_adaptativa(self, fenótipo: Matriz, l: float) -> MalhaAdaptativa:
+        """
+        Constrói uma malha em que blocos sólidos 2^k x 2^k do fenótipo, alinhados a múltiplos de 2^k na grade, são
+        aglutinados num único elemento de lado 2^k·l, do maior nível ao menor, como numa quadtree. As células restantes
+        viram elementos de lado l.
+
+        Nós de elementos menores que caem sobre o lado de um elemento maior são pendentes e têm seus deslocamentos
+        restritos à interpolação linear entre os cantos desse lado. Blocos cujo lado direito passa pelo ponto de apli-
+        cação da carga não são aglutinados para que ela continue aplicada num nó independente.
+        """
+        n = self.n
+
+        # Aglutina os blocos, do maior nível para o menor
+        blocos = []
+        coberto = np.zeros_like(fenótipo)
+        for k in range(self.nível_máximo_de_aglutinação, 0, -1):
+            s = 2 ** k
+            m, M = n // s, 2*n // s
+            if m == 0:
+                continue
+
+            cheios = (fenótipo[:m*s, :M*s].reshape((m, s, M, s)).all(axis=(1, 3))
+                      & ~coberto[:m*s, :M*s].reshape((m, s, M, s)).any(axis=(1, 3)))
+
+            if M*s == 2*n and (n // 2) % s != 0:
+                cheios[(n // 2) // s, M - 1] = False
+
+            for bi, bj in zip(*np.nonzero(cheios)):
+                blocos.append((bi*s, bj*s, s))
+                coberto[bi*s:(bi + 1)*s, bj*s:(bj + 1)*s] = True
+
+        blocos.extend((i, j, 1) for i, j in zip(*np.nonzero(fenótipo & ~coberto)))
+
+        if self.ordenação_da_malha != "busca":
+            I, J, _ = np.array(blocos).T
+            blocos = [blocos[b] for b in np.argsort(chaves_da_curva[self.ordenação_da_malha](I, J), kind="stable")]
+
+        # Constrói os elementos, os nós e a matriz de correspondência
+        elementos, nós, me, tamanhos = [], [], [], []
+        índice_na_malha = dict()
+
+        def índice_do_nó(i: int, j: int) -> int:
+            if (i, j) not in índice_na_malha:
+                índice_na_malha[(i, j)] = len(nós)
+                nós.append(Nó(j * l, 1 - i * l, etiqueta=(i, j)))
+            return índice_na_malha[(i, j)]
+
+        for i0, j0, s in blocos:
+            cantos = ((i0, j0), (i0, j0 + s), (i0 + s, j0 + s), (i0 + s, j0))
+            índices = [índice_do_nó(i, j) for i, j in cantos]
+
+            elementos.append(MembranaQuadrada(tuple(nós[índice] for índice in índices)))
+            me.append([2*índice + g for índice in índices for g in (0, 1)])
+            tamanhos.append(s)
+
+        # Identifica os nós pendentes e seus mestres diretos ao longo de cada lado dos elementos aglutinados
+        mestres_diretos = dict()
+        for i0, j0, s in blocos:
+            if s == 1:
+                continue
+            cantos = ((i0, j0), (i0, j0 + s), (i0 + s, j0 + s), (i0 + s, j0))
+            for (ia, ja), (ib, jb) in zip(cantos, cantos[1:] + cantos[:1]):
+                for t in range(1, s):
+                    ponto = (ia + t * (ib - ia) // s, ja + t * (jb - ja) // s)
+                    if ponto in índice_na_malha:
+                        mestres_diretos[índice_na_malha[ponto]] = [(índice_na_malha[(ia, ja)], 1 - t/s),
+                                                                   (índice_na_malha[(ib, jb)], t/s)]
+
+        # Um mestre pode ser ele mesmo pendente sobre o lado de um elemento ainda maior
+        def resolver_mestres(pendente: int) -> Dict[int, float]:
+            mestres = dict()
+            for mestre, peso in mestres_diretos[pendente]:
+                if mestre in mestres_diretos:
+                    for mestre_final, peso_final in resolver_mestres(mestre).items():
+                        mestres[mestre_final] = mestres.get(mestre_final, 0) + peso * peso_final
+                else:
+                    mestres[mestre] = mestres.get(mestre, 0) + peso
+            return mestres
+
+        restrições = {pendente: list(resolver_mestres(pendente).items()) for pendente in mestres_diretos}
+
+        return MalhaAdaptativa(elementos, nós, np.array(me, dtype="int32").T,
+                               tamanhos=np.array(tamanhos), restrições=restrições)
+
+    def deslocamentos_em_grade(self, u: Vetor, malha: Malha) -> Matriz:
+        """
+        Reinterpreta o vetor u, ordenado de acordo com os nós da malha de um fenótipo específico, como uma grade de
+        dimensões (n + 1) x (2n + 1) x 2 alinhada à discretização do espaço de projeto.
+
+        A posição [i, j] da grade carrega (u_x, u_y) do nó de etiqueta (i, j). Nós ausentes do fenótipo recebem NaN. Com
+        isso, campos de deslocamento de projetos distintos podem ser comparados diretamente sem consultar suas malhas.
+        """
+        I, J = np.array([nó.etiqueta for nó in malha.nós]).T
+
+        U = np.full((self.n + 1, 2*self.n + 1, 2), np.nan)
+        U[I, J] = u.reshape((len(malha.nós), 2))
+
+        return U
+
+    @staticmethod
+    def deslocamento_máximo(U: Matriz) -> Union[float, Vetor]:
+        """Calcula o deslocamento máximo de uma grade de deslocamentos, ou de uma pilha delas, ignorando nós vazios."""
+        return np.sqrt(np.nanmax(np.sum(U ** 2, axis=-1), axis=(-2, -1)))
 
     def _determinar_fenótipo(self, gene: Gene, l: float
                              ) -> Tuple[Matriz, bool, List[MembranaQuadrada], List[Nó], Matriz]:
@@ -474,9 +1126,9 @@ class PlacaEmBalanço(Problema):
         possíveis_ramificações.discard((i, j, "direita"))
 
     @staticmethod
-    def _atende_os_requisitos_mínimos(proj: 'Projeto', fenótipo: Matriz, borda_alcançada: bool) -> bool:
+    def _atende_os_requisitos_mínimos(nome: str, fenótipo: Matriz, borda_alcançada: bool) -> bool:
         if not borda_alcançada:
-            print(f"> Projeto {proj.nome} desconectado da borda")
+            print(f"> Projeto {nome} desconectado da borda")
         return borda_alcançada
 
     # Métodos auxiliares da resolução via análise de elementos finitos
@@ -485,11 +1137,27 @@ class PlacaEmBalanço(Problema):
         return 2 * len(malha.nós)
 
     @Monitorador(mensagem="Matrizes de rigidez local determinadas")
-    def calcular_matrizes_de_rigidez_local(self, **parâmetros_do_elemento_base) -> Matriz:
+    def calcular_matrizes_de_rigidez_local(self, **parâmetros_do_elemento_base) -> Union[Matriz, Dict[int, Matriz]]:
         if self.Ke is None:
             self.Ke = K_base.calcular(parâmetros_do_elemento_base)
 
-        return self.Ke
+        if self.nível_máximo_de_aglutinação == 0:
+            return self.Ke
+
+        if self.Kes_por_tamanho is None:
+            self.Kes_por_tamanho = {2**k: self._calcular_Ke_de_tamanho(2**k, parâmetros_do_elemento_base)
+                                    for k in range(self.nível_máximo_de_aglutinação + 1)}
+
+        return self.Kes_por_tamanho
+
+    @staticmethod
+    def _calcular_Ke_de_tamanho(s: int, parâmetros_do_elemento_base: Dict[str, float]) -> Matriz:
+        """Calcula, por meio de K_base, a matriz de rigidez local de um elemento de lado s·l."""
+        parâmetros = dict(parâmetros_do_elemento_base, l=s * parâmetros_do_elemento_base["l"])
+
+        # K_base é integrada nas coordenadas naturais sem o jacobiano (lado/2)², de modo que escala com 1/lado². O
+        # fator s² restaura a proporção correta entre elementos de tamanhos distintos
+        return (s ** 2) * K_base.calcular(parâmetros)
 
     @Monitorador(mensagem="Matriz de rigidez global montada")
     def montar_matriz_de_rigidez_geral(self, malha: Malha, Ke: Matriz, graus_de_liberdade: int, método: str) -> Matriz:
@@ -560,6 +1228,52 @@ class PlacaEmBalanço(Problema):
 
         return K
 
+    @staticmethod
+    def montador_adaptativo(malha: MalhaAdaptativa, Kes: Dict[int, Matriz], graus_de_liberdade: int) -> Matriz:
+        """Monta K como OptV2, grupo a grupo de elementos de mesmo tamanho, cada um com sua matriz de rigidez local."""
+        K = np.zeros((graus_de_liberdade, graus_de_liberdade), dtype=float)
+
+        for tamanho, Ke in Kes.items():
+            me = malha.me[:, malha.tamanhos == tamanho]
+            for i, j in produto_cartesiano(range(8), range(8)):
+                K[me[i, :], me[j, :]] += Ke[i, j]
+
+        return K
+
+    def montador_OptV2_paralelo(self, malha: Malha, Ke: Matriz, graus_de_liberdade: int) -> Matriz:
+        """
+        Distribui a montagem de OptV2 entre linhas de execução.
+
+        Os elementos são coloridos pela paridade da linha e da coluna de seu canto superior esquerdo na grade. Elementos
+        de mesma cor não compartilham nós, de modo que cada cor pode ser fatiada entre as linhas de execução sem que
+        duas delas escrevam na mesma posição de K. As cores são montadas uma após a outra e o NumPy libera o GIL durante
+        as operações de espalhamento de cada fatia.
+        """
+        K = np.zeros((graus_de_liberdade, graus_de_liberdade), dtype=float)
+
+        I, J = np.array([elemento.nós[0].etiqueta for elemento in malha.elementos]).T
+        cores = 2 * (I % 2) + J % 2
+
+        def montar_fatia(me: Matriz) -> None:
+            for i, j in produto_cartesiano(range(8), range(8)):
+                K[me[i, :], me[j, :]] += Ke[i, j]
+
+        with ThreadPoolExecutor(max_workers=self.linhas_de_execução) as executor:
+            for cor in range(4):
+                me_da_cor = malha.me[:, cores == cor]
+                fatias = np.array_split(me_da_cor, min(self.linhas_de_execução, max(me_da_cor.shape[1], 1)), axis=1)
+
+                # Esgota o iterador para aguardar todas as fatias da cor e propagar exceções
+                list(executor.map(montar_fatia, fatias))
+
+        return K
+
+    @staticmethod
+    def produto_sem_montagem(malha: Malha, Ke: Matriz, u: Vetor) -> Vetor:
+        """Calcula K·u elemento a elemento, sem montar a matriz de rigidez geral."""
+        fe = Ke @ u[malha.me]
+        return np.bincount(malha.me.ravel(), weights=fe.ravel(), minlength=len(u))
+
     @Monitorador(mensagem="Condições de contorno incorporadas")
     def incorporar_condições_de_contorno(self,
                                          malha: Malha,
@@ -590,23 +1304,3 @@ class PlacaEmBalanço(Problema):
 
         return f, u, ifc, iuc
 
-
-class Cache(OrderedDict):
-    """Cache de valores recentemente usados"""
-
-    def __init__(self, maxsize=128, **kwds):
-        self.maxsize = maxsize
-        super().__init__(**kwds)
-
-    def __getitem__(self, key):
-        value = super().__getitem__(key)
-        self.move_to_end(key)
-        return value
-
-    def __setitem__(self, key, value):
-        if key in self:
-            self.move_to_end(key)
-        super().__setitem__(key, value)
-        if len(self) > self.maxsize:
-            oldest = next(iter(self))
-            del self[oldest]
@@ -1,13 +1,15 @@
-from typing import List
+from typing import List, Optional, Sequence
 
 import numpy as np
 
+from suporte.aleatoriedade import FluxosAleatórios
 from situações_de_projeto.placa_em_balanço.problemas.P_no_meio_da_extremidade_direita import PlacaEmBalanço
 
 
 class PlacaEmBalanço(PlacaEmBalanço):
 
-    def geração_0(self, n_de_indivíduos: int = 125, espessura_interna_mínima: int = 4) -> List['Gene']:
+    def geração_0(self, n_de_indivíduos: int = 125, espessura_interna_mínima: int = 4,
+                  geradores: Optional[Sequence[np.random.Generator]] = None) -> List['Gene']:
         """
         Gera aleatoriamente 100 projetos de espessura interna mínima igual a t que estão conectados à borda
         e ao ponto de aplicação da carga.
@@ -17,22 +19,31 @@ class PlacaEmBalanço(PlacaEmBalanço):
         o ponto de aplicação da carga até a borda. Os nós pertencentes à trajetória percorrida no grafo recebem o valor
         1. O grafo é então traduzido para um gene que inicia uma instância da classe Projeto. Este processo é repetido
         e o resultado de 100 iterações é retornado numa lista.
+
+        Cada projeto é sorteado do seu próprio gerador, o de mesmo índice em geradores. Se eles não forem fornecidos,
+        são derivados de uma semente sorteada do gerador global do numpy.
         """
+        if geradores is None:
+            geradores = FluxosAleatórios().geradores(0, "geração_0", n_de_indivíduos)
 
         genes = []
         for k in range(n_de_indivíduos):
+            gerador = geradores[k]
+
             # Inicia um grafo que representa o preenchimento de cada fatia do espaço de projeto
-            grafo = np.random.choice((True, False), (7, 14), p=(0.15, 0.85))
+            grafo = gerador.random((7, 14)) < 0.15
 
             # Determina os pontos de corte e retorna seus índices i e j
             pontos_de_corte_horizontal = self._fatiar_intervalo(número_de_fatias=7,
                                                                 dividir_ao_meio=True,
                                                                 comprimento_total=self.n,
-                                                                comprimento_mínimo_das_fatias=espessura_interna_mínima)
+                                                                comprimento_mínimo_das_fatias=espessura_interna_mínima,
+                                                                gerador=gerador)
             pontos_de_corte_vertical = self._fatiar_intervalo(número_de_fatias=14,
                                                               dividir_ao_meio=False,
                                                               comprimento_total=2*self.n,
-                                                              comprimento_mínimo_das_fatias=espessura_interna_mínima)
+                                                              comprimento_mínimo_das_fatias=espessura_interna_mínima,
+                                                              gerador=gerador)
 
             # Caminha aleatoriamente pelo grafo desde o ponto de aplicação da força até uma borda,
             # preenchendo as fatias ao longo da trajetória
@@ -40,8 +51,10 @@ class PlacaEmBalanço(PlacaEmBalanço):
 
             trajetória = np.zeros((7, 14), dtype=bool)
 
-            self._caminhada_desde_o_canto_com(i_partida=6, i_chegada=i_chegada, grafo=trajetória, p=0.5)
-            self._caminhada_desde_o_canto_com(i_partida=0, i_chegada=i_chegada, grafo=trajetória, p=0.5)
+            self._caminhada_desde_o_canto_com(i_partida=6, i_chegada=i_chegada, grafo=trajetória, p=0.5,
+                                              gerador=gerador)
+            self._caminhada_desde_o_canto_com(i_partida=0, i_chegada=i_chegada, grafo=trajetória, p=0.5,
+                                              gerador=gerador)
 
             grafo |= trajetória
 
@@ -54,7 +67,8 @@ class PlacaEmBalanço(PlacaEmBalanço):
         return genes
 
     @staticmethod
-    def _caminhada_desde_o_canto_com(i_partida: int, i_chegada: int, grafo: 'Matriz', p: float) -> None:
+    def _caminhada_desde_o_canto_com(i_partida: int, i_chegada: int, grafo: 'Matriz', p: float,
+                                     gerador: np.random.Generator) -> None:
         j_partida = 0
 
         def reta(j):
@@ -96,12 +110,12 @@ class PlacaEmBalanço(PlacaEmBalanço):
 
                 p_direita = 1 - p_vertical
 
-                movimento = np.random.choice(possíveis_direções, p=(p_vertical, p_direita))
+                movimento = possíveis_direções[gerador.choice(2, p=(p_vertical, p_direita))]
             elif len(possíveis_direções) == 3:
                 p_descer = (1 - p) / (1 + 3 ** (i - reta(j)))
                 p_subir = (1 - p) - p_descer
 
-                movimento = np.random.choice(possíveis_direções, p=(p_descer, p_subir, p))
+                movimento = possíveis_direções[gerador.choice(3, p=(p_descer, p_subir, p))]
 
             # Move o buscador pelo grafo
             if movimento == "cima":
@@ -117,13 +131,13 @@ class PlacaEmBalanço(PlacaEmBalanço):
         grafo[i, j] = True
 
     @staticmethod
-    def _atende_os_requisitos_mínimos(proj: 'Projeto', fenótipo: 'Matriz', borda_alcançada: bool) -> bool:
+    def _atende_os_requisitos_mínimos(nome: str, fenótipo: 'Matriz', borda_alcançada: bool) -> bool:
         if borda_alcançada:
             if not (fenótipo[0, 0] and fenótipo[-1, 0]):
-                print(f"> Projeto {proj.nome} desconectado dos cantos da borda")
+                print(f"> Projeto {nome} desconectado dos cantos da borda")
             return fenótipo[0, 0] and fenótipo[-1, 0]
         else:
-            print(f"> Projeto {proj.nome} desconectado da borda")
+            print(f"> Projeto {nome} desconectado da borda")
             return False
 
 
@@ -0,0 +1,71 @@
+"""
+Fluxos de números aleatórios reprodutíveis, independentes da ordem e do processo em que são consumidos.
+
+Cada fluxo é um np.random.Generator, com o PCG64, iniciado por uma SeedSequence que combina a semente da execução com
+uma chave: a geração, o operador e os índices do indivíduo. Fluxos de chaves diferentes são estatisticamente inde-
+pendentes, e uma mesma chave dá o mesmo fluxo em qualquer processo, seja qual for a ordem em que os fluxos são consumi-
+dos. O resultado de uma execução depende, assim, apenas da sua semente, e não do número de processos ou linhas de
+execução que a avaliam nem da ordem em que eles terminam.
+
+CLASSES
+-------
+FluxosAleatórios
+    Geradores de números aleatórios indexados por geração, operador e indivíduo.
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def _código(operador: str) -> int:
+    # hash() varia entre processos; o CRC-32 do nome, não
+    return zlib.crc32(operador.encode())
+
+
+class FluxosAleatórios:
+    """
+    Geradores de números aleatórios indexados por geração, operador e indivíduo.
+
+    Pedir duas vezes o gerador da mesma chave, na mesma geração, retorna o mesmo objeto, cujo fluxo continua de onde
+    parou: um operador refeito para o mesmo indivíduo, como um crossover que repete um gene, sorteia valores novos. Os
+    geradores abertos são descartados quando se pede o de outra geração.
+
+    Sem semente, ela é sorteada do gerador global do numpy, de modo que np.random.seed continua a determinar execuções
+    que não fornecem a sua.
+
+    ATRIBUTOS
+    ---------
+    semente: int -- Semente da execução, comum a todos os fluxos
+
+    MÉTODOS
+    -------
+    gerador(geração: int, operador: str, *índices: int) -> np.random.Generator
+        Retorna o fluxo do operador para os índices fornecidos na geração.
+    geradores(geração: int, operador: str, n: int) -> List[np.random.Generator]
+        Retorna os fluxos do operador para os índices de 0 a n - 1 na geração.
+    """
+
+    def __init__(self, semente: Optional[int] = None):
+        self.semente = semente if semente is not None else int(np.random.randint(2 ** 63, dtype=np.int64))
+        self._geração_aberta: Optional[int] = None
+        self._abertos: Dict[Tuple[int, ...], np.random.Generator] = {}
+
+    def gerador(self, geração: int, operador: str, *índices: int) -> np.random.Generator:
+        """Retorna o fluxo do operador para os índices fornecidos na geração."""
+        if geração != self._geração_aberta:
+            self._abertos.clear()
+            self._geração_aberta = geração
+
+        chave = (geração, _código(operador), *índices)
+        if chave not in self._abertos:
+            self._abertos[chave] = np.random.default_rng(np.random.SeedSequence(self.semente, spawn_key=chave))
+        return self._abertos[chave]
+
+    def geradores(self, geração: int, operador: str, n: int) -> List[np.random.Generator]:
+        """Retorna os fluxos do operador para os índices de 0 a n - 1 na geração."""
+        return [self.gerador(geração, operador, i) for i in range(n)]
+
+    def __repr__(self):
+        return f"FluxosAleatórios(semente={self.semente})"
@@ -7,14 +7,40 @@ Indivíduo
     Objeto que carrega um gene, sua expressão fenotípica para um dado ambiente e sua adaptação para um dado problema.
 Ambiente
     Framework de classe de objetos que agregam Indivíduos e definem sobre eles operadores genéticos.
+AmbienteEstacionário
+    Variante do Ambiente em regime estacionário, sem barreira entre gerações.
+
+VARIÁVEIS
+---------
+executores  : Tuple[str, ...] -- Modos de avaliação dos indivíduos de um Ambiente
+substituições: Tuple[str, ...] -- Regras de entrada dos filhos na população de um AmbienteEstacionário
+
+FUNÇÕES
+-------
+intervalos_ambíguos(inferiores, superiores, cortes) -> np.ndarray
+    Identifica os indivíduos cuja posição em relação a algum corte do ranking não é decidida pelos seus intervalos de
+    adaptação.
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Optional, List
+from typing import Any, Dict, Optional, List, Iterable, Tuple
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+import multiprocessing
+import queue
 
 import numpy as np
 
+from suporte.aleatoriedade import FluxosAleatórios
+from suporte.cache import CacheLRU, FiltroDeBloom, resumo_do_gene, tamanho_aproximado
+from suporte.memória import Componente, orçamento_de_memória
+from suporte.paralelismo import FilaDeAvaliação
+
+
+executores = ("serial", "threads", "processos")
+substituições = ("pior", "torneio")
+
 
 class Ambiente(ABC):
     """
@@ -23,13 +49,37 @@ class Ambiente(ABC):
     Um Ambiente implementa condições específicas de teste e combinação de indivíduos descrita pelos seus métodos. É re-
     presentado pelo ranking de adaptação dos indivíduos da população corrente e por uma lista das suas últimas mutações.
 
-    ATRIBUTOS (da classe)
-    ---------------------
-    genes_testados: dict -- Cache de valores de adaptação de genes já testados
-
-    ATRIBUTOS (dos objetos)
-    -----------------------
+    Os indivíduos ainda não testados de cada seleção e os filhos de cada reprodução são avaliados num único lote, pelo
+    executor escolhido: em série, em linhas de execução ou em processos. Linhas de execução dispensam a serialização e
+    ganham com as operações que liberam o GIL, como as do LAPACK, mas exigem que testar_adaptação possa ser chamado por
+    várias ao mesmo tempo. Processos recebem uma cópia do ambiente ao serem iniciados e, a cada lote, apenas os genes:
+    cada um é testado num indivíduo novo, criado por _indivíduo_de, e volta como o resultado guardado no cache de genes.
+    Mudanças no ambiente que afetem os testes exigem encerrar_executor, para que os processos recebam nova cópia.
+
+    Os operadores sorteiam de fluxos aleatórios próprios a cada geração, operador e indivíduo, obtidos por gerador e
+    derivados da semente do ambiente. A mesma semente reproduz a execução com qualquer executor e número de processos.
+
+    O cache e o filtro de genes e o histórico de gerações são registrados no orçamento de memória da execução, que pode
+    despejar entradas do cache e descartar as gerações mais antigas do histórico para respeitar seu limite.
+
+    ATRIBUTOS
+    ---------
+    genes_testados        : CacheLRU             -- Cache de valores de adaptação de genes já testados, indexado pelo
+                                                    resumo de 128 bits de cada gene e limitado em entradas ou bytes.
+                                                    Pode ser substituído por um CacheCompartilhado entre processos
+    genes_vistos          : FiltroDeBloom        -- Registro probabilístico dos genes já testados, consultado antes do
+                                                    cache de genes para evitar buscas que certamente falhariam. Só
+                                                    existe, dimensionado por ele, se avaliações_esperadas for dado; se
+                                                    None, o cache é sempre consultado
+    evitar_duplicatas     : bool                 -- Se a reprodução refaz crossovers cujo filho já foi visto, segundo o
+                                                    filtro de genes vistos ou, sem ele, o cache de genes
+    executor              : str                  -- Como os lotes de indivíduos são avaliados: "serial", "threads" ou
+                                                    "processos"
+    processos             : Optional[int]        -- Linhas de execução ou processos do executor; os núcleos do pro-
+                                                    cessador se None
     probabilidade_de_mutar: float                -- Chance base de um bit de gene virar em decorrência de uma mutação
+    fluxos                : FluxosAleatórios     -- Geradores de números aleatórios dos operadores, derivados da
+                                                    semente do ambiente
     população             : List[Indivíduo]      -- Carrega os indivíduos da geração corrente
     gerações              : List[List[Indivíduo] -- Carrega históricos de cada geração. Limpa-se e se sumariza durante a
                                                     execução do código com soluções específicas.
@@ -45,8 +95,14 @@ class Ambiente(ABC):
         Faz a população corrente avançar uma geração.
     seleção_natural(self) -> List[Indivíduo]
         Seleciona os indivíduos com melhores genes.
+    avaliar_população(self) -> List[Indivíduo]
+        Testa os indivíduos ainda não testados da população e a retorna ordenada por adaptação decrescente.
     reprodução(self, indivíduos_selecionados: List[Indivíduo]) -> List[Indivíduo]
         Determina em quais indivíduos aplicar o operador de crossover para gerar novos indivíduos filhos.
+    encerrar_executor(self) -> None
+        Encerra as linhas de execução ou os processos do executor, que são recriados no próximo lote.
+    gerador(self, operador: str, *índices: int) -> np.random.Generator
+        Retorna o fluxo aleatório do operador para o indivíduo de índices fornecidos na geração corrente.
 
     MÉTODOS ABSTRATOS
     -----------------
@@ -61,23 +117,69 @@ class Ambiente(ABC):
 
     MÉTODOS AUXILIARES
     ------------------
-    _conseguir_adaptação(self, ind: Indivíduo) -> None
+    _conseguir_adaptações(self, indivíduos: List[Indivíduo]) -> None
         Chamado por seleção_natural e reprodução.
-        Checa se o gene do indivíduo já teve sua adaptação testada e armazena os valores já calculados.
+        Recupera do cache de genes as adaptações já conhecidas e testa, num único lote, um indivíduo de cada gene novo.
+    _conseguir_adaptação(self, ind: Indivíduo) -> Indivíduo
+        Faz o mesmo para um único indivíduo.
+    _restaurar_do_cache(self, ind: Indivíduo) -> bool
+        Atribui ao indivíduo o resultado do seu gene guardado no cache, se houver, e retorna se havia.
+    _guardar_no_cache(self, ind: Indivíduo, resultado: Any) -> None
+        Guarda no cache o resultado do indivíduo testado e registra seu gene no filtro de genes vistos.
+    _usar_cache_de_genes(self) -> bool
+        Determina se o cache de genes é consultado e alimentado: por padrão, sempre.
+    _bytes_do_campo(self, valor: Any) -> int
+        Estima os bytes de um campo de indivíduo, para contabilizar o histórico de gerações no orçamento de memória.
+    _já_visto(self, chave: bytes) -> bool
+        Determina se o gene de chave fornecida já foi testado, pelo filtro de genes vistos ou pelo cache de genes.
+    _indivíduo_de(self, gene: Any) -> Indivíduo
+        Cria o indivíduo em que um processo do executor testa um gene.
+    _resultado_de(self, ind: Indivíduo) -> Any
+        Retorna o que o cache de genes guarda de um indivíduo testado: por padrão, sua adaptação.
+    _restaurar(self, ind: Indivíduo, resultado: Any) -> None
+        Atribui ao indivíduo o resultado guardado no cache de genes.
+    _registrar_na_memória(self) -> None
+        Registra no orçamento de memória o cache e o filtro de genes e o histórico de gerações.
     """
 
-    genes_testados = dict()
+    # Quantas vezes a reprodução refaz um crossover cujo filho repete um gene já visto, se evitar_duplicatas
+    tentativas_contra_duplicatas = 10
+
+    def __init__(self,
+                 indivíduos: Optional[List['Indivíduo']] = None,
+                 probabilidade_de_mutar: float = 0.0,
+                 máximo_de_genes_testados: Optional[int] = 100_000,
+                 máximo_de_bytes_dos_genes_testados: Optional[int] = None,
+                 avaliações_esperadas: Optional[int] = None,
+                 evitar_duplicatas: bool = False,
+                 executor: str = "serial",
+                 processos: Optional[int] = None,
+                 semente: Optional[int] = None):
+        if executor not in executores:
+            raise ValueError(f"Executor desconhecido: {executor}. Escolha dentre {list(executores)}.")
+
+        self.genes_testados = CacheLRU(máximo_de_genes_testados, máximo_de_bytes_dos_genes_testados)
+        # O filtro ocupa cerca de 1,2 byte por avaliação esperada, em geral indivíduos vezes gerações: só é criado se
+        # esse número for fornecido
+        self.genes_vistos = FiltroDeBloom(avaliações_esperadas) if avaliações_esperadas is not None else None
+        self.evitar_duplicatas = evitar_duplicatas
+        self.executor = executor
+        self.processos = processos
+        self._linhas_de_execução: Optional[ThreadPoolExecutor] = None
+        self._fila_de_processos: Optional[FilaDeAvaliação] = None
+        self.fluxos = FluxosAleatórios(semente)
+        self.n_da_geração = 0
 
-    def __init__(self, indivíduos: Optional[List['Indivíduo']] = None, probabilidade_de_mutar: float = 0.0):
         if indivíduos is None:
             indivíduos = self.geração_0()
 
         self.gerações               = [indivíduos]
         self.população              = indivíduos
-        self.n_da_geração           = 0
         self.n_de_indivíduos        = len(indivíduos)
         self.probabilidade_de_mutar = probabilidade_de_mutar
 
+        self._registrar_na_memória()
+
     @abstractmethod
     def geração_0(self) -> List['Indivíduo']:
         """Construirá a geração inicial da população do ambiente."""
@@ -104,6 +206,8 @@ class Ambiente(ABC):
 
         self.n_da_geração += 1
 
+        orçamento_de_memória.reequilibrar()
+
         return self
 
     def seleção_natural(self) -> List['Indivíduo']:
@@ -117,27 +221,129 @@ class Ambiente(ABC):
         indivíduos_selecionados: List[Projeto] -- Vencedores da seleção natural
         """
 
-        # Testa os indivíduos ainda não adaptados da população
-        for ind in self.população:
-            if not ind.adaptação_testada:
-                self._conseguir_adaptação(ind)
-
-        # Ordena os indivíduos por adaptação decrescente e filtra a metade superior
-        indivíduos_selecionados = sorted(self.população, reverse=True)[:self.n_de_indivíduos // 2]
+        # Testa os indivíduos ainda não adaptados da população, ordena-os por adaptação decrescente e filtra a metade
+        # superior
+        indivíduos_selecionados = self.avaliar_população()[:self.n_de_indivíduos // 2]
 
         return indivíduos_selecionados
 
+    def avaliar_população(self) -> List['Indivíduo']:
+        """Testa, num único lote, os indivíduos da população cuja adaptação ainda não foi calculada e retorna a popula-
+        ção ordenada por adaptação decrescente, sem reordenar a lista da população."""
+        self._conseguir_adaptações([ind for ind in self.população if not ind.adaptação_testada])
+        return sorted(self.população, reverse=True)
+
+    def _conseguir_adaptações(self, indivíduos: List['Indivíduo']) -> None:
+        """
+        Recupera do cache de genes as adaptações já conhecidas e testa, num único lote, um indivíduo de cada gene novo.
+
+        Indivíduos de mesmo gene recebem o resultado do que foi testado. Os genes testados são guardados no cache e
+        registrados no filtro de genes vistos. Sem o cache de genes, cujo resultado pode não bastar para restaurar um
+        indivíduo, todos são testados.
+        """
+        usar_cache = self._usar_cache_de_genes()
+        pendentes: Dict[Any, List['Indivíduo']] = {}
+
+        for ind in indivíduos:
+            if not self._restaurar_do_cache(ind):
+                pendentes.setdefault(ind.id if usar_cache else id(ind), []).append(ind)
+
+        self._testar_lote([inds[0] for inds in pendentes.values()])
+
+        for testado, *repetidos in pendentes.values():
+            resultado = self._resultado_de(testado)
+            for ind in repetidos:
+                self._restaurar(ind, resultado)
+                ind.adaptação_testada = True
+            self._guardar_no_cache(testado, resultado)
+
+    def _restaurar_do_cache(self, ind: 'Indivíduo') -> bool:
+        """Atribui ao indivíduo o resultado do seu gene guardado no cache, se houver, e retorna se havia."""
+        chave = ind.id
+
+        # Genes que o filtro nunca viu certamente não estão no cache
+        resultado = (self.genes_testados.obter(chave)
+                     if self._usar_cache_de_genes() and (self.genes_vistos is None or chave in self.genes_vistos)
+                     else None)
+
+        if resultado is None:
+            return False
+
+        self._restaurar(ind, resultado)
+        ind.adaptação_testada = True
+        return True
+
+    def _guardar_no_cache(self, ind: 'Indivíduo', resultado: Any) -> None:
+        """Guarda no cache o resultado do indivíduo testado e registra seu gene no filtro de genes vistos."""
+        if self._usar_cache_de_genes():
+            self.genes_testados[ind.id] = resultado
+        if self.genes_vistos is not None:
+            self.genes_vistos.registrar(ind.id)
+
     def _conseguir_adaptação(self, ind: 'Indivíduo') -> 'Indivíduo':
         """Checa se o gene do indivíduo já teve sua adaptação testada e armazena os valores já calculados."""
-        if ind.id in self.genes_testados.keys():
-            ind.adaptação = self.genes_testados[ind.id]
-            ind.adaptação_testada = True
-        else:
-            self.testar_adaptação(ind)
-            self.genes_testados[ind.id] = ind.adaptação
-
+        self._conseguir_adaptações([ind])
         return ind
 
+    def _testar_lote(self, indivíduos: List['Indivíduo']) -> None:
+        """Testa a adaptação dos indivíduos com o executor do ambiente. Lotes de um só indivíduo são testados aqui."""
+        if self.executor == "serial" or len(indivíduos) < 2:
+            for ind in indivíduos:
+                self.testar_adaptação(ind)
+
+        elif self.executor == "threads":
+            if self._linhas_de_execução is None:
+                self._linhas_de_execução = ThreadPoolExecutor(self.processos)
+            # Esgota o iterador para aguardar todos os testes e propagar exceções
+            list(self._linhas_de_execução.map(self.testar_adaptação, indivíduos))
+
+        else:
+            if self._fila_de_processos is None:
+                self._fila_de_processos = FilaDeAvaliação(_testar_no_trabalhador, self, self.processos)
+            resultados = self._fila_de_processos.avaliar_genes([ind.gene for ind in indivíduos])
+            for ind, resultado in zip(indivíduos, resultados):
+                self._restaurar(ind, resultado)
+                ind.adaptação_testada = True
+
+    def encerrar_executor(self) -> None:
+        """Encerra as linhas de execução ou os processos do executor, que são recriados no próximo lote."""
+        if self._linhas_de_execução is not None:
+            self._linhas_de_execução.shutdown()
+            self._linhas_de_execução = None
+        if self._fila_de_processos is not None:
+            self._fila_de_processos.fechar()
+            self._fila_de_processos = None
+
+    def gerador(self, operador: str, *índices: int) -> np.random.Generator:
+        """Retorna o fluxo aleatório do operador para o indivíduo de índices fornecidos na geração corrente. Chamadas
+        repetidas na mesma geração continuam o mesmo fluxo."""
+        return self.fluxos.gerador(self.n_da_geração, operador, *índices)
+
+    def _usar_cache_de_genes(self) -> bool:
+        """Determina se o cache de genes é consultado e alimentado. Subclasses cujos resultados guardados não bastam
+        para restaurar um indivíduo podem dispensá-lo."""
+        return True
+
+    def _já_visto(self, chave: bytes) -> bool:
+        """Determina se o gene de chave fornecida já foi testado: pelo filtro de genes vistos, se houver, ou pelo cache
+        de genes, que pode ter esquecido os mais antigos."""
+        if self.genes_vistos is not None:
+            return chave in self.genes_vistos
+        return chave in self.genes_testados
+
+    def _indivíduo_de(self, gene: Any) -> 'Indivíduo':
+        """Cria o indivíduo em que um processo do executor testa um gene."""
+        return Indivíduo(gene, nome="Trabalhador")
+
+    def _resultado_de(self, ind: 'Indivíduo') -> Any:
+        """Retorna o que o cache de genes guarda de um indivíduo testado. Subclasses cuja adaptação depende de parâme-
+        tros que mudam ao longo da execução podem guardar, em vez dela, as grandezas das quais ela é calculada."""
+        return ind.adaptação
+
+    def _restaurar(self, ind: 'Indivíduo', resultado: Any) -> None:
+        """Atribui ao indivíduo o resultado guardado no cache de genes."""
+        ind.adaptação = resultado
+
     @abstractmethod
     def testar_adaptação(self, indivíduo: 'Indivíduo') -> None:
         """Testará a adaptação do indivíduo, modificando seus atributos."""
@@ -147,7 +353,8 @@ class Ambiente(ABC):
 
         Define probabilidades de reproduzir para cada indivíduo proporcionalmente às suas adaptações. Seleciona dentre
         elas aleatoriamente e executa o operador de crossover tantas vezes quanto seja necessário para gerar a quanti-
-        dade de indivíduos filhos desejada.
+        dade de indivíduos filhos desejada. Se evitar_duplicatas, um crossover cujo filho repete um gene já visto é
+        refeito com os mesmos pais, até tentativas_contra_duplicatas vezes.
 
         ARGUMENTOS
         ----------
@@ -160,18 +367,30 @@ class Ambiente(ABC):
 
         filhos     = []
         adaptações = np.array([i.adaptação for i in indivíduos_selecionados])
+        genes_dos_filhos = set()
 
         for k in range(self.n_de_indivíduos - len(indivíduos_selecionados)):
 
             probabilidades = adaptações/(adaptações.sum())
 
             # Escolhe dois indivíduos distintos como pais de acordo com suas probabilidades de reprodução
-            pais = np.random.choice(indivíduos_selecionados, size=2, replace=False, p=probabilidades)
+            i, j = self.gerador("reprodução", k + 1).choice(len(indivíduos_selecionados), size=2, replace=False,
+                                                             p=probabilidades)
+            pais = indivíduos_selecionados[i], indivíduos_selecionados[j]
 
             ind_filho = self.crossover(pais[0], pais[1], k + 1)
-            self._conseguir_adaptação(ind_filho)
+
+            # Refaz o crossover, até um limite de tentativas, enquanto o filho repetir um gene já visto ou o de um irmão
+            for _ in range(self.tentativas_contra_duplicatas if self.evitar_duplicatas else 0):
+                if not self._já_visto(ind_filho.id) and ind_filho.id not in genes_dos_filhos:
+                    break
+                ind_filho = self.crossover(pais[0], pais[1], k + 1)
+
+            genes_dos_filhos.add(ind_filho.id)
             filhos.append(ind_filho)
 
+        self._conseguir_adaptações(filhos)
+
         return filhos
 
     @abstractmethod
@@ -182,6 +401,86 @@ class Ambiente(ABC):
     def mutação(self, geração: List['Indivíduo']) -> None:
         """Modificará a nova geração de acordo com as regras estabelecidas pelo ambiente."""
 
+    def _registrar_na_memória(self) -> None:
+        """Registra no orçamento de memória o cache e o filtro de genes e o histórico de gerações."""
+        orçamento_de_memória.registrar("genes_testados", getattr(self.genes_testados, "local", self.genes_testados))
+        if self.genes_vistos is not None:
+            orçamento_de_memória.registrar("genes_vistos", self.genes_vistos)
+
+        # O histórico só serve a relatórios: seus bytes não têm valor e são os primeiros a ser liberados
+        self._memória_das_gerações = Componente(self._bytes_das_gerações, self._liberar_gerações)
+        self._bytes_por_geração: Dict[int, int] = {}
+        orçamento_de_memória.registrar("gerações", self._memória_das_gerações)
+
+    def _bytes_do_campo(self, valor: Any) -> int:
+        """Estima os bytes de um campo de indivíduo. Subclasses cujos indivíduos carregam objetos que tamanho_aproxima-
+        do não percorre podem estimá-los por conta própria."""
+        return tamanho_aproximado(valor)
+
+    def _bytes_da_geração(self, k: int) -> int:
+        # Indivíduos sobrevivem de uma geração à seguinte sem pular nenhuma: os de uma geração ausentes da seguinte e
+        # da população corrente não estão em nenhuma outra, e só eles são liberados quando ela é descartada. Campos
+        # compartilhados entre indivíduos, como os de cópias, são contados uma só vez
+        seguinte = self.gerações[k + 1] if k + 1 < len(self.gerações) else self.população
+        mantidos = {id(ind) for ind in seguinte} | {id(ind) for ind in self.população}
+        campos = {id(valor): valor
+                  for ind in self.gerações[k] if id(ind) not in mantidos for valor in vars(ind).values()}
+        return sum(self._bytes_do_campo(valor) for valor in campos.values())
+
+    def _bytes_das_gerações(self) -> int:
+        """Soma os bytes das gerações passadas. Os de cada geração seguida por outra no histórico não mudam mais e são
+        guardados; os da última, que a população corrente pode ainda alterar, são sempre recalculados."""
+        # Só as gerações ainda no histórico seguem guardadas, para que identificadores reutilizados não herdem valores
+        guardados, total = {}, 0
+        for k, geração in enumerate(self.gerações):
+            if geração is self.população:
+                continue
+            última = k + 1 == len(self.gerações)
+            bytes_ = None if última else self._bytes_por_geração.get(id(geração))
+            if bytes_ is None:
+                bytes_ = self._bytes_da_geração(k)
+            if not última:
+                guardados[id(geração)] = bytes_
+            total += bytes_
+        self._bytes_por_geração = guardados
+        return total
+
+    def _liberar_gerações(self, bytes_a_liberar: int) -> int:
+        """Descarta as gerações mais antigas do histórico, exceto a população corrente, até liberar os bytes pedidos."""
+        self._bytes_das_gerações()
+        liberados = 0
+        k = 0
+        while liberados < bytes_a_liberar and k < len(self.gerações):
+            if self.gerações[k] is self.população:
+                k += 1
+                continue
+            bytes_ = self._bytes_por_geração.pop(id(self.gerações[k]), None)
+            liberados += self._bytes_da_geração(k) if bytes_ is None else bytes_
+            del self.gerações[k]
+        return liberados
+
+    def __getstate__(self):
+        # Um cache de genes local não é serializado: cópias enviadas a outros processos ou salvas em disco o recomeçam
+        # vazio. Um cache compartilhado entre processos leva consigo a referência ao seu dicionário remoto, mas não o
+        # filtro de genes vistos, que não registraria os genes testados pelos demais processos
+        estado = self.__dict__.copy()
+        if isinstance(self.genes_testados, CacheLRU):
+            estado["genes_testados"] = CacheLRU(self.genes_testados.máximo_de_entradas,
+                                                self.genes_testados.máximo_de_bytes)
+        else:
+            estado["genes_vistos"] = None
+
+        # O registro no orçamento de memória vale só para este processo e é refeito por quem carrega a cópia. O execu-
+        # tor também não é copiado
+        estado.pop("_memória_das_gerações", None)
+        estado.pop("_bytes_por_geração", None)
+        estado["_linhas_de_execução"] = estado["_fila_de_processos"] = None
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._registrar_na_memória()
+
     def __repr__(self):
         return f"Geração {self.n_da_geração} de População de {self.n_de_indivíduos} indivíduos: {self.população!s}"
 
@@ -190,6 +489,189 @@ class Ambiente(ABC):
                 + (self.n_de_indivíduos * "> {}\n").format(*self.população))
 
 
+class AmbienteEstacionário(Ambiente):
+    """
+    Variante do Ambiente em regime estacionário, sem barreira entre gerações.
+
+    Em vez de aguardar a avaliação de toda uma geração, o ambiente mantém avaliações_simultâneas filhos em teste. As-
+    sim que um teste termina, o filho disputa um lugar na população e um novo filho, de pais sorteados da população
+    daquele momento, ocupa o trabalhador liberado. Trabalhadores não ficam ociosos à espera do indivíduo mais lento,
+    o que importa quando o custo dos testes varia muito entre indivíduos.
+
+    O filho substitui o pior indivíduo da população ("pior") ou o pior de tamanho_do_torneio indivíduos sorteados
+    ("torneio"), desde que seja mais adaptado que ele. Os pais são sorteados com probabilidades proporcionais às suas
+    adaptações, como na reprodução do Ambiente, e os filhos passam pela mutação e pelo cache de genes antes do teste.
+
+    Cada n_de_indivíduos filhos recebidos contam uma geração equivalente: a população ordenada é registrada em ge-
+    rações, n_da_geração avança e estatísticas_das_gerações recebe a maior e a média das adaptações e a ocupação dos
+    trabalhadores, isto é, o tempo somado dos testes sobre o tempo decorrido vezes avaliações_simultâneas.
+
+    Os fluxos aleatórios de cada filho são fixados pela semente, mas os pais sorteados dependem da população no momen-
+    to, e portanto da ordem em que os testes terminam: só com uma avaliação simultânea a execução é reprodutível.
+
+    A classe é combinada por herança múltipla, à sua esquerda, com um Ambiente concreto cujo crossover retorne o filho
+    e cuja mutação receba a lista de filhos, como os do Ambiente. Parâmetros que ela não usa seguem para esse ambiente.
+
+    ATRIBUTOS
+    ---------
+    substituição            : str                    -- "pior" ou "torneio"
+    tamanho_do_torneio      : int                    -- Indivíduos sorteados em cada torneio de substituição
+    avaliações_simultâneas  : int                    -- Filhos mantidos em teste; 1 em série e, nos demais executores,
+                                                        o número de processos ou de núcleos do processador
+    estatísticas_das_gerações: List[Dict[str, float]] -- "melhor", "média" e "ocupação" de cada geração equivalente
+
+    MÉTODOS
+    -------
+    avançar_gerações(self, n: int) -> self
+        Recebe n gerações equivalentes de filhos, mantendo os trabalhadores sempre ocupados.
+    próxima_geração(self) -> self
+        Recebe uma geração equivalente de filhos.
+    """
+
+    def __init__(self,
+                 *args,
+                 substituição: str = "pior",
+                 tamanho_do_torneio: int = 2,
+                 avaliações_simultâneas: Optional[int] = None,
+                 **kwargs):
+        if substituição not in substituições:
+            raise ValueError(f"Substituição desconhecida: {substituição}. Escolha dentre {list(substituições)}.")
+
+        self.substituição = substituição
+        self.tamanho_do_torneio = tamanho_do_torneio
+        self.estatísticas_das_gerações: List[Dict[str, float]] = []
+        super().__init__(*args, **kwargs)
+
+        if avaliações_simultâneas is None:
+            avaliações_simultâneas = (1 if self.executor == "serial"
+                                      else self.processos or multiprocessing.cpu_count())
+        self.avaliações_simultâneas = avaliações_simultâneas
+
+    def avançar_gerações(self, n: int) -> "AmbienteEstacionário":
+        """Recebe n gerações equivalentes de filhos, mantendo os trabalhadores sempre ocupados."""
+        self._conseguir_adaptações([ind for ind in self.população if not ind.adaptação_testada])
+        self.população = list(self.população)
+
+        concluídos: queue.Queue = queue.Queue()
+        a_submeter = a_receber = n * self.n_de_indivíduos
+        em_teste = 0
+        início, tempo_de_teste = default_timer(), 0.0
+
+        while a_receber:
+            # Ocupa os trabalhadores livres com novos filhos. Os já conhecidos pelo cache são recebidos de imediato
+            while a_submeter and em_teste < self.avaliações_simultâneas:
+                filho = self._gerar_filho(n * self.n_de_indivíduos - a_submeter + 1)
+                a_submeter -= 1
+                if self._restaurar_do_cache(filho):
+                    concluídos.put((filho, None, None, None))
+                else:
+                    self._submeter(filho, concluídos)
+                em_teste += 1
+
+            filho, resultado, exceção, duração = concluídos.get()
+            em_teste -= 1
+            if exceção is not None:
+                raise exceção
+
+            if resultado is not None:
+                self._restaurar(filho, resultado)
+                filho.adaptação_testada = True
+            if duração is not None:
+                self._guardar_no_cache(filho, self._resultado_de(filho))
+                tempo_de_teste += duração
+
+            self._substituir(filho, n * self.n_de_indivíduos - a_receber + 1)
+            a_receber -= 1
+
+            if a_receber % self.n_de_indivíduos == 0:
+                ocupação = tempo_de_teste / max((default_timer() - início) * self.avaliações_simultâneas, 1e-12)
+                self._fechar_geração_equivalente(min(ocupação, 1.0))
+                início, tempo_de_teste = default_timer(), 0.0
+
+        return self
+
+    def próxima_geração(self) -> "AmbienteEstacionário":
+        """Recebe uma geração equivalente de filhos."""
+        return self.avançar_gerações(1)
+
+    def _gerar_filho(self, k: int) -> 'Indivíduo':
+        adaptações = np.array([ind.adaptação for ind in self.população], dtype=float)
+        i, j = self.gerador("reprodução", k).choice(len(self.população), size=2, replace=False,
+                                                    p=adaptações / adaptações.sum())
+
+        filho = self.crossover(self.população[i], self.população[j], k)
+        self.mutação([filho])
+        return filho
+
+    def _submeter(self, filho: 'Indivíduo', concluídos: queue.Queue) -> None:
+        """Inicia o teste do filho com o executor do ambiente. Ao terminar, o filho é posto em concluídos com o resul-
+        tado vindo de outro processo, se houver, a exceção, se houver, e a duração do teste."""
+        submissão = default_timer()
+
+        def concluir(resultado=None):
+            concluídos.put((filho, resultado, None, default_timer() - submissão))
+
+        def falhar(exceção):
+            concluídos.put((filho, None, exceção, None))
+
+        def ao_terminar(futuro):
+            if futuro.exception() is not None:
+                falhar(futuro.exception())
+            else:
+                concluir()
+
+        if self.executor == "serial":
+            try:
+                self.testar_adaptação(filho)
+            except Exception as exceção:
+                falhar(exceção)
+            else:
+                concluir()
+
+        elif self.executor == "threads":
+            if self._linhas_de_execução is None:
+                self._linhas_de_execução = ThreadPoolExecutor(self.avaliações_simultâneas)
+            self._linhas_de_execução.submit(self.testar_adaptação, filho).add_done_callback(ao_terminar)
+
+        else:
+            if self._fila_de_processos is None:
+                self._fila_de_processos = FilaDeAvaliação(_testar_no_trabalhador, self, self.avaliações_simultâneas)
+            self._fila_de_processos.submeter(filho.gene, concluir, falhar)
+
+    def _substituir(self, filho: 'Indivíduo', k: int) -> None:
+        """Põe o k-ésimo filho recebido no lugar do pior indivíduo da população, ou do pior de um torneio, se for mais
+        adaptado."""
+        if self.substituição == "pior":
+            candidatos = range(len(self.população))
+        else:
+            candidatos = self.gerador("substituição", k).choice(len(self.população), size=self.tamanho_do_torneio,
+                                                                replace=False)
+
+        k = min(candidatos, key=lambda k: self.população[k].adaptação)
+        if filho.adaptação > self.população[k].adaptação:
+            self.população[k] = filho
+
+    def _fechar_geração_equivalente(self, ocupação: float) -> None:
+        # A população segue recebendo filhos no lugar: o histórico guarda uma cópia da geração fechada
+        self.população = sorted(self.população, reverse=True)
+        self.gerações.append(list(self.população))
+        self.n_da_geração += 1
+
+        adaptações = [ind.adaptação for ind in self.população]
+        self.estatísticas_das_gerações.append({"melhor": max(adaptações),
+                                               "média": float(np.mean(adaptações)),
+                                               "ocupação": ocupação})
+
+        orçamento_de_memória.reequilibrar()
+
+
+def _testar_no_trabalhador(ambiente: Ambiente, gene: Any) -> Any:
+    """Testa um gene num processo do executor e retorna o que o cache de genes guardaria do indivíduo testado."""
+    ind = ambiente._indivíduo_de(gene)
+    ambiente.testar_adaptação(ind)
+    return ambiente._resultado_de(ind)
+
+
 @dataclass(order=True)
 class Indivíduo:
     """Objeto que carrega um gene, sua expressão fenotípica para um dado ambiente e sua adaptação para um dado problema.
@@ -199,14 +681,64 @@ class Indivíduo:
     1. Indivíduos podem ser comparados de acordo com sua adaptação:
        >>> Indivíduo(gene="01001010", nome="ind1", adaptação=0) < Indivíduo(gene="10010001", nome="ind2", adaptação=1)
        True
+
+    2. O identificador de um indivíduo é o resumo de 128 bits do seu gene, calculado na primeira consulta e guardado
+       até que o gene seja substituído. Operadores que modificam o gene no lugar devem chamar invalidar_id:
+       >>> ind = Indivíduo(gene=np.zeros(4, dtype=bool), nome="ind")
+       >>> id_antigo = ind.id
+       >>> ind.gene[0] = True
+       >>> ind.invalidar_id()
+       >>> ind.id != id_antigo
+       True
     """
     gene: Any = field(compare=False)
     nome: str = field(compare=False)
     adaptação: float = 0.0
     adaptação_testada: bool = field(default=False, compare=False)
+    _id: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        self.id = self.gene
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        if nome == "gene":
+            object.__setattr__(self, "_id", None)
+        object.__setattr__(self, nome, valor)
+
+    @property
+    def id(self) -> bytes:
+        if self._id is None:
+            self._id = resumo_do_gene(self.gene)
+        return self._id
+
+    def invalidar_id(self) -> None:
+        """Descarta o identificador guardado, para que seja recalculado após uma modificação do gene no lugar."""
+        self._id = None
 
     def __str__(self):
         return f"{self.nome}: {self.adaptação}"
+
+
+def intervalos_ambíguos(inferiores: np.ndarray, superiores: np.ndarray, cortes: Iterable[int]) -> np.ndarray:
+    """
+    Identifica os indivíduos cuja posição em relação a algum corte do ranking não é decidida pelos seus intervalos de
+    adaptação.
+
+    Quando as adaptações são conhecidas apenas aproximadamente, cada indivíduo i tem sua adaptação exata entre
+    inferiores[i] e superiores[i]. Para um corte k (os k melhores são selecionados), i está certamente entre os k
+    melhores se menos de k outros indivíduos podem superá-lo, e certamente fora deles se ao menos k outros certamente o
+    superam. Nos demais casos, sua seleção depende de exatidão adicional. Indivíduos de intervalos idênticos, em geral
+    cópias de um mesmo fenótipo, não são comparados entre si, pois sua ordem relativa não altera o que é selecionado.
+
+    RETORNA
+    -------
+    ambíguos: np.ndarray -- Máscara dos indivíduos cujo intervalo cruza ao menos um dos cortes
+    """
+    inferiores, superiores = np.asarray(inferiores, dtype=float), np.asarray(superiores, dtype=float)
+
+    distintos = (inferiores[:, None] != inferiores[None, :]) | (superiores[:, None] != superiores[None, :])
+    podem_superar = (distintos & (superiores[None, :] > inferiores[:, None])).sum(axis=1)
+    certamente_superam = (distintos & (inferiores[None, :] > superiores[:, None])).sum(axis=1)
+
+    ambíguos = np.zeros(len(inferiores), dtype=bool)
+    for k in cortes:
+        ambíguos |= (podem_superar >= k) & (certamente_superam < k)
+
+    return ambíguos
@@ -0,0 +1,658 @@
+"""
+Caches limitados de resultados já calculados.
+
+CLASSES
+-------
+CacheLRU
+    Cache que despeja as entradas usadas há mais tempo ao exceder um limite de entradas ou de bytes e contabiliza seus
+    acertos, falhas e despejos.
+CacheDosMelhores
+    Cache de capacidade fixa que mantém apenas as entradas de maior mérito.
+CacheCompartilhado
+    Cache local limitado apoiado num dicionário de um gerenciador de processos, compartilhado por todos os processos
+    que o recebem.
+CachePersistente
+    Cache em disco, num banco SQLite, que sobrevive entre execuções e pode ser lido por várias delas ao mesmo tempo.
+FiltroDeBloom
+    Registro probabilístico de chaves já vistas, com poucos bits por chave e sem falsos negativos.
+
+FUNÇÕES
+-------
+resumo_do_gene(gene) -> bytes
+    Resume um gene em 128 bits, usados como chave dos caches de genes.
+tamanho_aproximado(objeto) -> int
+    Estima os bytes ocupados por um objeto e pelos contêineres e arrays que ele carrega.
+tornar_compartilhado(cache, remoto) -> CacheCompartilhado
+    Apoia um cache local no dicionário remoto fornecido, copiando para ele as entradas já conhecidas.
+"""
+
+import sys
+import math
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from hashlib import blake2b
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, MutableMapping, Optional, Tuple, Union
+
+import numpy as np
+
+
+def resumo_do_gene(gene: Any) -> bytes:
+    """
+    Resume um gene em 128 bits, usados como chave dos caches de genes.
+
+    Genes binários em arrays são compactados a um bit por posição antes do resumo, e seu formato entra no resumo para
+    distinguir genes de formatos diferentes com os mesmos bits. Outros genes são resumidos pela sua representação.
+    """
+    if isinstance(gene, np.ndarray):
+        conteúdo = np.packbits(gene).tobytes() if gene.dtype == bool else gene.tobytes()
+        conteúdo += repr((gene.shape, gene.dtype.str)).encode()
+    else:
+        conteúdo = repr(gene).encode()
+
+    return blake2b(conteúdo, digest_size=16).digest()
+
+
+def tamanho_aproximado(objeto: Any) -> int:
+    """Estima os bytes ocupados por um objeto e pelos contêineres e arrays que ele carrega."""
+    if isinstance(objeto, np.ndarray):
+        return sys.getsizeof(objeto) + (0 if objeto.base is None else objeto.nbytes)
+    if isinstance(objeto, (tuple, list)):
+        return sys.getsizeof(objeto) + sum(tamanho_aproximado(item) for item in objeto)
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in objeto.items())
+    return sys.getsizeof(objeto)
+
+
+class CacheLRU:
+    """
+    Cache que despeja as entradas usadas há mais tempo ao exceder um limite de entradas ou de bytes e contabiliza seus
+    acertos, falhas e despejos.
+
+    Consultas com `chave in cache` não contam como acerto nem falha e não renovam a entrada; apenas obter o faz. As ope-
+    rações que alteram o cache são protegidas por uma trava, de modo que ele pode ser usado por várias linhas de execu-
+    ção ao mesmo tempo.
+
+    O cache é um componente de suporte.memória.OrçamentoDeMemória: o orçamento pode pedir que ele libere bytes, despe-
+    jando as entradas mais antigas, e o valor de cada byte seu é o custo de reposição poupado pelos acertos.
+
+    ATRIBUTOS
+    ---------
+    máximo_de_entradas: Optional[int] -- Maior número de entradas mantidas; ilimitado se None
+    máximo_de_bytes   : Optional[int] -- Maior soma dos tamanhos estimados das entradas; ilimitada se None
+    custo_de_reposição: float         -- Custo de recalcular uma entrada, na unidade comum do orçamento de memória
+    bytes_ocupados    : int           -- Soma dos tamanhos estimados das entradas presentes
+    acertos           : int           -- Consultas por obter que encontraram a chave
+    falhas            : int           -- Consultas por obter que não encontraram a chave
+    despejos          : int           -- Entradas removidas para respeitar os limites
+
+    MÉTODOS
+    -------
+    obter(chave: Hashable, padrão: Any = None) -> Any
+        Retorna o valor guardado na chave, renovando-a, ou o padrão se ela não estiver no cache.
+    itens() -> List[Tuple[Hashable, Any]]
+        Retorna as entradas, da usada há mais tempo à mais recente, sem renová-las.
+    liberar(bytes_a_liberar: int) -> int
+        Despeja as entradas mais antigas até liberar os bytes pedidos e retorna os liberados.
+    valor_por_byte() -> float
+        Custo de reposição poupado pelos acertos, por byte ocupado.
+    limpar() -> None
+        Remove todas as entradas e zera os contadores.
+    estatísticas() -> Dict[str, int]
+        Resume o estado do cache e seus contadores.
+    """
+
+    def __init__(self,
+                 máximo_de_entradas: Optional[int] = None,
+                 máximo_de_bytes: Optional[int] = None,
+                 tamanho_de: Callable[[Any], int] = tamanho_aproximado,
+                 custo_de_reposição: float = 1.0):
+        self.máximo_de_entradas = máximo_de_entradas
+        self.máximo_de_bytes = máximo_de_bytes
+        self.custo_de_reposição = custo_de_reposição
+        self._tamanho_de = tamanho_de
+        self._trava = threading.RLock()
+
+        self._entradas: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._tamanhos: Dict[Hashable, int] = {}
+        self.bytes_ocupados = 0
+
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._entradas
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def __getitem__(self, chave: Hashable) -> Any:
+        with self._trava:
+            valor = self._entradas[chave]
+            self._entradas.move_to_end(chave)
+            return valor
+
+    def __setitem__(self, chave: Hashable, valor: Any) -> None:
+        tamanho = self._tamanho_de(chave) + self._tamanho_de(valor)
+
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+
+            self._entradas[chave] = valor
+            self._tamanhos[chave] = tamanho
+            self.bytes_ocupados += tamanho
+
+            # Despeja as entradas mais antigas até que os limites sejam respeitados, mantendo ao menos a recém inserida
+            while len(self._entradas) > 1 and self._excedido():
+                self._remover(next(iter(self._entradas)))
+                self.despejos += 1
+
+    def __delitem__(self, chave: Hashable) -> None:
+        with self._trava:
+            self._remover(chave)
+
+    def obter(self, chave: Hashable, padrão: Any = None) -> Any:
+        """Retorna o valor guardado na chave, renovando-a, ou o padrão se ela não estiver no cache."""
+        with self._trava:
+            if chave in self._entradas:
+                self.acertos += 1
+                return self[chave]
+
+            self.falhas += 1
+            return padrão
+
+    def itens(self) -> List[Tuple[Hashable, Any]]:
+        """Retorna as entradas, da usada há mais tempo à mais recente, sem renová-las."""
+        with self._trava:
+            return list(self._entradas.items())
+
+    def liberar(self, bytes_a_liberar: int) -> int:
+        """Despeja as entradas mais antigas até liberar os bytes pedidos e retorna os liberados."""
+        with self._trava:
+            bytes_antes = self.bytes_ocupados
+            while self._entradas and bytes_antes - self.bytes_ocupados < bytes_a_liberar:
+                self._remover(next(iter(self._entradas)))
+                self.despejos += 1
+            return bytes_antes - self.bytes_ocupados
+
+    def valor_por_byte(self) -> float:
+        """Custo de reposição poupado pelos acertos, por byte ocupado."""
+        return self.custo_de_reposição * self.acertos / max(self.bytes_ocupados, 1)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._trava:
+            self._entradas.clear()
+            self._tamanhos.clear()
+            self.bytes_ocupados = 0
+            self.acertos = self.falhas = self.despejos = 0
+
+    def estatísticas(self) -> Dict[str, int]:
+        """Resume o estado do cache e seus contadores."""
+        return {"entradas": len(self._entradas),
+                "bytes_ocupados": self.bytes_ocupados,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos}
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_trava"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._trava = threading.RLock()
+
+    def _excedido(self) -> bool:
+        return ((self.máximo_de_entradas is not None and len(self._entradas) > self.máximo_de_entradas)
+                or (self.máximo_de_bytes is not None and self.bytes_ocupados > self.máximo_de_bytes))
+
+    def _remover(self, chave: Hashable) -> None:
+        del self._entradas[chave]
+        self.bytes_ocupados -= self._tamanhos.pop(chave)
+
+
+class CacheDosMelhores:
+    """
+    Cache de capacidade fixa que mantém apenas as entradas de maior mérito.
+
+    Serve a valores caros de guardar, como campos de deslocamento, de que só se quer manter os dos melhores projetos.
+    Uma entrada nova só é admitida, com o cache cheio, se seu mérito supera o da pior entrada, que é então despejada.
+    Como componente de um orçamento de memória, libera bytes despejando as entradas de menor mérito. Como CacheLRU,
+    pode ser usado por várias linhas de execução ao mesmo tempo.
+
+    ATRIBUTOS
+    ---------
+    capacidade        : int   -- Maior número de entradas mantidas
+    custo_de_reposição: float -- Custo de recalcular uma entrada, na unidade comum do orçamento de memória
+    bytes_ocupados    : int   -- Soma dos tamanhos estimados das entradas presentes
+    acertos           : int   -- Consultas por obter que encontraram a chave
+    falhas            : int   -- Consultas por obter que não encontraram a chave
+    despejos          : int   -- Entradas removidas para dar lugar a outras de maior mérito ou para liberar memória
+
+    MÉTODOS
+    -------
+    guardar(chave: Hashable, valor: Any, mérito: float) -> bool
+        Guarda o valor se houver espaço ou se seu mérito superar o da pior entrada. Retorna se ele foi guardado.
+    obter(chave: Hashable, padrão: Any = None) -> Any
+        Retorna o valor guardado na chave ou o padrão se ela não estiver no cache.
+    liberar(bytes_a_liberar: int) -> int
+        Despeja as entradas de menor mérito até liberar os bytes pedidos e retorna os liberados.
+    valor_por_byte() -> float
+        Custo de reposição poupado pelos acertos, por byte ocupado.
+    limpar() -> None
+        Remove todas as entradas e zera os contadores.
+    estatísticas() -> Dict[str, int]
+        Resume o estado do cache e seus contadores.
+    """
+
+    def __init__(self,
+                 capacidade: int,
+                 tamanho_de: Callable[[Any], int] = tamanho_aproximado,
+                 custo_de_reposição: float = 1.0):
+        self.capacidade = capacidade
+        self.custo_de_reposição = custo_de_reposição
+        self._tamanho_de = tamanho_de
+        self._trava = threading.RLock()
+        self._entradas: Dict[Hashable, Tuple[float, Any]] = {}
+        self._tamanhos: Dict[Hashable, int] = {}
+        self.bytes_ocupados = 0
+
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._entradas
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def guardar(self, chave: Hashable, valor: Any, mérito: float) -> bool:
+        """Guarda o valor se houver espaço ou se seu mérito superar o da pior entrada. Retorna se ele foi guardado."""
+        with self._trava:
+            if chave not in self._entradas and len(self._entradas) >= self.capacidade:
+                if self.capacidade <= 0:
+                    return False
+
+                pior = min(self._entradas, key=lambda k: self._entradas[k][0])
+                if self._entradas[pior][0] >= mérito:
+                    return False
+
+                self._remover(pior)
+                self.despejos += 1
+
+            if chave in self._entradas:
+                self._remover(chave)
+
+            self._entradas[chave] = (mérito, valor)
+            self._tamanhos[chave] = self._tamanho_de(chave) + self._tamanho_de(valor)
+            self.bytes_ocupados += self._tamanhos[chave]
+            return True
+
+    def obter(self, chave: Hashable, padrão: Any = None) -> Any:
+        """Retorna o valor guardado na chave ou o padrão se ela não estiver no cache."""
+        with self._trava:
+            if chave in self._entradas:
+                self.acertos += 1
+                return self._entradas[chave][1]
+
+            self.falhas += 1
+            return padrão
+
+    def liberar(self, bytes_a_liberar: int) -> int:
+        """Despeja as entradas de menor mérito até liberar os bytes pedidos e retorna os liberados."""
+        with self._trava:
+            bytes_antes = self.bytes_ocupados
+            for chave in sorted(self._entradas, key=lambda k: self._entradas[k][0]):
+                if bytes_antes - self.bytes_ocupados >= bytes_a_liberar:
+                    break
+                self._remover(chave)
+                self.despejos += 1
+            return bytes_antes - self.bytes_ocupados
+
+    def valor_por_byte(self) -> float:
+        """Custo de reposição poupado pelos acertos, por byte ocupado."""
+        return self.custo_de_reposição * self.acertos / max(self.bytes_ocupados, 1)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._trava:
+            self._entradas.clear()
+            self._tamanhos.clear()
+            self.bytes_ocupados = 0
+            self.acertos = self.falhas = self.despejos = 0
+
+    def estatísticas(self) -> Dict[str, int]:
+        """Resume o estado do cache e seus contadores."""
+        return {"entradas": len(self._entradas),
+                "bytes_ocupados": self.bytes_ocupados,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos}
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_trava"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._trava = threading.RLock()
+
+    def _remover(self, chave: Hashable) -> None:
+        del self._entradas[chave]
+        self.bytes_ocupados -= self._tamanhos.pop(chave)
+
+
+class CacheCompartilhado:
+    """
+    Cache local limitado apoiado num dicionário de um gerenciador de processos, compartilhado por todos os processos
+    que o recebem.
+
+    Escritas vão ao cache local e ao dicionário remoto. Leituras consultam primeiro o cache local e, em sua falta, o
+    remoto, trazendo o valor encontrado para o local. Assim, um resultado obtido por qualquer processo fica disponível
+    a todos, e consultas repetidas num mesmo processo não atravessam o gerenciador.
+
+    Ao ser serializado, o cache leva apenas a referência ao dicionário remoto e recomeça o local vazio. A referência é
+    restabelecida no primeiro uso; se o gerenciador não existir mais, como ao carregar um estado salvo em disco, o
+    cache segue apenas com sua parte local.
+
+    ATRIBUTOS
+    ---------
+    local   : CacheLRU -- Cache deste processo
+    acertos : int      -- Consultas por obter que encontraram a chave, localmente ou no dicionário remoto
+    falhas  : int      -- Consultas por obter que não encontraram a chave
+    remotos : int      -- Acertos que precisaram consultar o dicionário remoto
+
+    MÉTODOS
+    -------
+    obter(chave: Hashable, padrão: Any = None) -> Any
+        Retorna o valor guardado na chave, local ou remotamente, ou o padrão se ela não for encontrada.
+    limpar() -> None
+        Remove todas as entradas, locais e remotas, e zera os contadores.
+    estatísticas() -> Dict[str, int]
+        Resume o estado do cache e seus contadores.
+    """
+
+    def __init__(self, remoto: MutableMapping, local: Optional[CacheLRU] = None):
+        self.local = CacheLRU() if local is None else local
+        self._remoto: Optional[MutableMapping] = remoto
+        self._remoto_serializado: Optional[bytes] = None
+
+        self.acertos = 0
+        self.falhas = 0
+        self.remotos = 0
+
+    @property
+    def remoto(self) -> Optional[MutableMapping]:
+        """Dicionário remoto, reconectado ao gerenciador no primeiro uso após a desserialização, ou None se ele não
+        estiver mais disponível."""
+        if self._remoto is None and self._remoto_serializado is not None:
+            try:
+                self._remoto = pickle.loads(self._remoto_serializado)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._remoto = None
+            self._remoto_serializado = None
+        return self._remoto
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self.local or (self.remoto is not None and chave in self.remoto)
+
+    def __len__(self) -> int:
+        return len(self.remoto) if self.remoto is not None else len(self.local)
+
+    def __getitem__(self, chave: Hashable) -> Any:
+        if chave in self.local:
+            return self.local[chave]
+        if self.remoto is None:
+            raise KeyError(chave)
+
+        valor = self.remoto[chave]
+        self.local[chave] = valor
+        return valor
+
+    def __setitem__(self, chave: Hashable, valor: Any) -> None:
+        self.local[chave] = valor
+        if self.remoto is not None:
+            self.remoto[chave] = valor
+
+    def obter(self, chave: Hashable, padrão: Any = None) -> Any:
+        """Retorna o valor guardado na chave, local ou remotamente, ou o padrão se ela não for encontrada."""
+        if chave in self.local:
+            self.acertos += 1
+            return self.local[chave]
+
+        try:
+            if self.remoto is None:
+                raise KeyError(chave)
+            valor = self.remoto[chave]
+        except KeyError:
+            self.falhas += 1
+            return padrão
+
+        self.acertos += 1
+        self.remotos += 1
+        self.local[chave] = valor
+        return valor
+
+    def limpar(self) -> None:
+        """Remove todas as entradas, locais e remotas, e zera os contadores."""
+        self.local.limpar()
+        if self.remoto is not None:
+            self.remoto.clear()
+        self.acertos = self.falhas = self.remotos = 0
+
+    def estatísticas(self) -> Dict[str, int]:
+        """Resume o estado do cache e seus contadores."""
+        return {"entradas": len(self),
+                "entradas_locais": len(self.local),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "acertos_remotos": self.remotos,
+                "despejos_locais": self.local.despejos}
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["local"] = CacheLRU(self.local.máximo_de_entradas, self.local.máximo_de_bytes,
+                                   custo_de_reposição=self.local.custo_de_reposição)
+        estado["_remoto"] = None
+        estado["_remoto_serializado"] = (pickle.dumps(self._remoto) if self._remoto is not None
+                                         else self._remoto_serializado)
+        return estado
+
+
+def tornar_compartilhado(cache: Union[CacheLRU, CacheCompartilhado], remoto: MutableMapping) -> CacheCompartilhado:
+    """Apoia um cache local no dicionário remoto fornecido, copiando para ele as entradas já conhecidas. Um cache já
+    compartilhado tem sua parte local reaproveitada."""
+    local = cache.local if isinstance(cache, CacheCompartilhado) else cache
+    remoto.update(local.itens())
+    return CacheCompartilhado(remoto, local)
+
+
+class CachePersistente:
+    """
+    Cache em disco, num banco SQLite, que sobrevive entre execuções e pode ser lido por várias delas ao mesmo tempo.
+
+    As entradas pertencem a um espaço, em geral uma impressão digital de tudo de que os valores guardados dependem. Um
+    cache aberto com outro espaço não enxerga as entradas anteriores, o que as invalida sem que precisem ser apagadas.
+    O banco usa o modo WAL, em que leitores não bloqueiam escritores nem uns aos outros, e cada escrita é uma transação
+    própria, visível de imediato às demais execuções.
+
+    A conexão é aberta no primeiro uso e não é serializada, de modo que cópias enviadas a outros processos abrem a sua.
+    Dentro de um processo, ela é compartilhada pelas linhas de execução, que a usam uma de cada vez.
+
+    ATRIBUTOS
+    ---------
+    caminho : Path -- Arquivo do banco
+    espaço  : str  -- Espaço a que pertencem as entradas lidas e escritas
+    acertos : int  -- Consultas por obter que encontraram a chave
+    falhas  : int  -- Consultas por obter que não encontraram a chave
+
+    MÉTODOS
+    -------
+    obter(chave: bytes, padrão: Any = None) -> Any
+        Retorna o valor guardado na chave, neste espaço, ou o padrão se ela não estiver no banco.
+    limpar() -> None
+        Remove as entradas deste espaço e zera os contadores.
+    descartar_outros_espaços() -> int
+        Remove as entradas de todos os demais espaços, invalidadas, e retorna quantas foram removidas.
+    estatísticas() -> Dict[str, int]
+        Resume o estado do cache e seus contadores.
+    fechar() -> None
+        Fecha a conexão com o banco, que é reaberta se o cache voltar a ser usado.
+    """
+
+    def __init__(self, caminho: Union[str, Path], espaço: str):
+        self.caminho = Path(caminho)
+        self.espaço = espaço
+        self._conexão: Optional[sqlite3.Connection] = None
+        self._trava = threading.RLock()
+
+        self.acertos = 0
+        self.falhas = 0
+
+    @property
+    def conexão(self) -> sqlite3.Connection:
+        if self._conexão is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._conexão = sqlite3.connect(self.caminho, timeout=60, isolation_level=None, check_same_thread=False)
+            self._conexão.execute("PRAGMA journal_mode=WAL")
+            self._conexão.execute("PRAGMA synchronous=NORMAL")
+            self._conexão.execute("CREATE TABLE IF NOT EXISTS entradas "
+                                  "(espaço TEXT, chave BLOB, valor BLOB, PRIMARY KEY (espaço, chave))")
+        return self._conexão
+
+    def _executar(self, comando: str, parâmetros: tuple = ()) -> int:
+        """Executa um comando e retorna quantas linhas ele afetou."""
+        with self._trava:
+            return self.conexão.execute(comando, parâmetros).rowcount
+
+    def _consultar(self, comando: str, parâmetros: tuple = ()) -> Optional[tuple]:
+        """Executa uma consulta e retorna sua primeira linha, ou None se não houver nenhuma."""
+        with self._trava:
+            return self.conexão.execute(comando, parâmetros).fetchone()
+
+    def __contains__(self, chave: bytes) -> bool:
+        linha = self._consultar("SELECT 1 FROM entradas WHERE espaço = ? AND chave = ?", (self.espaço, chave))
+        return linha is not None
+
+    def __len__(self) -> int:
+        return self._consultar("SELECT COUNT(*) FROM entradas WHERE espaço = ?", (self.espaço,))[0]
+
+    def __setitem__(self, chave: bytes, valor: Any) -> None:
+        self._executar("INSERT OR REPLACE INTO entradas VALUES (?, ?, ?)", (self.espaço, chave, pickle.dumps(valor)))
+
+    def obter(self, chave: bytes, padrão: Any = None) -> Any:
+        """Retorna o valor guardado na chave, neste espaço, ou o padrão se ela não estiver no banco."""
+        linha = self._consultar("SELECT valor FROM entradas WHERE espaço = ? AND chave = ?", (self.espaço, chave))
+        if linha is None:
+            self.falhas += 1
+            return padrão
+
+        self.acertos += 1
+        return pickle.loads(linha[0])
+
+    def limpar(self) -> None:
+        """Remove as entradas deste espaço e zera os contadores."""
+        self._executar("DELETE FROM entradas WHERE espaço = ?", (self.espaço,))
+        self.acertos = self.falhas = 0
+
+    def descartar_outros_espaços(self) -> int:
+        """Remove as entradas de todos os demais espaços, invalidadas, e retorna quantas foram removidas."""
+        return self._executar("DELETE FROM entradas WHERE espaço != ?", (self.espaço,))
+
+    def estatísticas(self) -> Dict[str, int]:
+        """Resume o estado do cache e seus contadores."""
+        return {"entradas": len(self), "acertos": self.acertos, "falhas": self.falhas}
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o banco, que é reaberta se o cache voltar a ser usado."""
+        if self._conexão is not None:
+            self._conexão.close()
+            self._conexão = None
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["_conexão"] = None
+        del estado["_trava"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._trava = threading.RLock()
+
+
+class FiltroDeBloom:
+    """
+    Registro probabilístico de chaves já vistas, com poucos bits por chave e sem falsos negativos.
+
+    Responde em tempo constante se uma chave possivelmente já foi registrada ou se certamente não foi. Dimensionado
+    para a quantidade esperada de chaves e a taxa de falsos positivos desejada, usa -ln(taxa) / ln(2)² bits por chave
+    (cerca de 9,6 para 1%) e ln(2) vezes esse número de posições por chave. As posições são derivadas por hash duplo
+    dos primeiros 16 bytes da chave, que deve ser ela própria um resumo criptográfico, como os de resumo_do_gene.
+
+    Registrar mais chaves que o esperado não impede o funcionamento, mas eleva a taxa de falsos positivos.
+
+    ATRIBUTOS
+    ---------
+    bits      : int        -- Tamanho do filtro, em bits
+    posições  : int        -- Quantas posições do filtro cada chave marca
+    registros : int        -- Quantas chaves foram registradas, contando repetições
+    mapa      : np.ndarray -- Bits do filtro, agrupados em bytes
+
+    MÉTODOS
+    -------
+    registrar(chave: bytes) -> None
+        Marca as posições da chave no filtro.
+    taxa_de_falsos_positivos_estimada() -> float
+        Estima a taxa de falsos positivos a partir da fração de bits marcados.
+    liberar(bytes_a_liberar: int) -> int
+        Não libera nada: o filtro tem tamanho fixo e esquecer chaves criaria falsos negativos.
+    valor_por_byte() -> float
+        Infinito, para que o filtro seja o último componente a que um orçamento de memória recorre.
+    """
+
+    def __init__(self, chaves_esperadas: int, taxa_de_falsos_positivos: float = 0.01):
+        chaves_esperadas = max(chaves_esperadas, 1)
+        self.bits = max(math.ceil(-chaves_esperadas * math.log(taxa_de_falsos_positivos) / math.log(2) ** 2), 8)
+        self.posições = max(round(self.bits / chaves_esperadas * math.log(2)), 1)
+        self.registros = 0
+        self.mapa = np.zeros(math.ceil(self.bits / 8), dtype=np.uint8)
+
+    def _posições_de(self, chave: bytes) -> np.ndarray:
+        h1 = int.from_bytes(chave[:8], "little")
+        h2 = int.from_bytes(chave[8:16], "little") | 1
+        return np.array([(h1 + i * h2) % self.bits for i in range(self.posições)], dtype=np.int64)
+
+    def registrar(self, chave: bytes) -> None:
+        """Marca as posições da chave no filtro."""
+        posições = self._posições_de(chave)
+        np.bitwise_or.at(self.mapa, posições // 8, (1 << (posições % 8)).astype(np.uint8))
+        self.registros += 1
+
+    def __contains__(self, chave: bytes) -> bool:
+        posições = self._posições_de(chave)
+        return bool(np.all(self.mapa[posições // 8] & (1 << (posições % 8)).astype(np.uint8)))
+
+    def taxa_de_falsos_positivos_estimada(self) -> float:
+        """Estima a taxa de falsos positivos a partir da fração de bits marcados."""
+        fração_marcada = np.unpackbits(self.mapa)[:self.bits].mean()
+        return float(fração_marcada ** self.posições)
+
+    @property
+    def bytes_ocupados(self) -> int:
+        return self.mapa.nbytes
+
+    def liberar(self, bytes_a_liberar: int) -> int:
+        """Não libera nada: o filtro tem tamanho fixo e esquecer chaves criaria falsos negativos."""
+        return 0
+
+    def valor_por_byte(self) -> float:
+        """Infinito, para que o filtro seja o último componente a que um orçamento de memória recorre."""
+        return math.inf
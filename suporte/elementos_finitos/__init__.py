@@ -4,11 +4,12 @@ Define variáveis de tipo e classes usadas por todas as implementações de situ
 
 CLASSES
 -------
-Malha    -- Malha de elementos finitos.
-Elemento -- Elemento finito.
-Nó       -- Nó de um elemento finito.
+Malha           -- Malha de elementos finitos.
+MalhaAdaptativa -- Malha de elementos finitos de tamanhos distintos com nós pendentes.
+Elemento        -- Elemento finito.
+Nó              -- Nó de um elemento finito.
 
-KeBase   -- Classe abstrata base de matrizes de rigidez locais específicas para cada tipo de elemento.
+KeBase          -- Classe abstrata base de matrizes de rigidez locais específicas para cada tipo de elemento.
 """
 
 import pickle
@@ -53,6 +54,58 @@ class Malha:
         self.índice_de: Dict['Nó', int] = {nó: i for i, nó in enumerate(self.nós)}
 
 
+@dataclass
+class MalhaAdaptativa(Malha):
+    """Malha de elementos finitos de tamanhos distintos com nós pendentes.
+
+    Um nó é pendente quando está sobre o lado de um elemento maior sem ser um de seus cantos. Seus graus de liberdade
+    não são independentes: são interpolados linearmente a partir dos nós mestres, que não são pendentes. As restrições
+    são incorporadas à matriz de rigidez geral como K ← TᵀKT, em que u = T·u' expressa os graus de liberdade pendentes
+    em função dos demais.
+
+    ATRIBUTOS
+    ---------
+    tamanhos  : Vetor                              -- Lado de cada elemento em múltiplos do lado do menor elemento
+    restrições: Dict[int, List[Tuple[int, float]]] -- Para o índice global de cada nó pendente, os índices globais dos
+                                                      seus nós mestres e os pesos da interpolação
+
+    MÉTODOS
+    -------
+    condensar(K: Matriz, graus_por_nó: int = 2) -> None
+        Incorpora as restrições em K e desacopla os graus de liberdade dos nós pendentes.
+    interpolar_nós_pendentes(u: Vetor, graus_por_nó: int = 2) -> None
+        Atribui aos nós pendentes os deslocamentos interpolados a partir dos seus nós mestres.
+    """
+
+    tamanhos: Vetor = field(default_factory=lambda: np.ones(0))
+    restrições: Dict[int, List[Tuple[int, float]]] = field(default_factory=dict)
+
+    def condensar(self, K: Matriz, graus_por_nó: int = 2) -> None:
+        """Incorpora as restrições em K e desacopla os graus de liberdade dos nós pendentes."""
+        for pendente, mestres in self.restrições.items():
+            for g in range(graus_por_nó):
+                h = graus_por_nó * pendente + g
+                ms = [graus_por_nó * mestre + g for mestre, _ in mestres]
+                pesos = np.array([peso for _, peso in mestres])
+
+                # K ← K·T: a coluna do grau pendente é distribuída entre as colunas dos mestres
+                K[:, ms] += np.outer(K[:, h], pesos)
+                K[:, h] = 0
+
+                # K ← Tᵀ·K: idem para as linhas
+                K[ms, :] += np.outer(pesos, K[h, :])
+                K[h, :] = 0
+
+                # Mantém K inversível; o valor definitivo do grau pendente vem da interpolação
+                K[h, h] = 1
+
+    def interpolar_nós_pendentes(self, u: Vetor, graus_por_nó: int = 2) -> None:
+        """Atribui aos nós pendentes os deslocamentos interpolados a partir dos seus nós mestres."""
+        for pendente, mestres in self.restrições.items():
+            for g in range(graus_por_nó):
+                u[graus_por_nó * pendente + g] = sum(peso * u[graus_por_nó * mestre + g] for mestre, peso in mestres)
+
+
 @dataclass
 class Elemento:
     """Elemento finito.
@@ -0,0 +1,93 @@
+"""Ordenações de malhas estruturadas por curvas de preenchimento do espaço.
+
+Nós e elementos de malhas construídas sobre uma grade podem ser renumerados de acordo com a posição que ocupam ao longo
+de uma curva de preenchimento (Morton/ordem Z ou Hilbert). Vizinhos na grade passam a ter índices próximos, o que torna
+mais locais os acessos à memória feitos pelas operações de espalhamento e coleta sobre a matriz de correspondência me.
+
+FUNÇÕES
+-------
+chaves_de_morton(I, J) -> Vetor
+    Calcula a posição de cada ponto (i, j) da grade ao longo da curva de Morton.
+chaves_de_hilbert(I, J, ordem) -> Vetor
+    Calcula a posição de cada ponto (i, j) da grade ao longo da curva de Hilbert de ordem fornecida.
+reordenar(elementos, nós, me, chaves_dos_elementos, chaves_dos_nós) -> Tuple[List[Elemento], List[Nó], Matriz]
+    Renumera elementos e nós em ordem crescente de suas chaves e atualiza a matriz de correspondência me.
+"""
+
+from typing import List, Tuple, Callable, Dict
+
+import numpy as np
+
+from suporte.elementos_finitos import Elemento, Nó, Matriz, Vetor
+
+
+def chaves_de_morton(I: Vetor, J: Vetor) -> Vetor:
+    """Calcula a posição de cada ponto (i, j) da grade ao longo da curva de Morton intercalando os bits de i e j."""
+    return _espalhar_bits(np.asarray(I)) << 1 | _espalhar_bits(np.asarray(J))
+
+
+def _espalhar_bits(x: Vetor) -> Vetor:
+    """Insere um bit nulo entre cada par de bits consecutivos dos 16 bits menos significativos de x."""
+    x = x.astype(np.uint32) & 0x0000FFFF
+    x = (x | (x << 8)) & 0x00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F
+    x = (x | (x << 2)) & 0x33333333
+    x = (x | (x << 1)) & 0x55555555
+    return x
+
+
+def chaves_de_hilbert(I: Vetor, J: Vetor, ordem: int) -> Vetor:
+    """Calcula a posição de cada ponto (i, j) da grade ao longo da curva de Hilbert que cobre um quadrado de lado
+    2 ** ordem."""
+    x, y = np.asarray(J, dtype=np.int64).copy(), np.asarray(I, dtype=np.int64).copy()
+    d = np.zeros_like(x)
+
+    lado = 1 << ordem
+    s = lado >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+
+        # Rotaciona o quadrante para que a curva de ordem inferior seja percorrida na orientação correta
+        refletir = ~ry & rx
+        x[refletir] = lado - 1 - x[refletir]
+        y[refletir] = lado - 1 - y[refletir]
+        trocar = ~ry
+        x[trocar], y[trocar] = y[trocar], x[trocar].copy()
+
+        s >>= 1
+
+    return d
+
+
+def _chaves_de_hilbert_para_grade(I: Vetor, J: Vetor) -> Vetor:
+    ordem = max(1, int(np.ceil(np.log2(max(np.max(I), np.max(J)) + 1))))
+    return chaves_de_hilbert(I, J, ordem)
+
+
+chaves_da_curva: Dict[str, Callable[[Vetor, Vetor], Vetor]] = {
+    "morton": chaves_de_morton,
+    "hilbert": _chaves_de_hilbert_para_grade
+}
+
+
+def reordenar(elementos: List[Elemento],
+              nós: List[Nó],
+              me: Matriz,
+              chaves_dos_elementos: Vetor,
+              chaves_dos_nós: Vetor
+              ) -> Tuple[List[Elemento], List[Nó], Matriz]:
+    """Renumera elementos e nós em ordem crescente de suas chaves e atualiza a matriz de correspondência me, supondo
+    dois graus de liberdade por nó."""
+    ordem_dos_elementos = np.argsort(chaves_dos_elementos, kind="stable")
+    ordem_dos_nós = np.argsort(chaves_dos_nós, kind="stable")
+
+    # Posição que cada nó passa a ocupar na nova numeração
+    nova_posição = np.empty_like(ordem_dos_nós)
+    nova_posição[ordem_dos_nós] = np.arange(len(ordem_dos_nós))
+
+    me = me[:, ordem_dos_elementos]
+    me = (2 * nova_posição[me // 2] + me % 2).astype(me.dtype)
+
+    return [elementos[e] for e in ordem_dos_elementos], [nós[i] for i in ordem_dos_nós], me
@@ -1,16 +1,38 @@
+import threading
 from timeit import default_timer
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Union, Tuple, Container, MutableSequence
+from typing import Optional, Dict, Union, Tuple, Container, MutableSequence, NamedTuple, Sequence, Any
 
 import numpy as np
 from numpy.linalg import solve
 
-from suporte.elementos_finitos import Malha, Vetor, Matriz
+from suporte.elementos_finitos import Malha, MalhaAdaptativa, Vetor, Matriz
+from suporte.elementos_finitos.resolvedores import (ResultadoIterativo, PréCondicionador, PréCondicionadorCompartilhado,
+                                                   gradientes_conjugados, resolvedores_iterativos)
 
 
 Máscara = Union[MutableSequence[bool], slice, np.ndarray]
 
 
+class _PorLinhaDeExecução:
+    """Atributo de instância com um valor próprio a cada linha de execução, para que vários projetos possam ser resol-
+    vidos ao mesmo tempo, em linhas de execução distintas, com uma única instância do problema."""
+
+    def __init__(self, padrão=None):
+        self.padrão = padrão
+
+    def __set_name__(self, dono, nome):
+        self.nome = nome
+
+    def __get__(self, problema, dono=None):
+        if problema is None:
+            return self
+        return getattr(problema._estado_da_linha_de_execução(), self.nome, self.padrão)
+
+    def __set__(self, problema, valor):
+        setattr(problema._estado_da_linha_de_execução(), self.nome, valor)
+
+
 class Problema(ABC):
     """Framework de base para a definição de problemas.
 
@@ -29,12 +51,29 @@ class Problema(ABC):
     _monitoramento_ativo    : bool                              -- usado para determinar a atividade do Monitorador
     _início_do_monitoramento: Optional[float]                   -- usado para calcular tempos de execução
     _última_medição         : Optional[float]                   -- usado para calcular tempos de execução
+                                                                   (estes três e o último resultado iterativo têm um
+                                                                   valor próprio a cada linha de execução)
+    resolvedor              : str                               -- "direto" ou o nome de um resolvedor iterativo
+    tolerância_do_resolvedor: float                             -- tolerância padrão dos resolvedores iterativos
+    último_resultado_iterativo: Optional[ResultadoIterativo]    -- convergência da última resolução iterativa
+    pré_condicionador_compartilhado: Optional[PréCondicionadorCompartilhado] -- substitui o de Jacobi, se definido
 
     MÉTODOS CONCRETOS
     -----------------
     resolver_para(parâmetros_dos_elementos: Dict[str, float],
-                  malha: Malha, método: str = None, monitorar: bool = False) -> Tuple[Vetor, Vetor, Malha]
+                  malha: Malha, método: str = None, monitorar: bool = False,
+                  tolerância: Optional[float] = None, chute_inicial: Optional[Vetor] = None
+                  ) -> Tuple[Vetor, Vetor, Malha]
         Resolve a malha fornecida de acordo com os parâmetros dos seus elementos.
+    compartilhar_pré_condicionador(parâmetros_dos_elementos: Dict[str, float], malha: Malha, método: str = None,
+                                   discrepância_máxima: float = 0.1) -> None
+        Fatora a rigidez da malha fornecida para pré-condicionar as resoluções iterativas das malhas seguintes.
+
+    MÉTODOS OPCIONAIS
+    -----------------
+    testar_adaptação_em_lote(genes: Sequence[Any], tolerância: Optional[float] = None,
+                             nomes: Optional[Sequence[str]] = None) -> NamedTuple
+        Testará a adaptação de um lote de genes e retornará vetores com uma posição por gene, o primeiro das adaptações.
 
     MÉTODOS ABSTRATOS
     -----------------
@@ -58,13 +97,23 @@ class Problema(ABC):
         Se monitorar é True, liga o Monitorador e inicia seu timer.
     _desligar_monitoramento() -> None
         Desliga o Monitorador e reinicia o timer.
+    _impor_restrições_dos_nós_pendentes(self, K: Matriz, malha: MalhaAdaptativa) -> None
+    _interpolar_nós_pendentes(self, u: Vetor, malha: MalhaAdaptativa) -> None
     _onde_f_é_conhecido_fatiar(self, K: Matriz, ifc: Máscara) -> Matriz
-    _resolver_sistema_linear(self, Kfc: Matriz, f: Vetor, ifc: Máscara) -> Vetor
+    _construir_pré_condicionador(self, Kfc: Matriz, malha: Malha, ifc: Máscara) -> Optional[PréCondicionador]
+    _resolver_sistema_linear(self, Kfc: Matriz, f: Vetor, ifc: Máscara, tolerância: Optional[float] = None,
+                             chute_inicial: Optional[Vetor] = None,
+                             pré_condicionador: Optional[PréCondicionador] = None) -> Vetor
     _atualizar_graus_de_liberdade(u: Vetor, ifc: Máscara, ufc: Vetor) -> None
     _onde_u_é_conhecido_fatiar(K: Matriz, iuc: Máscara) -> Matriz
     _atualizar_valores_de(f: Vetor, iuc: Máscara, Kuc: Matriz, u: Vetor) -> None
     """
 
+    _monitoramento_ativo = _PorLinhaDeExecução(False)
+    _início_do_monitoramento = _PorLinhaDeExecução()
+    _última_medição = _PorLinhaDeExecução()
+    último_resultado_iterativo = _PorLinhaDeExecução()
+
     def __init__(self,
                  parâmetros_do_problema: Dict[str, Union[str, int, float]],
                  método_padrão: Optional[str] = None):
@@ -76,6 +125,23 @@ class Problema(ABC):
         self._início_do_monitoramento = None
         self._última_medição = None
 
+        self.resolvedor = "direto"
+        self.tolerância_do_resolvedor = 1e-8
+        self.último_resultado_iterativo: Optional[ResultadoIterativo] = None
+        self.pré_condicionador_compartilhado: Optional[PréCondicionadorCompartilhado] = None
+
+    def _estado_da_linha_de_execução(self) -> threading.local:
+        try:
+            return self.__dict__["_estados_por_linha_de_execução"]
+        except KeyError:
+            return self.__dict__.setdefault("_estados_por_linha_de_execução", threading.local())
+
+    def __getstate__(self):
+        # O estado de cada linha de execução diz respeito apenas às resoluções em curso neste processo
+        estado = self.__dict__.copy()
+        estado.pop("_estados_por_linha_de_execução", None)
+        return estado
+
     class Monitorador:
         """Decorador que mensura o tempo de execução do resolvedor e a duração de cada etapa"""
 
@@ -105,9 +171,14 @@ class Problema(ABC):
                       parâmetros_dos_elementos: Dict[str, float],
                       malha: Malha,
                       método: str = None,
-                      monitorar: bool = False
+                      monitorar: bool = False,
+                      tolerância: Optional[float] = None,
+                      chute_inicial: Optional[Vetor] = None
                       ) -> Tuple[Vetor, Vetor, Malha]:
-        """Resolve a malha fornecida de acordo com os parâmetros dos seus elementos."""
+        """Resolve a malha fornecida de acordo com os parâmetros dos seus elementos.
+
+        Com um resolvedor iterativo, tolerância substitui a tolerância padrão e chute_inicial, um vetor de deslocamentos
+        com os graus de liberdade da malha, serve de ponto de partida às iterações."""
 
         self._configurar_monitoramento(monitorar)
 
@@ -116,6 +187,8 @@ class Problema(ABC):
         Ks_locais = self.calcular_matrizes_de_rigidez_local(**parâmetros_dos_elementos)
         K = self.montar_matriz_de_rigidez_geral(malha, Ks_locais, graus_de_liberdade,
                                                 método=método if método is not None else self._método_padrão)
+        if isinstance(malha, MalhaAdaptativa):
+            self._impor_restrições_dos_nós_pendentes(K, malha)
 
         f, u, ifc, iuc = self.incorporar_condições_de_contorno(malha,
                                                                graus_de_liberdade,
@@ -123,9 +196,12 @@ class Problema(ABC):
 
         # Lógica de determinação de f e u
         Kfc = self._onde_f_é_conhecido_fatiar(K, ifc)
-        ufc = self._resolver_sistema_linear(Kfc, f, ifc)
+        pré_condicionador = self._construir_pré_condicionador(Kfc, malha, ifc)
+        ufc = self._resolver_sistema_linear(Kfc, f, ifc, tolerância, chute_inicial, pré_condicionador)
 
         self._atualizar_graus_de_liberdade(u, ifc, ufc)
+        if isinstance(malha, MalhaAdaptativa):
+            self._interpolar_nós_pendentes(u, malha)
 
         Kuc = self._onde_u_é_conhecido_fatiar(K, iuc)
         self._atualizar_valores_de(f, iuc, Kuc, u)
@@ -134,6 +210,43 @@ class Problema(ABC):
 
         return f, u, malha
 
+    def compartilhar_pré_condicionador(self,
+                                       parâmetros_dos_elementos: Dict[str, float],
+                                       malha: Malha,
+                                       método: str = None,
+                                       discrepância_máxima: float = 0.1
+                                       ) -> None:
+        """Fatora a rigidez da malha fornecida para pré-condicionar as resoluções iterativas das malhas seguintes.
+
+        Os graus de liberdade são identificados pelas etiquetas dos nós, que devem ser as mesmas para nós que ocupam a
+        mesma posição em malhas distintas. Malhas cuja discrepância em relação à fornecida excede a máxima continuam
+        pré-condicionadas por Jacobi."""
+        graus_de_liberdade = self.determinar_graus_de_liberdade(malha)
+
+        Ks_locais = self.calcular_matrizes_de_rigidez_local(**parâmetros_dos_elementos)
+        K = self.montar_matriz_de_rigidez_geral(malha, Ks_locais, graus_de_liberdade,
+                                                método=método if método is not None else self._método_padrão)
+        if isinstance(malha, MalhaAdaptativa):
+            self._impor_restrições_dos_nós_pendentes(K, malha)
+
+        _, _, ifc, _ = self.incorporar_condições_de_contorno(malha, graus_de_liberdade, self.parâmetros_do_problema)
+
+        etiquetas = self._etiquetas_dos_graus_de_liberdade(malha)
+        self.pré_condicionador_compartilhado = PréCondicionadorCompartilhado(self._onde_f_é_conhecido_fatiar(K, ifc),
+                                                                             [etiquetas[i] for i in ifc],
+                                                                             discrepância_máxima)
+
+    def testar_adaptação_em_lote(self, genes: Sequence[Any], tolerância: Optional[float] = None,
+                                 nomes: Optional[Sequence[str]] = None) -> NamedTuple:
+        """Testará a adaptação de um lote de genes, sem criar indivíduos, e retornará as adaptações e as respostas
+        físicas de todos num NamedTuple de vetores com uma posição por gene, o primeiro das adaptações. Problemas que
+        o implementam podem ser avaliados em lote pelos ambientes e pelos processos trabalhadores."""
+        raise NotImplementedError(f"{type(self).__name__} não implementa a avaliação em lote")
+
+    @staticmethod
+    def _etiquetas_dos_graus_de_liberdade(malha: Malha, graus_por_nó: int = 2) -> list:
+        return [(nó.etiqueta, g) for nó in malha.nós for g in range(graus_por_nó)]
+
     def _configurar_monitoramento(self, monitorar: bool) -> None:
         """Se monitorar é True, liga o Monitorador e inicia seu timer"""
         if monitorar:
@@ -172,13 +285,46 @@ class Problema(ABC):
                                          ) -> Tuple[Vetor, Vetor, Máscara, Máscara]:
         """Atualizará os valores dos vetores f e u para incorporar as condições de contorno."""
 
+    @Monitorador(mensagem="Restrições dos nós pendentes incorporadas a K")
+    def _impor_restrições_dos_nós_pendentes(self, K: Matriz, malha: MalhaAdaptativa) -> None:
+        malha.condensar(K)
+
+    @Monitorador(mensagem="Deslocamentos dos nós pendentes interpolados")
+    def _interpolar_nós_pendentes(self, u: Vetor, malha: MalhaAdaptativa) -> None:
+        malha.interpolar_nós_pendentes(u)
+
     @Monitorador(mensagem="K fatiado onde f é conhecido")
     def _onde_f_é_conhecido_fatiar(self, K: Matriz, ifc: Máscara) -> Matriz:
         return K[np.ix_(ifc, ifc)]
 
+    @Monitorador(mensagem="Pré-condicionador compartilhado adaptado à malha")
+    def _construir_pré_condicionador(self, Kfc: Matriz, malha: Malha, ifc: Máscara) -> Optional[PréCondicionador]:
+        if self.resolvedor not in resolvedores_iterativos or self.pré_condicionador_compartilhado is None:
+            return None
+
+        etiquetas = self._etiquetas_dos_graus_de_liberdade(malha)
+        return self.pré_condicionador_compartilhado.para(Kfc, [etiquetas[i] for i in ifc])
+
     @Monitorador(mensagem="Sistema linear resolvido onde f é conhecido")
-    def _resolver_sistema_linear(self, Kfc: Matriz, f: Vetor, ifc: Máscara) -> Vetor:
-        return solve(Kfc, f[ifc])
+    def _resolver_sistema_linear(self,
+                                 Kfc: Matriz,
+                                 f: Vetor,
+                                 ifc: Máscara,
+                                 tolerância: Optional[float] = None,
+                                 chute_inicial: Optional[Vetor] = None,
+                                 pré_condicionador: Optional[PréCondicionador] = None
+                                 ) -> Vetor:
+        if self.resolvedor not in resolvedores_iterativos:
+            return solve(Kfc, f[ifc])
+
+        self.último_resultado_iterativo = gradientes_conjugados(
+            Kfc, f[ifc],
+            pré_condicionador=pré_condicionador,
+            chute_inicial=None if chute_inicial is None else chute_inicial[ifc],
+            tolerância=self.tolerância_do_resolvedor if tolerância is None else tolerância
+        )
+
+        return self.último_resultado_iterativo.u
 
     @Monitorador(mensagem="Graus de liberdade atualizados com o resultado da etapa anterior")
     def _atualizar_graus_de_liberdade(self, u: Vetor, ifc: Máscara, ufc: Vetor) -> None:
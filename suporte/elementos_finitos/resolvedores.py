@@ -0,0 +1,212 @@
+"""Resolvedores iterativos de sistemas lineares simétricos positivos definidos.
+
+Complementam a resolução direta usada por padrão em Problema. Interrompidos com tolerâncias frouxas, fornecem soluções
+aproximadas acompanhadas de uma estimativa do erro cometido, o que permite decidir quando vale a pena refiná-las.
+
+CLASSES
+-------
+ResultadoIterativo            -- Solução aproximada de um resolvedor iterativo e as grandezas que descrevem sua conver-
+                                 gência.
+PréCondicionadorCompartilhado -- Fatoração da rigidez de um projeto representativo, usada como pré-condicionador
+                                 dos sistemas de projetos semelhantes.
+
+FUNÇÕES
+-------
+gradientes_conjugados(K, f, pré_condicionador, chute_inicial, tolerância, máximo_de_iterações) -> ResultadoIterativo
+    Resolve K·u = f pelo método dos gradientes conjugados pré-condicionado.
+pré_condicionador_de_jacobi(K) -> PréCondicionador
+    Retorna o pré-condicionador diagonal de K.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Hashable, Sequence
+
+import numpy as np
+import scipy.sparse
+from scipy.sparse.linalg import SuperLU, splu
+
+from suporte.elementos_finitos import Matriz, Vetor
+
+
+PréCondicionador = Callable[[Vetor], Vetor]
+
+resolvedores_iterativos = {"gradientes_conjugados"}
+
+
+@dataclass
+class ResultadoIterativo:
+    """Solução aproximada de um resolvedor iterativo e as grandezas que descrevem sua convergência.
+
+    ATRIBUTOS
+    ---------
+    u               : Vetor -- Solução aproximada
+    iterações       : int   -- Número de iterações executadas
+    resíduo_relativo: float -- ||f - K·u|| / ||f|| ao fim das iterações
+    erro_estimado   : float -- Estimativa de ||u - u_exato||, obtida do resíduo pré-condicionado e do menor valor de
+                               Ritz do operador pré-condicionado. Não é uma cota: pode subestimar o erro
+    """
+
+    u: Vetor
+    iterações: int
+    resíduo_relativo: float
+    erro_estimado: float
+
+
+class PréCondicionadorCompartilhado:
+    """Fatoração da rigidez de um projeto representativo, usada como pré-condicionador dos sistemas de projetos seme-
+    lhantes.
+
+    Os graus de liberdade são identificados por etiquetas, por exemplo (etiqueta do nó, direção), e não pela sua posi-
+    ção no sistema, que muda de projeto para projeto. Para um resíduo r de outro projeto, os graus que o representativo
+    também tem recebem K_rep⁻¹·r, com r nulo nos graus ausentes do outro projeto, e os demais recebem o pré-condiciona-
+    mento de Jacobi. O operador resultante é simétrico e positivo definido, como exigem os gradientes conjugados.
+
+    K_rep⁻¹·r é aplicado por substituições na fatoração esparsa de K_rep, sem formar a inversa. A rigidez é guardada
+    esparsa e fatorada no primeiro uso em cada processo: cópias enviadas a outros processos levam só a matriz esparsa.
+    A fatoração é a LU do SuperLU com ordenação simétrica, que para a rigidez, simétrica e positiva definida, tem o
+    mesmo preenchimento que a de Cholesky.
+
+    O ganho depende da semelhança entre os projetos: quando muitos graus de liberdade de um não existem no outro, a in-
+    versa do representativo aproxima mal a rigidez e as iterações superam as do pré-condicionamento de Jacobi. Acima da
+    discrepância máxima, o sistema é deixado para o pré-condicionador de Jacobi.
+
+    ATRIBUTOS
+    ---------
+    rigidez            : scipy.sparse.csc_matrix -- Rigidez do projeto representativo nos graus de liberdade livres
+    fator              : SuperLU                 -- Fatoração esparsa da rigidez, feita no primeiro uso
+    posição_de         : Dict[Hashable, int]     -- Posição de cada grau de liberdade do representativo, dada sua eti-
+                                                    queta
+    discrepância_máxima: float                   -- Maior fração de graus de liberdade sem correspondente, em relação
+                                                    aos do sistema a pré-condicionar, para a qual a fatoração é usada
+
+    MÉTODOS
+    -------
+    para(K: Matriz, etiquetas: Sequence[Hashable]) -> Optional[PréCondicionador]
+        Adapta o pré-condicionador ao sistema de rigidez K cujos graus de liberdade têm as etiquetas fornecidas.
+    """
+
+    def __init__(self, K_representativo: Matriz, etiquetas: Sequence[Hashable], discrepância_máxima: float = 0.1):
+        self.rigidez = scipy.sparse.csc_matrix(K_representativo)
+        self.posição_de = {etiqueta: k for k, etiqueta in enumerate(etiquetas)}
+        self.discrepância_máxima = discrepância_máxima
+        self._fator: Optional[SuperLU] = None
+
+    @property
+    def fator(self) -> SuperLU:
+        """Fatoração esparsa da rigidez do representativo, feita no primeiro uso em cada processo."""
+        if self._fator is None:
+            self._fator = splu(self.rigidez, permc_spec="MMD_AT_PLUS_A")
+        return self._fator
+
+    def para(self, K: Matriz, etiquetas: Sequence[Hashable]) -> Optional[PréCondicionador]:
+        """Adapta o pré-condicionador ao sistema de rigidez K cujos graus de liberdade têm as etiquetas fornecidas.
+
+        Retorna None se a discrepância entre os graus de liberdade do sistema e os do representativo exceder a má-
+        xima."""
+        posições = np.array([self.posição_de.get(etiqueta, -1) for etiqueta in etiquetas])
+        comuns = posições >= 0
+
+        só_no_sistema = len(posições) - comuns.sum()
+        só_no_representativo = len(self.posição_de) - comuns.sum()
+        if (só_no_sistema + só_no_representativo) / len(posições) > self.discrepância_máxima:
+            return None
+
+        fator, posições_comuns = self.fator, posições[comuns]
+        inversa_da_diagonal = 1 / np.diag(K)[~comuns]
+
+        def aplicar(r: Vetor) -> Vetor:
+            r_no_representativo = np.zeros(len(self.posição_de))
+            r_no_representativo[posições_comuns] = r[comuns]
+
+            z = np.empty_like(r)
+            z[comuns] = fator.solve(r_no_representativo)[posições_comuns]
+            z[~comuns] = inversa_da_diagonal * r[~comuns]
+            return z
+
+        return aplicar
+
+    def __getstate__(self):
+        # A fatoração do SuperLU não é serializável: cada processo refaz a sua a partir da rigidez esparsa
+        estado = self.__dict__.copy()
+        estado["_fator"] = None
+        return estado
+
+
+def pré_condicionador_de_jacobi(K: Matriz) -> PréCondicionador:
+    """Retorna o pré-condicionador diagonal de K."""
+    inversa_da_diagonal = 1 / np.diag(K)
+
+    def aplicar(r: Vetor) -> Vetor:
+        return inversa_da_diagonal * r
+
+    return aplicar
+
+
+def gradientes_conjugados(K: Matriz,
+                          f: Vetor,
+                          pré_condicionador: Optional[PréCondicionador] = None,
+                          chute_inicial: Optional[Vetor] = None,
+                          tolerância: float = 1e-8,
+                          máximo_de_iterações: Optional[int] = None
+                          ) -> ResultadoIterativo:
+    """
+    Resolve K·u = f pelo método dos gradientes conjugados pré-condicionado até que ||f - K·u|| <= tolerância·||f||.
+
+    Os coeficientes α e β de cada iteração definem a tridiagonal de Lanczos do operador pré-condicionado, cujo menor
+    autovalor (valor de Ritz) aproxima por cima o menor autovalor desse operador. O erro é então estimado como
+    ||M⁻¹·r|| / θ_min, sendo M⁻¹·r o resíduo pré-condicionado e θ_min o menor valor de Ritz. Como θ_min não é menor
+    que o menor autovalor, a estimativa pode ficar abaixo do erro real, sobretudo com poucas iterações: é uma
+    estimativa, não uma cota garantida.
+    """
+    if pré_condicionador is None:
+        pré_condicionador = pré_condicionador_de_jacobi(K)
+    if máximo_de_iterações is None:
+        máximo_de_iterações = 10 * len(f)
+
+    u = np.zeros_like(f) if chute_inicial is None else np.array(chute_inicial, dtype=float)
+    norma_de_f = np.linalg.norm(f)
+    if norma_de_f == 0:
+        return ResultadoIterativo(np.zeros_like(f), 0, 0.0, 0.0)
+
+    r = f - K @ u
+    z = pré_condicionador(r)
+    p = z.copy()
+    rz = r @ z
+
+    alfas, betas = [], []
+    k = 0
+    while np.linalg.norm(r) > tolerância * norma_de_f and k < máximo_de_iterações:
+        Kp = K @ p
+        alfa = rz / (p @ Kp)
+
+        u += alfa * p
+        r -= alfa * Kp
+        z = pré_condicionador(r)
+
+        rz_novo = r @ z
+        beta = rz_novo / rz
+        rz = rz_novo
+        p = z + beta * p
+
+        alfas.append(alfa)
+        betas.append(beta)
+        k += 1
+
+    return ResultadoIterativo(u, k, np.linalg.norm(r) / norma_de_f,
+                              np.linalg.norm(pré_condicionador(r)) / _menor_valor_de_Ritz(alfas, betas))
+
+
+def _menor_valor_de_Ritz(alfas: list, betas: list) -> float:
+    """Menor autovalor da tridiagonal de Lanczos montada a partir dos coeficientes dos gradientes conjugados."""
+    if not alfas:
+        return np.inf
+
+    alfas, betas = np.array(alfas), np.array(betas)
+
+    diagonal = 1 / alfas
+    diagonal[1:] += betas[:-1] / alfas[:-1]
+    fora_da_diagonal = np.sqrt(betas[:-1]) / alfas[:-1]
+
+    T = np.diag(diagonal) + np.diag(fora_da_diagonal, 1) + np.diag(fora_da_diagonal, -1)
+
+    return np.linalg.eigvalsh(T)[0]
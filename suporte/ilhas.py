@@ -0,0 +1,238 @@
+"""
+Modelo de ilhas: várias populações evoluídas em paralelo, cada uma no seu processo, que trocam periodicamente seus
+melhores indivíduos.
+
+Cada ilha é um Ambiente completo, construído no seu processo e com os seus próprios geradores de números aleatórios,
+iniciados por sementes independentes derivadas da semente da execução. A cada intervalo de gerações, cada ilha envia
+cópias dos seus melhores indivíduos a uma ilha de destino, por uma fila local, e os recebidos de outra ilha substituem
+os seus piores. Na topologia em anel a ilha k envia à ilha k + 1; na aleatória, os destinos são sorteados a cada mi-
+gração, sem que uma ilha envie a si mesma, de modo igual em todos os processos.
+
+CLASSES
+-------
+ResultadoDasIlhas
+    Ambientes finais e convergência de uma execução em ilhas.
+
+FUNÇÕES
+-------
+evoluir_em_ilhas(construir, n_de_ilhas, gerações, migrantes, intervalo, topologia, semente) -> ResultadoDasIlhas
+    Evolui n_de_ilhas ambientes em processos paralelos, com migrações periódicas entre eles.
+comparar_com_população_única(construir, n_de_ilhas, gerações, migrantes, intervalo, topologia, semente) -> Dict
+    Mede a convergência e o tempo das ilhas e os de uma única população evoluída neste processo.
+destinos_da_migração(topologia, n_de_ilhas, semente, migração) -> List[int]
+    Ilha de destino dos migrantes de cada ilha numa migração.
+
+VARIÁVEIS
+---------
+topologias: Tuple[str, ...] -- Topologias de migração aceitas
+"""
+
+import copy
+import random
+import traceback
+import multiprocessing
+from timeit import default_timer
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from suporte.algoritmo_genético import Ambiente
+
+
+topologias = ("anel", "aleatória")
+
+# Constrói o ambiente de uma ilha a partir do seu índice. Deve ser uma função de nível de módulo, ou functools.partial
+# de uma, para que processos iniciados por spawn possam recebê-la
+Construtor = Callable[[int], Ambiente]
+
+
+class ResultadoDasIlhas(NamedTuple):
+    """Ambientes finais e convergência de uma execução em ilhas.
+
+    ATRIBUTOS
+    ---------
+    ambientes: List[Ambiente] -- Ambiente de cada ilha ao fim da execução
+    melhores : np.ndarray     -- Maior adaptação de cada ilha ao fim de cada geração, com uma linha por geração e uma
+                                 coluna por ilha
+    tempos   : np.ndarray     -- Segundos decorridos desde o início da execução ao fim de cada geração, no mesmo
+                                 formato de melhores
+    tempo    : float          -- Duração total da execução, em segundos, incluindo o início dos processos
+    """
+
+    ambientes: List[Ambiente]
+    melhores: np.ndarray
+    tempos: np.ndarray
+    tempo: float
+
+    @property
+    def convergência(self) -> np.ndarray:
+        """Maior adaptação dentre todas as ilhas ao fim de cada geração."""
+        return self.melhores.max(axis=1)
+
+
+def destinos_da_migração(topologia: str, n_de_ilhas: int, semente: int, migração: int) -> List[int]:
+    """Retorna a ilha de destino dos migrantes de cada ilha numa migração. Todos os processos obtêm os mesmos destinos
+    para a mesma semente e o mesmo número de migração."""
+    if topologia not in topologias:
+        raise ValueError(f"Topologia desconhecida: {topologia}. Escolha dentre {list(topologias)}.")
+
+    if topologia == "anel" or n_de_ilhas < 3:
+        return [(k + 1) % n_de_ilhas for k in range(n_de_ilhas)]
+
+    # Sorteia permutações até que nenhuma ilha seja destino de si mesma
+    gerador = np.random.default_rng([semente, migração])
+    while True:
+        destinos = gerador.permutation(n_de_ilhas)
+        if not (destinos == np.arange(n_de_ilhas)).any():
+            return [int(destino) for destino in destinos]
+
+
+def _sementes_das_ilhas(semente: int, n_de_ilhas: int) -> List[int]:
+    return [int(sequência.generate_state(1)[0]) for sequência in np.random.SeedSequence(semente).spawn(n_de_ilhas)]
+
+
+def _semear(semente: int) -> None:
+    random.seed(semente)
+    np.random.seed(semente)
+
+
+def _migrar(ambiente: Ambiente, k: int, migrantes: int, destinos: List[int], caixas: List[Any]) -> None:
+    """Envia cópias dos melhores indivíduos da ilha k ao seu destino e põe os recebidos no lugar dos seus piores."""
+    # A fila serializa os migrantes depois, noutra linha de execução: as cópias os protegem das próximas mutações
+    caixas[destinos[k]].put(copy.deepcopy(ambiente.avaliar_população()[:migrantes]))
+
+    recebidos = caixas[k].get()
+    piores = sorted(range(len(ambiente.população)), key=lambda i: ambiente.população[i])[:len(recebidos)]
+    for i, migrante in zip(piores, recebidos):
+        ambiente.população[i] = migrante
+
+
+def _evoluir_ilha(k: int, construir: Construtor, semente_da_ilha: int, gerações: int, migrantes: int,
+                  intervalo: int, topologia: str, semente: int, caixas: List[Any], resultados: Any) -> None:
+    try:
+        _semear(semente_da_ilha)
+        ambiente = construir(k)
+        início = default_timer()
+
+        for geração in range(1, gerações + 1):
+            ambiente.próxima_geração()
+
+            if intervalo and geração % intervalo == 0 and len(caixas) > 1:
+                destinos = destinos_da_migração(topologia, len(caixas), semente, geração // intervalo)
+                _migrar(ambiente, k, migrantes, destinos, caixas)
+
+            melhor = ambiente.avaliar_população()[0].adaptação
+            resultados.put(("geração", k, geração, melhor, default_timer() - início))
+
+        if hasattr(ambiente, "finalizar"):
+            ambiente.finalizar()
+        resultados.put(("fim", k, ambiente))
+
+    except Exception:
+        resultados.put(("erro", k, traceback.format_exc()))
+
+
+def evoluir_em_ilhas(construir: Construtor,
+                     n_de_ilhas: int,
+                     gerações: int,
+                     migrantes: int = 2,
+                     intervalo: int = 10,
+                     topologia: str = "anel",
+                     semente: int = 0) -> ResultadoDasIlhas:
+    """
+    Evolui n_de_ilhas ambientes em processos paralelos, por um número fixo de gerações, com migrações periódicas.
+
+    A cada intervalo de gerações, cada ilha envia cópias dos seus migrantes melhores indivíduos à ilha de destino da
+    topologia e substitui os seus piores pelos recebidos. Com intervalo 0 as ilhas evoluem isoladas. Se alguma ilha
+    falhar, as demais são encerradas e a falha é relatada num RuntimeError.
+    """
+    if topologia not in topologias:
+        raise ValueError(f"Topologia desconhecida: {topologia}. Escolha dentre {list(topologias)}.")
+
+    caixas = [multiprocessing.Queue() for _ in range(n_de_ilhas)]
+    resultados = multiprocessing.Queue()
+
+    # As ilhas não são daemônicas, pois seus ambientes podem iniciar os próprios processos trabalhadores
+    processos = [multiprocessing.Process(target=_evoluir_ilha,
+                                         args=(k, construir, semente_da_ilha, gerações, migrantes, intervalo,
+                                               topologia, semente, caixas, resultados))
+                 for k, semente_da_ilha in enumerate(_sementes_das_ilhas(semente, n_de_ilhas))]
+
+    início = default_timer()
+    for processo in processos:
+        processo.start()
+
+    ambientes: List[Ambiente] = [None] * n_de_ilhas
+    melhores = np.full((gerações, n_de_ilhas), np.nan)
+    tempos = np.full((gerações, n_de_ilhas), np.nan)
+    falha = None
+
+    try:
+        # Os ambientes são recebidos antes de aguardar o fim dos processos, que não terminam com a fila por esvaziar
+        restantes = n_de_ilhas
+        while restantes:
+            tipo, k, *conteúdo = resultados.get()
+            if tipo == "geração":
+                geração, melhor, tempo = conteúdo
+                melhores[geração - 1, k], tempos[geração - 1, k] = melhor, tempo
+            elif tipo == "fim":
+                ambientes[k] = conteúdo[0]
+                restantes -= 1
+            else:
+                falha = f"A ilha {k} falhou:\n{conteúdo[0]}"
+                break
+    finally:
+        for processo in processos:
+            if falha is not None:
+                processo.terminate()
+            processo.join()
+
+    if falha is not None:
+        raise RuntimeError(falha)
+
+    return ResultadoDasIlhas(ambientes, melhores, tempos, default_timer() - início)
+
+
+def comparar_com_população_única(construir: Construtor,
+                                 n_de_ilhas: int,
+                                 gerações: int,
+                                 migrantes: int = 2,
+                                 intervalo: int = 10,
+                                 topologia: str = "anel",
+                                 semente: int = 0) -> Dict[str, Any]:
+    """
+    Mede a convergência e o tempo de uma execução em ilhas e os de uma única população, a da primeira ilha, evoluída
+    neste processo pelo mesmo número de gerações e com a mesma semente.
+
+    Retorna as convergências por geração, os tempos totais e duas acelerações: a razão entre os tempos totais, que com-
+    para gerações de n_de_ilhas populações com gerações de uma, e a razão entre os tempos até que cada execução alcance
+    a maior adaptação obtida pela população única, que compara o tempo para chegar a uma mesma qualidade.
+    """
+    _semear(_sementes_das_ilhas(semente, n_de_ilhas)[0])
+    ambiente = construir(0)
+    início = default_timer()
+    convergência_única, tempos_únicos = np.empty(gerações), np.empty(gerações)
+    for geração in range(gerações):
+        ambiente.próxima_geração()
+        convergência_única[geração] = ambiente.avaliar_população()[0].adaptação
+        tempos_únicos[geração] = default_timer() - início
+    if hasattr(ambiente, "finalizar"):
+        ambiente.finalizar()
+    tempo_único = default_timer() - início
+
+    ilhas = evoluir_em_ilhas(construir, n_de_ilhas, gerações, migrantes, intervalo, topologia, semente)
+
+    # Uma geração das ilhas só termina quando a mais lenta delas a termina
+    alvo = convergência_única.max()
+    tempos_das_ilhas = ilhas.tempos.max(axis=1)
+    tempo_único_até_o_alvo = tempos_únicos[np.argmax(convergência_única >= alvo)]
+    tempo_das_ilhas_até_o_alvo = (tempos_das_ilhas[np.argmax(ilhas.convergência >= alvo)]
+                                  if (ilhas.convergência >= alvo).any() else np.inf)
+
+    return {"convergência_da_população_única": convergência_única,
+            "convergência_das_ilhas": ilhas.convergência,
+            "tempo_da_população_única": tempo_único,
+            "tempo_das_ilhas": ilhas.tempo,
+            "aceleração": tempo_único / ilhas.tempo,
+            "aceleração_até_a_mesma_adaptação": tempo_único_até_o_alvo / tempo_das_ilhas_até_o_alvo,
+            "ilhas": ilhas}
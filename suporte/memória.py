@@ -0,0 +1,167 @@
+"""
+Orçamento único de memória para os caches e históricos de uma execução.
+
+Cada estrutura que pode crescer ao longo da execução se registra no orçamento como um componente. Quando a soma dos
+bytes ocupados excede o limite, o orçamento pede aos componentes que liberem memória, começando pelos de menor valor
+por byte, isto é, aqueles cuja perda custa menos a recompor.
+
+Um componente é qualquer objeto com:
+    bytes_ocupados: int                      -- Estimativa dos bytes que ocupa, como atributo ou propriedade
+    liberar(bytes_a_liberar: int) -> int     -- Libera ao menos a quantia pedida, se puder, e retorna a liberada
+    valor_por_byte() -> float                -- Benefício estimado de manter cada byte: acertos vezes o custo de repor
+                                                cada um, por byte ocupado
+
+CLASSES
+-------
+OrçamentoDeMemória
+    Limite de memória compartilhado pelos componentes registrados e coordenador das suas liberações.
+Componente
+    Adapta funções avulsas à interface de componente.
+
+FUNÇÕES
+-------
+interpretar_tamanho(tamanho) -> int
+    Converte tamanhos como "8GB" ou "512 MiB" em bytes.
+
+VARIÁVEIS
+---------
+orçamento_de_memória: OrçamentoDeMemória -- Orçamento da execução, sem limite até ser configurado
+"""
+
+import re
+import weakref
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+_unidades = {"": 1, "B": 1,
+             "KB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9, "TB": 10 ** 12,
+             "KIB": 2 ** 10, "MIB": 2 ** 20, "GIB": 2 ** 30, "TIB": 2 ** 40}
+
+
+def interpretar_tamanho(tamanho: Union[str, int, float, None]) -> Optional[int]:
+    """Converte tamanhos como "8GB" ou "512 MiB" em bytes. Números são tomados como bytes e None, como sem limite."""
+    if tamanho is None or isinstance(tamanho, (int, float)):
+        return None if tamanho is None else int(tamanho)
+
+    correspondência = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([A-Za-z]*)\s*", tamanho)
+    if correspondência is None or correspondência.group(2).upper() not in _unidades:
+        raise ValueError(f"Tamanho de memória inválido: {tamanho}. Use, por exemplo, '8GB' ou '512MiB'.")
+
+    número, unidade = correspondência.groups()
+    return int(float(número) * _unidades[unidade.upper()])
+
+
+class Componente:
+    """
+    Adapta funções avulsas à interface de componente, para estruturas que não a implementam por si.
+
+    Sem função de liberação, o componente é apenas contabilizado.
+    """
+
+    def __init__(self,
+                 bytes_ocupados: Callable[[], int],
+                 liberar: Optional[Callable[[int], int]] = None,
+                 valor_por_byte: Union[float, Callable[[], float]] = 0.0):
+        self._bytes_ocupados = bytes_ocupados
+        self._liberar = liberar
+        self._valor_por_byte = valor_por_byte
+
+    @property
+    def bytes_ocupados(self) -> int:
+        return self._bytes_ocupados()
+
+    def liberar(self, bytes_a_liberar: int) -> int:
+        return 0 if self._liberar is None else self._liberar(bytes_a_liberar)
+
+    def valor_por_byte(self) -> float:
+        return self._valor_por_byte() if callable(self._valor_por_byte) else self._valor_por_byte
+
+
+class OrçamentoDeMemória:
+    """
+    Limite de memória compartilhado pelos componentes registrados e coordenador das suas liberações.
+
+    Os componentes são guardados por referências fracas: os de ambientes e problemas descartados saem do orçamento
+    sozinhos. Componentes de mesmo nome, como os caches de vários ambientes, são somados no relatório.
+
+    ATRIBUTOS
+    ---------
+    limite: Optional[int] -- Maior soma dos bytes ocupados pelos componentes; ilimitada se None
+
+    MÉTODOS
+    -------
+    configurar(limite: Union[str, int, None]) -> None
+        Define o limite, em bytes ou como "8GB", ou o remove se None.
+    registrar(nome: str, componente: Any) -> None
+        Inclui o componente no orçamento sob o nome fornecido, se ainda não estiver nele.
+    uso() -> Dict[str, int]
+        Bytes ocupados por componente, somados por nome.
+    reequilibrar() -> int
+        Libera memória dos componentes de menor valor por byte até que o uso respeite o limite, e retorna os bytes li-
+        berados.
+    relatório() -> str
+        Descreve em uma linha o uso de cada componente e o total em relação ao limite.
+    """
+
+    def __init__(self, limite: Union[str, int, None] = None):
+        self.limite: Optional[int] = interpretar_tamanho(limite)
+        self._componentes: List[Tuple[str, weakref.ReferenceType]] = []
+
+    def configurar(self, limite: Union[str, int, None]) -> None:
+        """Define o limite, em bytes ou como "8GB", ou o remove se None."""
+        self.limite = interpretar_tamanho(limite)
+
+    def registrar(self, nome: str, componente: Any) -> None:
+        """Inclui o componente no orçamento sob o nome fornecido. Um componente já registrado não é contado de novo."""
+        if any(componente is registrado for _, registrado in self._vivos()):
+            return
+        self._componentes.append((nome, weakref.ref(componente)))
+
+    def _vivos(self) -> List[Tuple[str, Any]]:
+        vivos = [(nome, referência()) for nome, referência in self._componentes]
+        self._componentes = [(nome, weakref.ref(componente)) for nome, componente in vivos if componente is not None]
+        return [(nome, componente) for nome, componente in vivos if componente is not None]
+
+    def uso(self) -> Dict[str, int]:
+        """Bytes ocupados por componente, somados por nome."""
+        uso = defaultdict(int)
+        for nome, componente in self._vivos():
+            uso[nome] += componente.bytes_ocupados
+        return dict(uso)
+
+    def reequilibrar(self) -> int:
+        """Libera memória dos componentes de menor valor por byte até que o uso respeite o limite, e retorna os bytes
+        liberados."""
+        if self.limite is None:
+            return 0
+
+        componentes = [componente for _, componente in self._vivos()]
+        excesso = sum(componente.bytes_ocupados for componente in componentes) - self.limite
+
+        liberados = 0
+        for componente in sorted(componentes, key=lambda c: c.valor_por_byte()):
+            if excesso <= 0:
+                break
+            liberado = componente.liberar(excesso)
+            excesso -= liberado
+            liberados += liberado
+
+        return liberados
+
+    def relatório(self) -> str:
+        """Descreve em uma linha o uso de cada componente e o total em relação ao limite."""
+        uso = self.uso()
+        limite = "sem limite" if self.limite is None else f"de {_formatar(self.limite)}"
+        partes = ", ".join(f"{nome}: {_formatar(bytes_)}" for nome, bytes_ in sorted(uso.items()))
+        return f"{_formatar(sum(uso.values()))} {limite} ({partes})"
+
+
+def _formatar(bytes_: int) -> str:
+    for unidade, fator in (("GB", 10 ** 9), ("MB", 10 ** 6), ("kB", 10 ** 3)):
+        if bytes_ >= fator:
+            return f"{bytes_ / fator:.1f} {unidade}"
+    return f"{bytes_} B"
+
+
+orçamento_de_memória = OrçamentoDeMemória()
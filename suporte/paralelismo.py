@@ -0,0 +1,512 @@
+"""
+Avaliação de genes num conjunto persistente de processos trabalhadores.
+
+Os trabalhadores são iniciados uma única vez por execução e recebem, nesse momento, o contexto de que a avaliação
+depende, em geral o problema. A cada tarefa recebem apenas genes compactados e devolvem apenas o resultado da avaliação,
+sem que o ambiente, a população ou os caches atravessem os processos. Quando os resultados são vetores de tamanho fixo,
+genes e resultados trafegam por blocos de memória compartilhada, e as tarefas levam só as faixas de índices a avaliar.
+Os trabalhadores medem a duração de cada avaliação, e tarefas que demorem demais em relação às demais podem ser aban-
+donadas, com um resultado de penalização no lugar do seu. Com custos previstos, os genes mais caros são enviados
+primeiro, em lotes de custo equilibrado.
+
+CLASSES
+-------
+FilaDeAvaliação
+    Conjunto persistente de processos que avaliam genes com uma função e um contexto fixos.
+ModeloDeCusto
+    Previsão da duração de uma avaliação por uma lei de potência, recalibrada pelas durações medidas.
+
+FUNÇÕES
+-------
+empacotar_gene(gene) -> Tuple[Any, Optional[Tuple[int, ...]]]
+    Compacta um gene binário a um bit por posição.
+desempacotar_gene(pacote) -> Any
+    Reconstrói o gene compactado por empacotar_gene.
+resumir_latências(durações, esgotadas) -> Dict[str, float]
+    Resume as durações das avaliações de uma chamada pela mediana e pela cauda.
+"""
+
+import math
+import time
+import queue
+import pickle
+import collections
+import multiprocessing
+import multiprocessing.pool
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+Pacote = Tuple[Any, Optional[Tuple[int, ...]]]
+
+
+def empacotar_gene(gene: Any) -> Pacote:
+    """Compacta um gene binário a um bit por posição. Genes de outros tipos são enviados como estão."""
+    if isinstance(gene, np.ndarray) and gene.dtype == bool:
+        return np.packbits(gene), gene.shape
+    return gene, None
+
+
+def desempacotar_gene(pacote: Pacote) -> Any:
+    """Reconstrói o gene compactado por empacotar_gene."""
+    bits, formato = pacote
+    if formato is None:
+        return bits
+    return np.unpackbits(bits, count=math.prod(formato)).reshape(formato).astype(bool)
+
+
+# Estado de cada trabalhador, definido uma vez na sua iniciação
+_trabalhador: Dict[str, Any] = {}
+
+
+def _iniciar_trabalhador(avaliar: Callable[[Any, Any], Any], contexto_serializado: bytes,
+                         iniciadas: Optional[multiprocessing.Queue] = None) -> None:
+    _trabalhador["avaliar"] = avaliar
+    _trabalhador["contexto"] = pickle.loads(contexto_serializado)
+    _trabalhador["iniciadas"] = iniciadas
+
+
+def _anunciar_início(índice: int) -> None:
+    """Informa à fila, quando há prazo, o instante em que a tarefa de índice fornecido começou a ser executada."""
+    if _trabalhador["iniciadas"] is not None:
+        _trabalhador["iniciadas"].put((índice, time.time()))
+
+
+def _avaliar_pacote(tarefa: Tuple[int, Pacote]) -> Tuple[Any, float]:
+    """Avalia o gene compactado e retorna o resultado e a duração da avaliação, em segundos."""
+    índice, pacote = tarefa
+    _anunciar_início(índice)
+    início = time.perf_counter()
+    resultado = _trabalhador["avaliar"](_trabalhador["contexto"], desempacotar_gene(pacote))
+    return resultado, time.perf_counter() - início
+
+
+def _bloco(nome: str, em_uso: Tuple[str, ...]) -> shared_memory.SharedMemory:
+    """Retorna o bloco de memória compartilhada de nome fornecido, abrindo-o na primeira vez. Blocos abertos que não
+    estão mais em uso, substituídos por outros maiores, são fechados."""
+    blocos = _trabalhador.setdefault("blocos", {})
+    if nome not in blocos:
+        for antigo in [antigo for antigo in blocos if antigo not in em_uso]:
+            blocos.pop(antigo).close()
+        blocos[nome] = shared_memory.SharedMemory(name=nome)
+    return blocos[nome]
+
+
+def _avaliar_faixa(tarefa: Tuple[str, str, Tuple[int, ...], int, int, int]) -> List[float]:
+    """Avalia os genes de índices entre início e fim, lidos do bloco de genes, escreve os resultados nas mesmas
+    linhas do bloco de resultados e retorna a duração de cada avaliação, em segundos."""
+    nome_dos_genes, nome_dos_resultados, formato, valores_por_resultado, início, fim = tarefa
+    _anunciar_início(início)
+    em_uso = (nome_dos_genes, nome_dos_resultados)
+    bytes_por_gene = math.ceil(math.prod(formato) / 8)
+
+    genes = np.ndarray((fim, bytes_por_gene), dtype=np.uint8, buffer=_bloco(nome_dos_genes, em_uso).buf)
+    resultados = np.ndarray((fim, valores_por_resultado), dtype=float, buffer=_bloco(nome_dos_resultados, em_uso).buf)
+    durações = []
+    for i in range(início, fim):
+        começo = time.perf_counter()
+        resultados[i] = _trabalhador["avaliar"](_trabalhador["contexto"], desempacotar_gene((genes[i], formato)))
+        durações.append(time.perf_counter() - começo)
+    return durações
+
+
+class FilaDeAvaliação:
+    """
+    Conjunto persistente de processos que avaliam genes com uma função e um contexto fixos.
+
+    O contexto é serializado uma única vez, na iniciação dos trabalhadores, que o mantêm entre as chamadas: caches que
+    ele carregue continuam a crescer em cada trabalhador ao longo da execução. Se o contexto mudar de modo que afete as
+    avaliações, atualizar o substitui, reiniciando os trabalhadores na próxima avaliação.
+
+    Os genes de cada chamada são divididos em lotes, em média tarefas_por_processo por trabalhador, o que equilibra a
+    carga entre eles sem pagar o envio de cada gene isoladamente. Se os custos previstos dos genes forem fornecidos,
+    eles são enviados do mais caro ao mais barato, e cada lote reúne genes consecutivos até a sua fração do custo
+    total: os caros seguem sozinhos e no início, os baratos, agrupados, preenchem o fim da chamada nos trabalhadores
+    que ficarem livres. Os resultados retornam na ordem original dos genes.
+
+    Com valores_por_resultado definido, a função de avaliação deve retornar esse número de valores reais, e genes bi-
+    nários de mesmo formato são avaliados por memória compartilhada: a fila os compacta num bloco de linhas de bits, os
+    trabalhadores recebem apenas faixas de índices e escrevem os resultados num bloco pré-alocado, devolvido como um
+    array de uma linha por gene. Os blocos são reaproveitados entre as chamadas enquanto comportarem a população. Ge-
+    nes de outros tipos ou formatos seguem serializados, com os resultados retornados numa lista.
+
+    Com fator_de_espera definido, cada gene é uma tarefa, e a que passar de fator_de_espera vezes a mediana das
+    durações recentes, ou de espera_mínima segundos, se for maior, é abandonada: seu resultado é resultado_esgotado e,
+    ao fim da chamada, os trabalhadores são reiniciados, pois o que a executava pode estar preso. O prazo só vale de-
+    pois que alguma avaliação terminou, nesta chamada ou numa anterior. As durações de cada chamada, com ou sem prazo,
+    são resumidas em latências.
+
+    A fila não é serializada: cópias do objeto que a possui recomeçam sem trabalhadores.
+
+    ATRIBUTOS
+    ---------
+    avaliar              : Callable[[Any, Any], Any] -- Função de nível de módulo que recebe o contexto e um gene e
+                                                        retorna o resultado da avaliação
+    contexto             : Any                       -- Objeto de que as avaliações dependem
+    processos            : int                       -- Número de trabalhadores; o de núcleos do processador, se não
+                                                        for fornecido
+    tarefas_por_processo : int                       -- Quantos lotes, em média, cada trabalhador recebe por chamada
+    valores_por_resultado: Optional[int]             -- Tamanho do vetor retornado pela avaliação, que habilita a memó-
+                                                        ria compartilhada; se None, os resultados são serializados
+    fator_de_espera      : Optional[float]           -- Múltiplo da mediana das durações além do qual uma tarefa é
+                                                        abandonada; se None, as tarefas não têm prazo
+    espera_mínima        : float                     -- Menor prazo, em segundos, dado a uma tarefa
+    resultado_esgotado   : Any                       -- Resultado atribuído aos genes de tarefas abandonadas
+    latências            : List[Dict[str, float]]    -- Resumo das durações de cada chamada de avaliar_genes, por
+                                                        resumir_latências
+    esgotados            : List[int]                 -- Índices dos genes abandonados na última chamada
+    durações             : np.ndarray                -- Duração da avaliação de cada gene na última chamada, em segun-
+                                                        dos, NaN para os abandonados
+
+    MÉTODOS
+    -------
+    avaliar_genes(genes: Sequence[Any], custos: Optional[Sequence[float]] = None) -> Union[List[Any], np.ndarray]
+        Avalia os genes nos trabalhadores, iniciando-os se preciso, e retorna os resultados na ordem dos genes.
+    submeter(gene: Any, ao_concluir: Callable[[Any], None], ao_falhar: Callable[[BaseException], None]) -> None
+        Envia um único gene a um trabalhador livre, sem aguardar o resultado, que é passado a ao_concluir.
+    prazo() -> Optional[float]
+        Retorna o prazo corrente das tarefas, em segundos, ou None se não houver.
+    atualizar(contexto: Any) -> None
+        Substitui o contexto, reiniciando os trabalhadores na próxima avaliação.
+    fechar() -> None
+        Encerra os trabalhadores e libera os blocos de memória compartilhada.
+    """
+
+    # Quantas das últimas durações compõem a mediana que define o prazo das tarefas
+    durações_de_referência = 500
+
+    def __init__(self,
+                 avaliar: Callable[[Any, Any], Any],
+                 contexto: Any,
+                 processos: Optional[int] = None,
+                 tarefas_por_processo: int = 4,
+                 valores_por_resultado: Optional[int] = None,
+                 fator_de_espera: Optional[float] = None,
+                 espera_mínima: float = 1.0,
+                 resultado_esgotado: Any = None):
+        self.avaliar = avaliar
+        self.contexto = contexto
+        self.processos = processos if processos is not None else multiprocessing.cpu_count()
+        self.tarefas_por_processo = tarefas_por_processo
+        self.valores_por_resultado = valores_por_resultado
+        self.fator_de_espera = fator_de_espera
+        self.espera_mínima = espera_mínima
+        self.resultado_esgotado = resultado_esgotado
+        self.latências: List[Dict[str, float]] = []
+        self.esgotados: List[int] = []
+        self.durações = np.empty(0)
+        self._durações_recentes: Deque[float] = collections.deque(maxlen=self.durações_de_referência)
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+        self._iniciadas: Optional[multiprocessing.Queue] = None
+        self._bloco_dos_genes: Optional[shared_memory.SharedMemory] = None
+        self._bloco_dos_resultados: Optional[shared_memory.SharedMemory] = None
+
+    def avaliar_genes(self, genes: Sequence[Any], custos: Optional[Sequence[float]] = None
+                      ) -> Union[List[Any], np.ndarray]:
+        """Avalia os genes nos trabalhadores, iniciando-os se preciso, e retorna os resultados na ordem dos genes. Com
+        custos, os genes são enviados do de maior ao de menor custo previsto, em lotes de custo equilibrado."""
+        self.esgotados, self.durações = [], np.empty(0)
+        if not len(genes):
+            return []
+
+        self._iniciar_trabalhadores()
+        n_de_genes = len(genes)
+        if custos is None:
+            ordem = np.arange(n_de_genes)
+        else:
+            custos = np.asarray(custos, dtype=float)
+            ordem = np.argsort(-custos, kind="stable")
+        genes_em_ordem = [genes[i] for i in ordem]
+
+        if self.fator_de_espera is not None:
+            faixas = _faixas_uniformes(n_de_genes, 1)
+        elif custos is not None:
+            faixas = _faixas_por_custo(custos[ordem], self.processos * self.tarefas_por_processo)
+        else:
+            faixas = _faixas_uniformes(n_de_genes,
+                                       math.ceil(n_de_genes / (self.processos * self.tarefas_por_processo)))
+
+        if self.valores_por_resultado is not None and _binários_de_mesmo_formato(genes):
+            em_ordem, durações, esgotados = self._avaliar_em_memória_compartilhada(genes_em_ordem, faixas)
+            resultados = np.empty_like(em_ordem)
+            resultados[ordem] = em_ordem
+        else:
+            # Serializados, os genes seguem em lotes de tamanho fixo, de um gene se houver custos ou prazo
+            saídas = self._executar(_avaliar_pacote,
+                                    [(i, empacotar_gene(gene)) for i, gene in enumerate(genes_em_ordem)],
+                                    faixas[0][1] if custos is None else 1)
+            resultados = [None] * n_de_genes
+            for i, saída in zip(ordem, saídas):
+                resultados[i] = saída[0] if saída is not None else self.resultado_esgotado
+            durações = np.array([saída[1] if saída is not None else math.nan for saída in saídas])
+            esgotados = [i for i, saída in enumerate(saídas) if saída is None]
+
+        self.esgotados = sorted(int(ordem[i]) for i in esgotados)
+        self.durações = np.empty(n_de_genes)
+        self.durações[ordem] = durações
+        self.latências.append(resumir_latências(durações[~np.isnan(durações)], len(esgotados)))
+        return resultados
+
+    def submeter(self, gene: Any, ao_concluir: Callable[[Any], None], ao_falhar: Callable[[BaseException], None]
+                 ) -> None:
+        """Envia um único gene a um trabalhador livre, sem aguardar o resultado. ao_concluir recebe o resultado, e
+        ao_falhar, a exceção da avaliação; ambas são chamadas numa linha de execução auxiliar deste processo. Tarefas
+        submetidas não têm prazo."""
+        self._iniciar_trabalhadores()
+        self._pool.apply_async(_avaliar_pacote, ((0, empacotar_gene(gene)),),
+                               callback=lambda saída: ao_concluir(saída[0]), error_callback=ao_falhar)
+
+    def prazo(self) -> Optional[float]:
+        """Retorna o prazo corrente das tarefas, em segundos, ou None se não houver."""
+        if self.fator_de_espera is None or not self._durações_recentes:
+            return None
+        return max(self.fator_de_espera * float(np.median(self._durações_recentes)), self.espera_mínima)
+
+    def _iniciar_trabalhadores(self) -> None:
+        if self._pool is None:
+            # Os trabalhadores herdam o rastreador de recursos deste processo, que só remove os blocos compartilhados
+            # quando eles são liberados aqui, e não a cada trabalhador encerrado
+            resource_tracker.ensure_running()
+            self._iniciadas = multiprocessing.Queue() if self.fator_de_espera is not None else None
+            self._pool = multiprocessing.Pool(self.processos,
+                                              initializer=_iniciar_trabalhador,
+                                              initargs=(self.avaliar, pickle.dumps(self.contexto), self._iniciadas))
+
+    def _executar(self, função: Callable[[Any], Any], tarefas: List[Any], tamanho_do_lote: int) -> List[Any]:
+        """Executa as tarefas nos trabalhadores e retorna suas saídas na ordem das tarefas, com None no lugar das aban-
+        donadas. Se alguma for abandonada, os trabalhadores são descartados antes do retorno."""
+        if self.fator_de_espera is None:
+            saídas = self._pool.map(função, tarefas, tamanho_do_lote)
+            for saída in saídas:
+                self._durações_recentes.extend(_durações_da_saída(saída))
+            return saídas
+
+        assíncronas = [self._pool.apply_async(função, (tarefa,)) for tarefa in tarefas]
+        saídas: List[Any] = [None] * len(tarefas)
+        inícios: Dict[int, float] = {}
+        pendentes = set(range(len(tarefas)))
+        abandonadas = False
+
+        while pendentes:
+            assíncronas[min(pendentes)].wait(0.05)
+
+            # As tarefas são identificadas pelo índice do seu primeiro gene, que aqui é o da própria tarefa
+            while True:
+                try:
+                    índice, instante = self._iniciadas.get_nowait()
+                except queue.Empty:
+                    break
+                inícios[índice] = instante
+
+            for i in [i for i in pendentes if assíncronas[i].ready()]:
+                saídas[i] = assíncronas[i].get()
+                self._durações_recentes.extend(_durações_da_saída(saídas[i]))
+                pendentes.discard(i)
+
+            prazo, agora = self.prazo(), time.time()
+            if prazo is not None:
+                for i in [i for i in pendentes if i in inícios and agora - inícios[i] > prazo]:
+                    pendentes.discard(i)
+                    abandonadas = True
+
+        if abandonadas:
+            self._descartar_trabalhadores()
+        return saídas
+
+    def _avaliar_em_memória_compartilhada(self, genes: Sequence[np.ndarray], faixas: List[Tuple[int, int]]
+                                          ) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+        """Avalia os genes em faixas de índices pelos blocos compartilhados e retorna os resultados, a duração de cada
+        avaliação, NaN nas abandonadas, e os índices dos genes abandonados."""
+        n_de_genes, formato = len(genes), genes[0].shape
+        empacotados = np.packbits(np.reshape(genes, (n_de_genes, -1)), axis=1)
+
+        self._bloco_dos_genes = _bloco_com_ao_menos(self._bloco_dos_genes, empacotados.nbytes)
+        self._bloco_dos_resultados = _bloco_com_ao_menos(self._bloco_dos_resultados,
+                                                         n_de_genes * self.valores_por_resultado * 8)
+
+        np.ndarray(empacotados.shape, dtype=np.uint8, buffer=self._bloco_dos_genes.buf)[:] = empacotados
+        saídas = self._executar(_avaliar_faixa,
+                                [(self._bloco_dos_genes.name, self._bloco_dos_resultados.name, formato,
+                                  self.valores_por_resultado, início, fim)
+                                 for início, fim in faixas],
+                                1)
+
+        # Os trabalhadores já foram descartados se alguma faixa foi abandonada: nenhum escreve mais no bloco
+        resultados = np.ndarray((n_de_genes, self.valores_por_resultado), dtype=float,
+                                buffer=self._bloco_dos_resultados.buf).copy()
+        durações = np.full(n_de_genes, math.nan)
+        esgotados = []
+        for (início, fim), saída in zip(faixas, saídas):
+            if saída is None:
+                esgotados.extend(range(início, fim))
+            else:
+                durações[início:fim] = saída
+        if esgotados:
+            resultados[esgotados] = self.resultado_esgotado
+        return resultados, durações, esgotados
+
+    def atualizar(self, contexto: Any) -> None:
+        """Substitui o contexto, reiniciando os trabalhadores na próxima avaliação."""
+        self._encerrar_trabalhadores()
+        self.contexto = contexto
+
+    def fechar(self) -> None:
+        """Encerra os trabalhadores e libera os blocos de memória compartilhada."""
+        self._encerrar_trabalhadores()
+        for bloco in (self._bloco_dos_genes, self._bloco_dos_resultados):
+            if bloco is not None:
+                bloco.close()
+                bloco.unlink()
+        self._bloco_dos_genes = self._bloco_dos_resultados = None
+
+    def _encerrar_trabalhadores(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = self._iniciadas = None
+
+    def _descartar_trabalhadores(self) -> None:
+        """Interrompe os trabalhadores sem aguardar as tarefas em curso, como as abandonadas."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = self._iniciadas = None
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["_pool"] = estado["_iniciadas"] = estado["_bloco_dos_genes"] = estado["_bloco_dos_resultados"] = None
+        return estado
+
+    def __enter__(self) -> 'FilaDeAvaliação':
+        return self
+
+    def __exit__(self, *exceção) -> None:
+        self.fechar()
+
+
+class ModeloDeCusto:
+    """
+    Previsão da duração de uma avaliação por uma lei de potência de uma estatística barata do gene, como o número de
+    graus de liberdade da sua malha: duração = coeficiente * estatística ** expoente.
+
+    Os parâmetros iniciais tomam a avaliação pela fatoração de uma matriz densa, de expoente 3, a cerca de um nanos-
+    segundo por operação. A cada calibração, as durações medidas se somam às recentes e o modelo é reajustado por
+    mínimos quadrados nos logaritmos; a comparação retornada usa as previsões anteriores ao reajuste, feitas antes das
+    avaliações.
+
+    Numa faixa estreita de estatísticas, o ruído das durações domina a inclinação do ajuste, que pode chegar a expo-
+    entes implausíveis e inflar as razões entre os custos previstos. O expoente só é reajustado quando as estatísti-
+    cas medidas variam ao menos pelo fator amplitude_mínima e seus logaritmos se correlacionam com os das durações ao
+    menos por correlação_mínima, e fica sempre entre expoente_mínimo e expoente_máximo. Fora disso, só o coeficiente
+    é reajustado, com o expoente vigente.
+
+    ATRIBUTOS
+    ---------
+    expoente   : float -- Expoente da estatística na duração prevista
+    coeficiente: float -- Duração prevista, em segundos, para a estatística unitária
+
+    MÉTODOS
+    -------
+    prever(estatísticas: Sequence[float]) -> np.ndarray
+        Retorna a duração prevista, em segundos, para cada estatística.
+    calibrar(estatísticas: Sequence[float], durações: Sequence[float]) -> Dict[str, float]
+        Compara as durações medidas com as previstas e reajusta o modelo com elas.
+    """
+
+    # Quantas das últimas medições compõem o ajuste do modelo
+    medições_de_referência = 500
+
+    # Condições para reajustar o expoente e limites plausíveis para ele: a resolução de um sistema esparso cresce ao
+    # menos linearmente com os graus de liberdade e não mais que a fatoração de uma matriz densa
+    amplitude_mínima = 2.0
+    correlação_mínima = 0.5
+    expoente_mínimo, expoente_máximo = 1.0, 3.0
+
+    def __init__(self, expoente: float = 3.0, coeficiente: float = 1e-9):
+        self.expoente = expoente
+        self.coeficiente = coeficiente
+        self._medições: Deque[Tuple[float, float]] = collections.deque(maxlen=self.medições_de_referência)
+
+    def prever(self, estatísticas: Sequence[float]) -> np.ndarray:
+        """Retorna a duração prevista, em segundos, para cada estatística."""
+        return self.coeficiente * np.asarray(estatísticas, dtype=float) ** self.expoente
+
+    def calibrar(self, estatísticas: Sequence[float], durações: Sequence[float]) -> Dict[str, float]:
+        """
+        Compara as durações medidas com as previstas e reajusta o modelo com elas. Durações NaN, de avaliações aban-
+        donadas, e estatísticas ou durações nulas são ignoradas.
+
+        Retorna o número de medições usadas, a razão mediana entre as durações medidas e as previstas, a correlação
+        entre os seus logaritmos, NaN se não houver ao menos duas medições distintas, e os parâmetros reajustados.
+        """
+        estatísticas, durações = np.asarray(estatísticas, dtype=float), np.asarray(durações, dtype=float)
+        válidas = ~np.isnan(durações) & (durações > 0) & (estatísticas > 0)
+        estatísticas, durações = estatísticas[válidas], durações[válidas]
+        razões = durações / self.prever(estatísticas)
+        correlação = (float(np.corrcoef(np.log(estatísticas), np.log(durações))[0, 1])
+                      if len(estatísticas) > 1 and np.ptp(estatísticas) > 0 and np.ptp(durações) > 0 else math.nan)
+
+        self._medições.extend(zip(np.log(estatísticas), np.log(durações)))
+        if self._medições:
+            x, y = np.array(self._medições).T
+            if (np.ptp(x) >= math.log(self.amplitude_mínima) and np.ptp(y) > 0
+                    and np.corrcoef(x, y)[0, 1] >= self.correlação_mínima):
+                self.expoente = float(np.clip(np.polyfit(x, y, 1)[0], self.expoente_mínimo, self.expoente_máximo))
+            self.coeficiente = float(np.exp(np.mean(y - self.expoente * x)))
+
+        return {"medições": len(durações),
+                "razão_mediana": float(np.median(razões)) if len(razões) else math.nan,
+                "correlação": correlação,
+                "expoente": self.expoente,
+                "coeficiente": self.coeficiente}
+
+
+def resumir_latências(durações: Sequence[float], esgotadas: int = 0) -> Dict[str, float]:
+    """Resume as durações das avaliações concluídas de uma chamada, em segundos, pela mediana, pelos percentis 90 e 99
+    e pela máxima, ao lado do número de tarefas concluídas e abandonadas. Sem durações, os valores são NaN."""
+    if len(durações):
+        mediana, p90, p99, máxima = (float(valor) for valor in np.percentile(durações, (50, 90, 99, 100)))
+    else:
+        mediana = p90 = p99 = máxima = math.nan
+    return {"mediana": mediana, "p90": p90, "p99": p99, "máxima": máxima,
+            "concluídas": len(durações), "esgotadas": esgotadas}
+
+
+def _durações_da_saída(saída: Any) -> List[float]:
+    # _avaliar_pacote retorna o resultado e a sua duração; _avaliar_faixa, as durações da faixa
+    return [saída[1]] if isinstance(saída, tuple) else list(saída)
+
+
+def _faixas_uniformes(n_de_genes: int, tamanho_do_lote: int) -> List[Tuple[int, int]]:
+    tamanho_do_lote = max(tamanho_do_lote, 1)
+    return [(início, min(início + tamanho_do_lote, n_de_genes)) for início in range(0, n_de_genes, tamanho_do_lote)]
+
+
+def _faixas_por_custo(custos: np.ndarray, n_de_lotes: int) -> List[Tuple[int, int]]:
+    """Divide genes em ordem decrescente de custo em faixas consecutivas que não passam de 1 / n_de_lotes do custo
+    total, exceto as de um único gene: os mais caros ficam sozinhos e os baratos, agrupados."""
+    alvo = custos.sum() / max(n_de_lotes, 1)
+    faixas, início, acumulado = [], 0, 0.0
+    for i, custo in enumerate(custos):
+        if i > início and acumulado + custo > alvo:
+            faixas.append((início, i))
+            início, acumulado = i, 0.0
+        acumulado += custo
+    faixas.append((início, len(custos)))
+    return faixas
+
+
+def _binários_de_mesmo_formato(genes: Sequence[Any]) -> bool:
+    return all(isinstance(gene, np.ndarray) and gene.dtype == bool and gene.shape == genes[0].shape for gene in genes)
+
+
+def _bloco_com_ao_menos(bloco: Optional[shared_memory.SharedMemory], tamanho: int) -> shared_memory.SharedMemory:
+    """Reaproveita o bloco se ele comportar o tamanho pedido; do contrário, libera-o e cria um novo."""
+    if bloco is not None and bloco.size >= tamanho:
+        return bloco
+    if bloco is not None:
+        bloco.close()
+        bloco.unlink()
+    return shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
@@ -0,0 +1,28 @@
+"""Mede a convergência e a aceleração do modelo de ilhas de 2 a 8 ilhas contra uma única população de projetos."""
+import multiprocessing
+from functools import partial
+
+from otag import conseguir_construtores, mudar, _construir_ambiente
+from suporte.ilhas import comparar_com_população_única
+
+
+mudar("problema", "P_no_meio_da_extremidade_direita_e_cantos_das_bordas_fixos.py")
+mudar("parâmetros", "pouca_espessura.json")
+
+
+def medir(ilhas: int, gerações: int = 20) -> None:
+    construir = partial(_construir_ambiente, conseguir_construtores())
+    comparação = comparar_com_população_única(construir, ilhas, gerações, migrantes=2, intervalo=5)
+
+    print(f"{ilhas} ilhas, {gerações} gerações | "
+          f"população única: {comparação['convergência_da_população_única'][-1]:.4f} "
+          f"em {comparação['tempo_da_população_única']:.1f} s | "
+          f"ilhas: {comparação['convergência_das_ilhas'][-1]:.4f} em {comparação['tempo_das_ilhas']:.1f} s | "
+          f"aceleração: {comparação['aceleração']:.2f}x no total, "
+          f"{comparação['aceleração_até_a_mesma_adaptação']:.2f}x até a mesma adaptação")
+
+
+if __name__ == '__main__':
+    for ilhas in (2, 4, 8):
+        if ilhas <= multiprocessing.cpu_count():
+            medir(ilhas)
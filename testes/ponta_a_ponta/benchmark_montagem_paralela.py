@@ -0,0 +1,43 @@
+"""Mede a escalabilidade do montador OptV2_paralelo de 1 a 8 linhas de execução contra o OptV2 sequencial."""
+from timeit import repeat
+
+import numpy as np
+
+from suporte.elementos_finitos import Malha
+from situações_de_projeto.placa_em_balanço.problemas.P_no_meio_da_extremidade_direita import PlacaEmBalanço
+
+
+parâmetros = {"DESLOCAMENTO_LIMITE_DO_MATERIAL": 0.005,
+              "MÓDULO_DE_YOUNG_DO_MATERIAL": 210e9,
+              "COEFICIENTE_DE_POYSSON": 0.3,
+              "MAGNITUDE_DA_CARGA_APLICADA": 100e6,
+              "ESPESSURA_DO_ELEMENTO": 0.01,
+              "ORDEM_DE_REFINAMENTO_DA_MALHA": 64,
+              "CONSTANTE_DE_PENALIZAÇÃO_DA_ÁREA_DESCONECTADA": 0.1,
+              "CONSTANTE_DE_PENALIZAÇÃO_SOB_DESLOCAMENTO_EXCEDENTE": 10,
+              "MÉTODO_PADRÃO_DE_MONTAGEM_DA_MATRIZ_DE_RIGIDEZ_GERAL": "OptV2"}
+
+
+def medir(n: int, repetições: int = 3) -> None:
+    parâmetros.update({"ORDEM_DE_REFINAMENTO_DA_MALHA": n, "ORDENAÇÃO_DA_MALHA": "morton"})
+    placa = PlacaEmBalanço(parâmetros)
+
+    l = placa.lado_dos_elementos
+    _, _, elementos, nós, me = placa._determinar_fenótipo(np.ones((n, 2 * n), dtype=bool), l)
+    malha = Malha(*placa._ordenar_pela_curva(elementos, nós, me))
+
+    Ke = placa.calcular_matrizes_de_rigidez_local(l=l, t=0.01, v=0.3, E=210e9)
+    gdl = 2 * len(nós)
+
+    sequencial = min(repeat(lambda: placa.montador_OptV2(malha, Ke, gdl), number=1, repeat=repetições))
+    print(f"n = {n}, {gdl} graus de liberdade | OptV2: {1e3 * sequencial:.1f} ms")
+
+    for linhas in (1, 2, 4, 8):
+        placa.linhas_de_execução = linhas
+        paralelo = min(repeat(lambda: placa.montador_OptV2_paralelo(malha, Ke, gdl), number=1, repeat=repetições))
+        print(f"    {linhas} linha(s): {1e3 * paralelo: >7.1f} ms (aceleração: {sequencial / paralelo:.2f}x)")
+
+
+if __name__ == '__main__':
+    for n in (38, 64):
+        medir(n)
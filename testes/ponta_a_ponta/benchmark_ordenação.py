@@ -0,0 +1,48 @@
+"""Compara a ordem de busca com as ordens de Morton e Hilbert na montagem de K e no produto K·u sem montagem."""
+from timeit import repeat
+
+import numpy as np
+
+from suporte.elementos_finitos import Malha
+from situações_de_projeto.placa_em_balanço.problemas.P_no_meio_da_extremidade_direita import PlacaEmBalanço
+
+
+parâmetros = {"DESLOCAMENTO_LIMITE_DO_MATERIAL": 0.005,
+              "MÓDULO_DE_YOUNG_DO_MATERIAL": 210e9,
+              "COEFICIENTE_DE_POYSSON": 0.3,
+              "MAGNITUDE_DA_CARGA_APLICADA": 100e6,
+              "ESPESSURA_DO_ELEMENTO": 0.01,
+              "ORDEM_DE_REFINAMENTO_DA_MALHA": 64,
+              "CONSTANTE_DE_PENALIZAÇÃO_DA_ÁREA_DESCONECTADA": 0.1,
+              "CONSTANTE_DE_PENALIZAÇÃO_SOB_DESLOCAMENTO_EXCEDENTE": 10,
+              "MÉTODO_PADRÃO_DE_MONTAGEM_DA_MATRIZ_DE_RIGIDEZ_GERAL": "OptV2"}
+
+
+def medir(n: int, ordenação: str, repetições: int = 20) -> None:
+    parâmetros.update({"ORDEM_DE_REFINAMENTO_DA_MALHA": n, "ORDENAÇÃO_DA_MALHA": ordenação})
+    placa = PlacaEmBalanço(parâmetros)
+
+    l = placa.lado_dos_elementos
+    gene = np.ones((n, 2 * n), dtype=bool)
+    _, _, elementos, nós, me = placa._determinar_fenótipo(gene, l)
+    if ordenação != "busca":
+        elementos, nós, me = placa._ordenar_pela_curva(elementos, nós, me)
+    malha = Malha(elementos, nós, me)
+
+    Ke = placa.calcular_matrizes_de_rigidez_local(l=l, t=0.01, v=0.3, E=210e9)
+    u = np.random.random(2 * len(nós))
+
+    # Largura de banda média: distância entre os índices globais de nós de um mesmo elemento
+    banda = np.mean(me.max(axis=0) - me.min(axis=0))
+
+    tempo_do_produto = min(repeat(lambda: placa.produto_sem_montagem(malha, Ke, u), number=1, repeat=repetições))
+    tempo_da_montagem = min(repeat(lambda: placa.montador_OptV2(malha, Ke, 2 * len(nós)), number=1, repeat=3))
+
+    print(f"n = {n: >3} | {ordenação: >7} | banda média: {banda: >8.1f} | "
+          f"K·u sem montagem: {1e3 * tempo_do_produto: >7.2f} ms | montagem OptV2: {1e3 * tempo_da_montagem: >8.2f} ms")
+
+
+if __name__ == '__main__':
+    for n in (64, 80):
+        for ordenação in ("busca", "morton", "hilbert"):
+            medir(n, ordenação)
@@ -0,0 +1,74 @@
+"""Compara o pré-condicionador de Jacobi com os compartilhados a partir da elite e do consenso numa população real."""
+from contextlib import redirect_stdout
+from timeit import default_timer
+import io
+import random
+
+import numpy as np
+
+from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import AmbienteDeProjeto, Projeto
+from situações_de_projeto.placa_em_balanço.problemas.P_no_meio_da_extremidade_direita import PlacaEmBalanço
+
+
+parâmetros = {"DESLOCAMENTO_LIMITE_DO_MATERIAL": 0.005,
+              "MÓDULO_DE_YOUNG_DO_MATERIAL": 210e9,
+              "COEFICIENTE_DE_POYSSON": 0.3,
+              "MAGNITUDE_DA_CARGA_APLICADA": 100e6,
+              "ESPESSURA_DO_ELEMENTO": 0.01,
+              "ORDEM_DE_REFINAMENTO_DA_MALHA": 30,
+              "CONSTANTE_DE_PENALIZAÇÃO_DA_ÁREA_DESCONECTADA": 0.1,
+              "CONSTANTE_DE_PENALIZAÇÃO_SOB_DESLOCAMENTO_EXCEDENTE": 10,
+              "MÉTODO_PADRÃO_DE_MONTAGEM_DA_MATRIZ_DE_RIGIDEZ_GERAL": "OptV2",
+              "RESOLVEDOR_DO_SISTEMA_LINEAR": "gradientes_conjugados",
+              "TOLERÂNCIA_INICIAL_DO_RESOLVEDOR": 1e-6}
+
+
+def evoluir_população(gerações: int, semente: int = 0) -> AmbienteDeProjeto:
+    random.seed(semente)
+    np.random.seed(semente)
+
+    problema = PlacaEmBalanço(dict(parâmetros, RESOLVEDOR_DO_SISTEMA_LINEAR="direto"))
+    with redirect_stdout(io.StringIO()):
+        ambiente = AmbienteDeProjeto(problema, n_de_indivíduos=30)
+        ambiente.avançar_gerações(gerações)
+        ambiente.seleção_natural()
+
+    return ambiente
+
+
+def medir(ambiente: AmbienteDeProjeto, representativo: str, amostra: int = 10) -> None:
+    placa = PlacaEmBalanço(dict(parâmetros))
+
+    início = default_timer()
+    if representativo == "elite":
+        placa.compartilhar_pré_condicionador_de(ambiente.população[0])
+    elif representativo == "consenso":
+        consenso = np.mean([proj.gene for proj in ambiente.população], axis=0) >= 0.5
+        if not placa.compartilhar_pré_condicionador_de(Projeto(consenso, nome="Consenso")):
+            print(f"{representativo: >8} | consenso desconectado da borda")
+            return
+    tempo_de_construção = default_timer() - início
+
+    iterações = []
+    início = default_timer()
+    with redirect_stdout(io.StringIO()):
+        for proj in ambiente.população[1:]:
+            cópia = Projeto(proj.gene.copy(), proj.nome)
+            placa.testar_adaptação(cópia)
+            if cópia.iterações:
+                iterações.append(cópia.iterações)
+            if len(iterações) == amostra:
+                break
+    tempo_das_resoluções = default_timer() - início
+
+    print(f"{representativo: >8} | iterações por resolução: média {np.mean(iterações): >6.1f}, "
+          f"máxima {np.max(iterações): >4} | construção: {1e3 * tempo_de_construção: >7.1f} ms | "
+          f"resoluções: {tempo_das_resoluções: >6.2f} s")
+
+
+if __name__ == '__main__':
+    for gerações in (0, 40):
+        ambiente = evoluir_população(gerações)
+        print(f"\nPopulação após {gerações} gerações")
+        for representativo in ("jacobi", "elite", "consenso"):
+            medir(ambiente, representativo)
@@ -15,6 +15,7 @@ def teste_ponta_a_ponta(paralelização=False, mostrar=True):
                    n_de_indivíduos=8,
                    paralelização=paralelização)    
     amb.avançar_gerações(3)
+    print(f"> Cache de genes: {amb.genes_testados.estatísticas()}")
     
     if hasattr(amb, "finalizar"):
         amb.finalizar()
@@ -22,8 +23,6 @@ def teste_ponta_a_ponta(paralelização=False, mostrar=True):
     if mostrar:
         mostrar_ambiente(amb)
 
-    Ambiente.genes_testados.clear()
-
 
 if __name__ == '__main__':
     teste_ponta_a_ponta(paralelização=True, mostrar=False)
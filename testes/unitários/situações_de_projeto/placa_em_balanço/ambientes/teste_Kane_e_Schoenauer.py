@@ -1,3 +1,4 @@
+import pickle
 from copy import deepcopy
 from itertools import cycle
 from unittest.mock import Mock
@@ -5,6 +6,8 @@ from unittest.mock import Mock
 import pytest
 
 from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import *
+from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer import _aplicar_avaliação, _avaliação_esgotada
+from suporte.aleatoriedade import FluxosAleatórios
 
 
 @pytest.fixture
@@ -25,6 +28,9 @@ def maquete_de_problema(adaptações):
 
     problema.testar_adaptação = testar_projeto_fake
 
+    # Cada gene é o seu próprio fenótipo
+    problema.identificar_fenótipos = lambda genes: ([gene.tobytes() for gene in genes], np.array(genes))
+
     genes_0 = [np.zeros((6, 6), dtype=bool) for _ in range(4)]
     genes_0[0][0:2, 0:2] = True
     genes_0[1][0:2, 4:6] = True
@@ -39,7 +45,17 @@ def maquete_de_problema(adaptações):
 
 @pytest.fixture
 def ambiente_de_teste(maquete_de_problema):
-    return AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4)
+    return AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4, semente=0)
+
+
+class GeradorRoteirizado:
+    """Gerador cujos métodos devolvem, em ordem, os valores pré-definidos para cada um."""
+
+    def __init__(self, **roteiros):
+        self.roteiros = {método: iter(valores) for método, valores in roteiros.items()}
+
+    def __getattr__(self, método):
+        return lambda *args, **kwargs: next(self.roteiros[método])
 
 
 def teste_inicializar_AmbienteDeProjeto(maquete_de_problema, ambiente_de_teste):
@@ -51,13 +67,25 @@ def teste_inicializar_AmbienteDeProjeto(maquete_de_problema, ambiente_de_teste):
                                   for i, gene in enumerate(maquete_de_problema.genes_0)]
 
 
-def teste_próxima_geração(ambiente_de_teste, maquete_de_problema):
-    random.seed(0)
-    np.random.seed(0)
+def teste_próxima_geração_reprodutível_pela_semente(maquete_de_problema):
+    def testar_pela_área(projeto):
+        projeto.adaptação = 1 / (1 + projeto.gene.sum())
+        projeto.adaptação_testada = True
+        projeto.u, projeto.f, projeto.malha = np.empty((3, 1)), np.empty((3, 1)), np.empty((6, 6))
 
-    ambiente_de_teste.próxima_geração()
+    maquete_de_problema.testar_adaptação = testar_pela_área
 
-    assert np.all(ambiente_de_teste.população[0].gene == maquete_de_problema.genes_0[2])
+    # O gerador global não interfere: só a semente do ambiente determina a geração
+    genes = []
+    for semente, semente_global in ((0, 0), (0, 1), (1, 0)):
+        np.random.seed(semente_global)
+        ambiente = AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4, semente=semente)
+        ambiente.próxima_geração()
+        assert ambiente.n_da_geração == 1
+        genes.append(np.array([proj.gene for proj in ambiente.população]))
+
+    assert np.array_equal(genes[0], genes[1])
+    assert not np.array_equal(genes[0], genes[2])
 
 
 def teste_seleção_natural(ambiente_de_teste):
@@ -74,14 +102,13 @@ def teste_reprodução(ambiente_de_teste, monkeypatch):
     população_antes_da_reprodução = deepcopy(ambiente_de_teste.população)
     população_esperada = população_antes_da_reprodução[:3] + população_antes_da_reprodução[:1]
 
-    crossover_chamado = False
-    números_sorteados = cycle([0.2, 0.8])
-
-    def retornar_na_mesma_ordem_exceto_o_último(população, *args, **kwargs):
-        return população[:3] + população[:1]
+    # Sorteios da roleta no meio dos trechos do primeiro, do segundo, do terceiro e de novo do primeiro projeto
+    fronteiras = np.cumsum([proj.adaptação for proj in ambiente_de_teste.população])
+    fronteiras = np.concatenate([[0], fronteiras / fronteiras[-1]])
+    ambiente_de_teste._roleta = (ambiente_de_teste.n_da_geração, ((fronteiras[:-1] + fronteiras[1:]) / 2)[[0, 1, 2, 0]])
 
-    def retornar_número_sorteado_pré_definido(*args, **kwargs):
-        return next(números_sorteados)
+    crossover_chamado = False
+    gerador = GeradorRoteirizado(random=cycle([0.2, 0.8]))
 
     def crossover_falso(*args, **kwargs):
         nonlocal crossover_chamado
@@ -90,8 +117,7 @@ def teste_reprodução(ambiente_de_teste, monkeypatch):
         crossover_chamado = True
 
     with monkeypatch.context() as m:
-        m.setattr(np.random, "choice", retornar_na_mesma_ordem_exceto_o_último)
-        m.setattr(np.random, "random", retornar_número_sorteado_pré_definido)
+        m.setattr(ambiente_de_teste, "gerador", lambda *args: gerador)
         m.setattr(ambiente_de_teste, "crossover", crossover_falso)
         ambiente_de_teste.reprodução()
 
@@ -108,13 +134,12 @@ def teste_reprodução(ambiente_de_teste, monkeypatch):
 def teste_crossover(ambiente_de_teste, monkeypatch):
     proj_1, proj_2 = ambiente_de_teste.população[:2]
 
-    cortes_a_fazer = iter([(2, 4), (2, 4), (0, 2), (0, 2), (0, 2), (4, 5)])
-
-    def retornar_cortes_na_ordem_especificada(*args, **kwargs):
-        return next(cortes_a_fazer)
+    # Cortes nas linhas 2 e 4 e nas colunas 4 e 5, seguidos dos índices das fatias de cada bloco trocado: linhas 0 a
+    # 2 e colunas 4 a 5, linhas 2 a 4 e colunas 0 a 4, e linhas 0 a 2 e colunas 0 a 4
+    gerador = GeradorRoteirizado(integers=[2, 4, 4, 5, 0, 1, 1, 0, 0, 0])
 
     with monkeypatch.context() as m:
-        m.setattr(random, "choice", retornar_cortes_na_ordem_especificada)
+        m.setattr(ambiente_de_teste, "gerador", lambda *args: gerador)
         ambiente_de_teste.crossover(proj_1, proj_2)
 
     assert np.all(proj_1.gene[0:2, 4]) and np.all(~proj_1.gene[:, :4])
@@ -123,3 +148,238 @@ def teste_crossover(ambiente_de_teste, monkeypatch):
 
 
 
+
+
+def teste_refinamento_seletivo(maquete_de_problema):
+    adaptação_exata = {"Proj_1": 0.2, "Proj_2": 0.4, "Proj_3": 0.6, "Proj_4": 0.61}
+    tolerâncias_usadas = {nome: [] for nome in adaptação_exata}
+
+    def testar_projeto_iterativamente(projeto, tolerância=None):
+        tolerância = maquete_de_problema.tolerância_do_resolvedor if tolerância is None else tolerância
+        tolerâncias_usadas[projeto.nome].append(tolerância)
+
+        projeto.adaptação = adaptação_exata[projeto.nome]
+        projeto.intervalo_de_adaptação = (projeto.adaptação - 10 * tolerância, projeto.adaptação + 10 * tolerância)
+        projeto.iterações = 1
+        projeto.adaptação_testada = True
+
+    maquete_de_problema.testar_adaptação = testar_projeto_iterativamente
+    maquete_de_problema.resolvedor = "gradientes_conjugados"
+    maquete_de_problema.tolerância_do_resolvedor = 1e-2
+    maquete_de_problema.tolerância_final_do_resolvedor = 1e-8
+    maquete_de_problema.pré_condicionador = "jacobi"
+
+    # Sorteios longe das fronteiras da roleta, que vão de 0,25 a 0,44, de 0,56 a 0,78 e de 0,81 a 0,95
+    ambiente = AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4)
+    ambiente._roleta = (0, np.array([0.1, 0.2, 0.5, 0.99]))
+    ambiente.seleção_natural()
+
+    # Apenas os dois projetos que disputam a elite precisam de uma tolerância mais apertada
+    assert tolerâncias_usadas == {"Proj_1": [1e-2], "Proj_2": [1e-2], "Proj_3": [1e-2, 1e-4], "Proj_4": [1e-2, 1e-4]}
+    assert [proj.iterações for proj in ambiente.população] == [2, 2, 1, 1]
+    assert ambiente.população[0].nome == "Proj_4"
+
+    # Um sorteio entre os limites da segunda fronteira exige refinar também os projetos que mais a deslocam
+    for tolerâncias in tolerâncias_usadas.values():
+        tolerâncias.clear()
+    ambiente = AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4)
+    ambiente._roleta = (0, np.array([0.1, 0.2, 0.5, 0.6]))
+    ambiente.seleção_natural()
+    assert tolerâncias_usadas == {"Proj_1": [1e-2, 1e-4], "Proj_2": [1e-2, 1e-4], "Proj_3": [1e-2, 1e-4],
+                                  "Proj_4": [1e-2, 1e-4]}
+
+
+def teste_roleta_refina_só_quem_desloca_a_fronteira(ambiente_de_teste):
+    adaptações = np.ones(4)
+    inferiores, superiores = adaptações.copy(), adaptações.copy()
+    inferiores[2], superiores[2] = 0.9, 1.1
+
+    # Só o terceiro projeto é incerto: um sorteio próximo da fronteira do meio exige refiná-lo, um distante não
+    ambiente_de_teste._roleta = (ambiente_de_teste.n_da_geração, np.array([0.51]))
+    assert list(ambiente_de_teste._ambíguos_na_roleta(adaptações, inferiores, superiores)) == [False, False, True,
+                                                                                              False]
+    ambiente_de_teste._roleta = (ambiente_de_teste.n_da_geração, np.array([0.6]))
+    assert not ambiente_de_teste._ambíguos_na_roleta(adaptações, inferiores, superiores).any()
+
+
+def teste_pré_condicionador_refeito_quando_as_iterações_degradam(maquete_de_problema, ambiente_de_teste):
+    maquete_de_problema.resolvedor = "gradientes_conjugados"
+    maquete_de_problema.pré_condicionador = "elite"
+    maquete_de_problema.fator_de_degradação_do_pré_condicionador = 1.5
+    maquete_de_problema.pré_condicionador_compartilhado = None
+
+    def compartilhar(proj):
+        maquete_de_problema.pré_condicionador_compartilhado = proj.nome
+        return True
+
+    maquete_de_problema.compartilhar_pré_condicionador_de = compartilhar
+
+    for iterações, elite_esperada in [(100, "Proj_1"), (40, "Proj_1"), (50, "Proj_1"), (70, "Proj_2")]:
+        for proj in ambiente_de_teste.população:
+            proj.iterações = iterações
+        ambiente_de_teste.população[0].nome, ambiente_de_teste.população[1].nome = elite_esperada, "Outro"
+        ambiente_de_teste._atualizar_pré_condicionador()
+
+        assert maquete_de_problema.pré_condicionador_compartilhado == elite_esperada
+
+
+def teste_reavaliar_sem_novas_resoluções(maquete_de_problema, ambiente_de_teste):
+    maquete_de_problema.alfa = 1
+    maquete_de_problema.calcular_adaptação = (
+        lambda Acon, Ades, Dmax: 1 / (Acon + Ades + maquete_de_problema.alfa * Dmax))
+    maquete_de_problema.intervalo_de_adaptação = (
+        lambda Acon, Ades, Dmax, erro: (1 / (Acon + Ades + maquete_de_problema.alfa * (Dmax + erro)),
+                                        1 / (Acon + Ades + maquete_de_problema.alfa * (Dmax - erro))))
+    maquete_de_problema.testar_adaptação = Mock(side_effect=AssertionError("Nenhum projeto deve ser resolvido"))
+
+    respostas = [(1, 0, 0.1, 0), (1, 0, 1, 0), (1.5, 0, 0, 0), None]
+    for proj, resposta in zip(ambiente_de_teste.população, respostas):
+        proj.respostas = resposta
+    ambiente_de_teste.população[3].adaptação = 0
+
+    ambiente_de_teste.reavaliar()
+    assert [proj.nome for proj in ambiente_de_teste.população] == ["Proj_1", "Proj_3", "Proj_2", "Proj_4"]
+
+    maquete_de_problema.alfa = 10
+    ambiente_de_teste.reavaliar()
+    assert [proj.nome for proj in ambiente_de_teste.população] == ["Proj_3", "Proj_1", "Proj_2", "Proj_4"]
+    assert np.isclose(ambiente_de_teste.população[1].adaptação, 1 / 2)
+
+
+def teste_identificador_acompanha_o_crossover(ambiente_de_teste):
+    proj_1, proj_2 = ambiente_de_teste.população[:2]
+    proj_2.gene[:] = ~proj_1.gene
+    id_1 = proj_1.id
+
+    ambiente_de_teste.crossover(proj_1, proj_2)
+
+    assert proj_1.id != id_1
+    assert proj_1.id == Projeto(proj_1.gene.copy(), nome="Cópia").id
+
+
+@pytest.fixture
+def placa_em_balanço():
+    from situações_de_projeto.placa_em_balanço.problemas.P_no_meio_da_extremidade_direita import PlacaEmBalanço
+
+    return PlacaEmBalanço({"DESLOCAMENTO_LIMITE_DO_MATERIAL": 0.005,
+                           "MÓDULO_DE_YOUNG_DO_MATERIAL": 210e9,
+                           "COEFICIENTE_DE_POYSSON": 0.3,
+                           "MAGNITUDE_DA_CARGA_APLICADA": 100e6,
+                           "ESPESSURA_DO_ELEMENTO": 0.01,
+                           "ORDEM_DE_REFINAMENTO_DA_MALHA": 20,
+                           "CONSTANTE_DE_PENALIZAÇÃO_DA_ÁREA_DESCONECTADA": 0.1,
+                           "CONSTANTE_DE_PENALIZAÇÃO_SOB_DESLOCAMENTO_EXCEDENTE": 10,
+                           "MÉTODO_PADRÃO_DE_MONTAGEM_DA_MATRIZ_DE_RIGIDEZ_GERAL": "OptV2"})
+
+
+@pytest.mark.parametrize("executor", [{"paralelização": True}, {"executor": "processos", "processos": 2}])
+def teste_seleção_em_paralelo_compartilha_os_caches(capsys, placa_em_balanço, executor):
+    problema = placa_em_balanço
+    genes = problema.geração_0(n_de_indivíduos=2, espessura_interna_mínima=2,
+                               geradores=FluxosAleatórios(0).geradores(0, "geração_0", 2))
+
+    # Um gene que só difere do primeiro por uma célula isolada tem o mesmo fenótipo
+    gene_com_célula_isolada = genes[0].copy()
+    i, j = next((i, j) for i in range(1, 19) for j in range(1, 39) if not genes[0][i - 1:i + 2, j - 1:j + 2].any())
+    gene_com_célula_isolada[i, j] = True
+
+    projetos = [Projeto(gene.copy(), nome=f"Proj_{k + 1}")
+                for k, gene in enumerate((genes[0], genes[1], genes[1], gene_com_célula_isolada))]
+
+    ambiente = AmbienteDeProjeto(problema, indivíduos=projetos, n_de_indivíduos=4, **executor)
+    ambiente.seleção_natural()
+
+    # Os dois modos avaliam pela mesma fila, sem a do executor do Ambiente
+    assert ambiente._fila_de_avaliação is not None and ambiente._fila_de_processos is None
+
+    # O mestre conhece os resultados obtidos pelos trabalhadores
+    assert all(proj.adaptação > 0 for proj in ambiente.população)
+    assert len(ambiente.genes_testados) == 3
+    assert len(problema.fenótipos_testados) == 2
+    assert "> 2 resoluções poupadas nesta geração: 1 por genes e 1 por fenótipos repetidos" in capsys.readouterr().out
+
+    # O gene de célula isolada tem as respostas do seu fenótipo e a própria área desconectada
+    por_nome = {proj.nome: proj for proj in ambiente.população}
+    original, isolado = por_nome["Proj_1"], por_nome["Proj_4"]
+    assert original.respostas[2] == isolado.respostas[2]
+    assert isolado.respostas[1] > original.respostas[1] and isolado.adaptação < original.adaptação
+
+    # Os trabalhadores são reaproveitados: uma nova seleção não recalcula os genes já conhecidos
+    fila = ambiente._fila_de_avaliação
+    ambiente.seleção_natural()
+    assert ambiente._fila_de_avaliação is fila and ambiente.genes_testados.acertos >= 4
+
+    # Uma cópia serializada do ambiente não carrega o gerenciador nem os trabalhadores
+    cópia = pickle.loads(pickle.dumps(ambiente))
+    assert cópia._gerenciador_de_caches is None and cópia._fila_de_avaliação is None
+    ambiente.encerrar_executor()
+    assert ambiente._fila_de_avaliação is None
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads"])
+def teste_seleção_em_série_resolve_cada_fenótipo_uma_só_vez(capsys, monkeypatch, placa_em_balanço, executor):
+    gene, = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2,
+                                       geradores=FluxosAleatórios(0).geradores(0, "geração_0", 1))
+
+    # Genes distintos que só diferem por células isoladas têm o mesmo fenótipo
+    isolados = [(i, j) for i in range(1, 19) for j in range(1, 39) if not gene[i - 1:i + 2, j - 1:j + 2].any()]
+    genes = [gene.copy() for _ in range(3)]
+    genes[1][isolados[0]] = genes[2][isolados[-1]] = True
+
+    resolver_para = Mock(wraps=placa_em_balanço.resolver_para)
+    monkeypatch.setattr(placa_em_balanço, "resolver_para", resolver_para)
+    ambiente = AmbienteDeProjeto(placa_em_balanço, indivíduos=[Projeto(g, nome=f"Proj_{k + 1}")
+                                                               for k, g in enumerate(genes)],
+                                 n_de_indivíduos=3, executor=executor, processos=3)
+    ambiente.seleção_natural()
+    ambiente.encerrar_executor()
+
+    assert resolver_para.call_count == 1
+    assert len({proj.respostas[2] for proj in ambiente.população}) == 1
+    assert "> 2 resoluções poupadas nesta geração: 0 por genes e 2 por fenótipos repetidos" in capsys.readouterr().out
+
+
+def teste_custos_previstos_pelos_graus_de_liberdade_do_fenótipo(placa_em_balanço):
+    gene, = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2,
+                                       geradores=FluxosAleatórios(0).geradores(0, "geração_0", 1))
+    fenótipo = placa_em_balanço._células_conectadas(gene)
+
+    # Um bloco isolado aumenta a área do gene, mas não a malha do seu fenótipo
+    i, j = next((i, j) for i in range(1, 18) for j in range(1, 38) if not gene[i - 1:i + 3, j - 1:j + 3].any())
+    gene[i:i + 2, j:j + 2] = True
+
+    ambiente = AmbienteDeProjeto(placa_em_balanço, indivíduos=[Projeto(gene, nome="Proj_1")], n_de_indivíduos=1,
+                                 paralelização=True, processos=1)
+    prever = Mock(wraps=ambiente.modelo_de_custo.prever)
+    ambiente.modelo_de_custo.prever = prever
+    ambiente.seleção_natural()
+    ambiente.encerrar_executor()
+
+    graus_de_liberdade, = prever.call_args.args
+    assert list(graus_de_liberdade) == [placa_em_balanço.estimar_graus_de_liberdade(fenótipo)]
+    assert graus_de_liberdade[0] < placa_em_balanço.estimar_graus_de_liberdade(gene)
+
+
+def teste_avaliação_esgotada_penaliza_sem_respostas():
+    proj = Mock()
+    _aplicar_avaliação(proj, _avaliação_esgotada(-1.0))
+
+    assert proj.adaptação == -1.0 and proj.intervalo_de_adaptação == (-1.0, -1.0)
+    assert proj.respostas is None and proj.iterações == 0 and proj.adaptação_testada
+
+
+def teste_ambiente_estacionário_mantém_o_cronograma_de_alfa(maquete_de_problema):
+    from situações_de_projeto.placa_em_balanço.ambientes import Kane_e_Schoenauer_estacionário
+
+    ambiente = Kane_e_Schoenauer_estacionário.AmbienteDeProjeto(maquete_de_problema, n_de_indivíduos=4, semente=0)
+    ambiente.avançar_gerações(2)
+
+    assert ambiente.n_da_geração == 2
+    assert maquete_de_problema.alfa == pytest.approx(1.01 ** 2)
+    assert all(isinstance(proj, Projeto) for proj in ambiente.população)
+
+    # As gerações fechadas guardam cópias, que os alfas seguintes não alteram
+    primeira = [(proj.nome, proj.adaptação) for proj in ambiente.gerações[-2]]
+    ambiente.avançar_gerações(1)
+    assert [(proj.nome, proj.adaptação) for proj in ambiente.gerações[-3]] == primeira
+    assert not set(map(id, ambiente.gerações[-2])) & set(map(id, ambiente.população))
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from situações_de_projeto.placa_em_balanço.ambientes.Kane_e_Schoenauer_adaptado import AmbienteDeProjeto
+
+
+class ProblemaPelaÁrea:
+    """Problema de mentira, serializável para os processos do executor, que adapta melhor os genes de menor área."""
+    alfa_0 = 1
+
+    def geração_0(self):
+        genes = [np.zeros((6, 6), dtype=bool) for _ in range(4)]
+        for gene, (i, j) in zip(genes, ((0, 0), (0, 4), (4, 4), (4, 0))):
+            gene[i:i + 2, j:j + 2] = True
+        return genes
+
+    def testar_adaptação(self, projeto):
+        projeto.adaptação = 1 / (1 + projeto.gene.sum())
+        projeto.adaptação_testada = True
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processos"])
+def teste_gerações_reprodutíveis_pela_semente_com_qualquer_executor(executor):
+    def genes_após_duas_gerações(executor, semente_global):
+        # O gerador global não interfere: só a semente do ambiente determina as gerações
+        np.random.seed(semente_global)
+        ambiente = AmbienteDeProjeto(ProblemaPelaÁrea(), probabilidade_de_mutar=0.05, executor=executor, processos=2,
+                                     semente=0)
+        ambiente.próxima_geração()
+        ambiente.próxima_geração()
+        ambiente.encerrar_executor()
+        return [proj.gene for proj in ambiente.população]
+
+    referência = genes_após_duas_gerações("serial", 0)
+    assert all(np.array_equal(a, b) for a, b in zip(genes_após_duas_gerações(executor, 1), referência))
@@ -15,9 +15,8 @@ def projeto_teste(placa_em_balanço):
     proj = Mock()
     proj.nome = "ProjetoTeste"
 
-    random.seed(0)
-    np.random.seed(0)
-    proj.gene = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2)[0]
+    proj.gene = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2,
+                                           geradores=[np.random.default_rng(2)])[0]
 
     return proj
 
@@ -55,7 +54,7 @@ def teste_geração_0(placa_em_balanço):
 def teste_testar_adaptação(placa_em_balanço, capsys, projeto_teste):
     placa_em_balanço.testar_adaptação(projeto_teste)
     assert projeto_teste.adaptação_testada
-    assert projeto_teste.adaptação == 0.7352941176470587
+    assert projeto_teste.adaptação == 0.7766990291262134
 
     placa_em_balanço.testar_adaptação(projeto_teste)
     saída_da_execução = capsys.readouterr().out
@@ -79,12 +78,398 @@ def teste_penalização(placa_em_balanço, projeto_teste, capsys):
     [pytest.param("expansão", marks=pytest.mark.skip(reason="Pouco utilizado e computacionalmente custoso")),
      pytest.param("compacto", marks=pytest.mark.skip(reason="Pouco utilizado e computacionalmente custoso")),
      pytest.param("OptV1", marks=pytest.mark.skip(reason="Pouco utilizado e computacionalmente custoso")),
-     pytest.param("OptV2")])
+     pytest.param("OptV2"),
+     pytest.param("OptV2_paralelo")])
 def teste_montadores(placa_em_balanço, projeto_teste, método):
     placa_em_balanço._método_padrão = método
 
     placa_em_balanço.testar_adaptação(projeto_teste)
     assert projeto_teste.adaptação_testada
-    assert projeto_teste.adaptação == 0.7352941176470587
+    assert projeto_teste.adaptação == 0.7766990291262134
 
 
+def teste_deslocamentos_em_grade(parâmetros_de_teste, projeto_teste):
+    parâmetros_de_teste["FORMATO_DOS_DESLOCAMENTOS"] = "grade"
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+    placa_em_balanço.Dlim = 0.0000001
+
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    U = projeto_teste.u_em_grade
+    n = placa_em_balanço.n
+
+    assert U.shape == (n + 1, 2*n + 1, 2)
+    for i, nó in enumerate(projeto_teste.malha.nós):
+        assert np.all(U[nó.etiqueta] == projeto_teste.u[2*i:2*i + 2])
+    assert np.isnan(U).sum() == 2 * ((n + 1) * (2*n + 1) - len(projeto_teste.malha.nós))
+
+    Dmax = np.sqrt(np.sum(projeto_teste.u.reshape((-1, 2)) ** 2, axis=1).max())
+    assert np.isclose(placa_em_balanço.deslocamento_máximo(U), Dmax)
+    assert np.allclose(placa_em_balanço.deslocamento_máximo(np.stack([U, 2*U])), [Dmax, 2*Dmax])
+
+
+@pytest.mark.parametrize("ordenação", ["morton", "hilbert"])
+def teste_ordenação_da_malha(parâmetros_de_teste, projeto_teste, ordenação):
+    parâmetros_de_teste["ORDENAÇÃO_DA_MALHA"] = ordenação
+    parâmetros_de_teste["FORMATO_DOS_DESLOCAMENTOS"] = "grade"
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    U_ordenado = projeto_teste.u_em_grade
+
+    placa_em_balanço.ordenação_da_malha = "busca"
+    placa_em_balanço.fenótipos_testados.limpar()
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    assert np.allclose(U_ordenado, projeto_teste.u_em_grade, equal_nan=True)
+    assert projeto_teste.adaptação == 0.7766990291262134
+
+
+def teste_ordenação_da_malha_inválida(parâmetros_de_teste):
+    parâmetros_de_teste["ORDENAÇÃO_DA_MALHA"] = "peano"
+    with pytest.raises(ValueError):
+        PlacaEmBalanço(parâmetros_de_teste)
+
+
+def teste_produto_sem_montagem(placa_em_balanço, projeto_teste):
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    malha, Ke = projeto_teste.malha, placa_em_balanço.Ke
+    K = placa_em_balanço.montador_OptV2(malha, Ke, 2 * len(malha.nós))
+    u = np.random.random(2 * len(malha.nós))
+
+    Ku = K @ u
+    assert np.allclose(placa_em_balanço.produto_sem_montagem(malha, Ke, u), Ku, atol=1e-12 * np.abs(Ku).max())
+
+
+def teste_montador_paralelo_equivale_ao_OptV2(placa_em_balanço, projeto_teste):
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    malha, Ke = projeto_teste.malha, placa_em_balanço.Ke
+    graus_de_liberdade = 2 * len(malha.nós)
+
+    placa_em_balanço.linhas_de_execução = 3
+
+    assert np.allclose(placa_em_balanço.montador_OptV2_paralelo(malha, Ke, graus_de_liberdade),
+                       placa_em_balanço.montador_OptV2(malha, Ke, graus_de_liberdade), rtol=1e-12, atol=0)
+
+
+def teste_malha_adaptativa(parâmetros_de_teste, projeto_teste):
+    parâmetros_de_teste["NÍVEL_MÁXIMO_DE_AGLUTINAÇÃO"] = 2
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+
+    projeto_teste.gene[:] = True
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    malha = projeto_teste.malha
+    n = placa_em_balanço.n
+
+    assert isinstance(malha, MalhaAdaptativa)
+    assert set(malha.tamanhos) == {2, 4}
+    assert np.sum(malha.tamanhos ** 2) == 2 * n * n
+    assert len(malha.nós) < (n + 1) * (2*n + 1)
+
+    # O ponto de aplicação da carga nunca é um nó pendente
+    assert malha.nós.index(Nó(2, 0.5)) not in malha.restrições
+
+    # Nós pendentes se deslocam sobre o segmento entre seus mestres
+    for pendente, mestres in malha.restrições.items():
+        assert np.isclose(sum(peso for _, peso in mestres), 1)
+        u_interpolado = sum(peso * projeto_teste.u[2*mestre:2*mestre + 2] for mestre, peso in mestres)
+        assert np.allclose(projeto_teste.u[2*pendente:2*pendente + 2], u_interpolado)
+
+    parâmetros_de_teste["NÍVEL_MÁXIMO_DE_AGLUTINAÇÃO"] = 0
+    placa_uniforme = PlacaEmBalanço(parâmetros_de_teste)
+    u_adaptativo = projeto_teste.u
+    placa_uniforme.testar_adaptação(projeto_teste)
+
+    Dmax_adaptativo = np.sqrt(np.sum(u_adaptativo.reshape((-1, 2)) ** 2, axis=1).max())
+    Dmax_uniforme = np.sqrt(np.sum(projeto_teste.u.reshape((-1, 2)) ** 2, axis=1).max())
+    assert np.isclose(Dmax_adaptativo, Dmax_uniforme, rtol=0.2)
+
+
+def teste_resolvedor_iterativo(parâmetros_de_teste, projeto_teste, placa_em_balanço):
+    placa_em_balanço.Dlim = 0.0000001
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    adaptação_exata = projeto_teste.adaptação
+
+    parâmetros_de_teste.update({"RESOLVEDOR_DO_SISTEMA_LINEAR": "gradientes_conjugados",
+                                "TOLERÂNCIA_INICIAL_DO_RESOLVEDOR": 1e-2})
+    placa_iterativa = PlacaEmBalanço(parâmetros_de_teste)
+    placa_iterativa.Dlim = 0.0000001
+
+    placa_iterativa.testar_adaptação(projeto_teste)
+    inferior, superior = projeto_teste.intervalo_de_adaptação
+
+    assert inferior < superior
+    assert inferior <= adaptação_exata <= superior
+
+    # O refinamento parte da solução frouxa guardada em cache
+    placa_iterativa.testar_adaptação(projeto_teste, tolerância=1e-10)
+    inferior, superior = projeto_teste.intervalo_de_adaptação
+
+    assert np.isclose(projeto_teste.adaptação, adaptação_exata, rtol=1e-8)
+    assert superior - inferior < 1e-6 * adaptação_exata
+    iterações_do_refinamento = projeto_teste.iterações
+
+    placa_iterativa.fenótipos_testados.limpar()
+    placa_iterativa.testar_adaptação(projeto_teste, tolerância=1e-10)
+    assert iterações_do_refinamento < projeto_teste.iterações
+
+    # Resultados mais exatos que o pedido são reaproveitados
+    placa_iterativa.testar_adaptação(projeto_teste)
+    assert projeto_teste.iterações == 0
+    assert np.isclose(projeto_teste.adaptação, adaptação_exata, rtol=1e-8)
+
+
+def teste_resolvedor_desconhecido(parâmetros_de_teste):
+    parâmetros_de_teste["RESOLVEDOR_DO_SISTEMA_LINEAR"] = "jacobi"
+    with pytest.raises(ValueError):
+        PlacaEmBalanço(parâmetros_de_teste)
+
+
+def teste_pré_condicionador_compartilhado(parâmetros_de_teste, projeto_teste):
+    parâmetros_de_teste.update({"RESOLVEDOR_DO_SISTEMA_LINEAR": "gradientes_conjugados",
+                                "TOLERÂNCIA_INICIAL_DO_RESOLVEDOR": 1e-8,
+                                "PRÉ_CONDICIONADOR_DO_RESOLVEDOR": "elite"})
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    iterações_com_jacobi = projeto_teste.iterações
+    u_com_jacobi = projeto_teste.u
+
+    assert placa_em_balanço.compartilhar_pré_condicionador_de(projeto_teste)
+
+    placa_em_balanço.fenótipos_testados.limpar()
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    assert projeto_teste.iterações == 1
+    assert np.allclose(projeto_teste.u, u_com_jacobi)
+
+    # Um projeto que difere localmente do representativo ainda converge mais rápido que com Jacobi
+    projeto_teste.gene[0:4, 0:4] = ~projeto_teste.gene[0:4, 0:4]
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    assert projeto_teste.adaptação > 0
+    assert 0 < projeto_teste.iterações < iterações_com_jacobi / 2
+
+
+def teste_respostas_permitem_recalcular_a_adaptação(placa_em_balanço, projeto_teste, capsys):
+    placa_em_balanço.Dlim = 0.0000001
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    Acon, Ades, Dmax, erro_de_Dmax = projeto_teste.respostas
+    adaptação_original = projeto_teste.adaptação
+
+    assert erro_de_Dmax == 0
+    assert projeto_teste.intervalo_de_adaptação == (adaptação_original, adaptação_original)
+
+    # Um alfa maior penaliza mais o mesmo Dmax, sem que o fenótipo seja resolvido de novo
+    placa_em_balanço.alfa = 2 * placa_em_balanço.alfa
+    capsys.readouterr()
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    assert "já era conhecida pelo seu fenótipo" in capsys.readouterr().out
+    assert projeto_teste.respostas == (Acon, Ades, Dmax, 0)
+    assert projeto_teste.adaptação < adaptação_original
+    assert np.isclose(projeto_teste.adaptação, 1 / (Acon + placa_em_balanço.e * Ades
+                                                     + placa_em_balanço.alfa * (Dmax - placa_em_balanço.Dlim)))
+
+    # A adaptação de vários projetos é calculada de uma só vez
+    adaptações = placa_em_balanço.calcular_adaptação(np.array([Acon, Acon]), np.array([Ades, Ades + 1]),
+                                                     np.array([Dmax, 0]))
+    assert np.isclose(adaptações[0], projeto_teste.adaptação)
+    assert np.isclose(adaptações[1], 1 / (Acon + placa_em_balanço.e * (Ades + 1)))
+
+
+def teste_área_desconectada_depende_do_gene(placa_em_balanço, projeto_teste):
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    _, Ades, _, _ = projeto_teste.respostas
+
+    # Material isolado, sem vizinhos, não muda o fenótipo, mas aumenta a área desconectada
+    gene = np.pad(projeto_teste.gene, 1)
+    isolados = [(i, j) for i, j in np.argwhere(~projeto_teste.gene) if not gene[i:i + 3, j:j + 3].any()]
+    projeto_teste.gene[isolados[0]] = True
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    assert np.isclose(projeto_teste.respostas.Ades, Ades + placa_em_balanço.lado_dos_elementos ** 2)
+
+
+def teste_cache_compartilhado_entre_cenários_escalados(parâmetros_de_teste, projeto_teste, capsys, monkeypatch):
+    monkeypatch.setattr(PlacaEmBalanço, "caches_compartilhados", {})
+    parâmetros_de_teste["COMPARTILHAR_FENÓTIPOS_ENTRE_CENÁRIOS"] = True
+    padrão = PlacaEmBalanço(dict(parâmetros_de_teste))
+    pouca_espessura = PlacaEmBalanço({**parâmetros_de_teste, "ESPESSURA_DO_ELEMENTO": 0.001})
+    outra_malha = PlacaEmBalanço({**parâmetros_de_teste, "ORDEM_DE_REFINAMENTO_DA_MALHA": 22})
+
+    assert padrão.fenótipos_testados is pouca_espessura.fenótipos_testados
+    assert padrão.fenótipos_testados is not outra_malha.fenótipos_testados
+    assert np.isclose(pouca_espessura.fator_de_escala, 10 * padrão.fator_de_escala)
+
+    padrão.testar_adaptação(projeto_teste)
+    Dmax, u = projeto_teste.respostas.Dmax, projeto_teste.u
+
+    capsys.readouterr()
+    pouca_espessura.testar_adaptação(projeto_teste)
+    assert "já era conhecida pelo seu fenótipo" in capsys.readouterr().out
+    assert np.isclose(projeto_teste.respostas.Dmax, 10 * Dmax)
+    assert np.allclose(projeto_teste.u, 10 * u)
+
+    # A resposta escalada coincide com a obtida resolvendo o cenário do zero
+    parâmetros_de_teste["COMPARTILHAR_FENÓTIPOS_ENTRE_CENÁRIOS"] = False
+    PlacaEmBalanço({**parâmetros_de_teste, "ESPESSURA_DO_ELEMENTO": 0.001}).testar_adaptação(projeto_teste)
+    assert "já era conhecida pelo seu fenótipo" not in capsys.readouterr().out
+    assert np.isclose(projeto_teste.respostas.Dmax, 10 * Dmax)
+
+
+def teste_varredura_dos_parâmetros_escaláveis(placa_em_balanço, projeto_teste, capsys):
+    projeto_teste.adaptação_testada = False
+    cenários = [{}, {"ESPESSURA_DO_ELEMENTO": 0.001}, {"MAGNITUDE_DA_CARGA_APLICADA": 50e6,
+                                                        "MÓDULO_DE_YOUNG_DO_MATERIAL": 105e9}]
+    tabela = placa_em_balanço.varrer([projeto_teste], cenários)
+
+    assert list(tabela["Cenário"]) == [0, 1, 2]
+    assert list(tabela["ESPESSURA_DO_ELEMENTO"]) == [0.01, 0.001, 0.01]
+    assert tabela["Adaptação"][0] == projeto_teste.adaptação
+    assert np.isclose(tabela["Dmax"][1], 10 * projeto_teste.respostas.Dmax)
+    assert np.isclose(tabela["Dmax"][2], projeto_teste.respostas.Dmax)
+    assert tabela["Adaptação"][1] < tabela["Adaptação"][0]
+
+    # O projeto foi resolvido uma única vez
+    assert capsys.readouterr().out.count("conectado à borda") == 1
+
+    with pytest.raises(ValueError):
+        placa_em_balanço.varrer([projeto_teste], [{"COEFICIENTE_DE_POYSSON": 0.25}])
+
+
+def teste_cache_de_fenótipos_em_dois_níveis(parâmetros_de_teste, projeto_teste, capsys):
+    parâmetros_de_teste["FORMATO_DOS_DESLOCAMENTOS"] = "grade"
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    f, u, U, adaptação = projeto_teste.f, projeto_teste.u, projeto_teste.u_em_grade, projeto_teste.adaptação
+
+    # O cache amplo guarda só escalares; os campos dos melhores, em precisão simples
+    fenótipo, *_ = placa_em_balanço._determinar_fenótipo(projeto_teste.gene, placa_em_balanço.lado_dos_elementos)
+    chave = resumo_do_gene(fenótipo)
+    campos = placa_em_balanço.campos_dos_melhores.obter(chave)
+    assert isinstance(placa_em_balanço.fenótipos_testados[chave], ResumoDoFenótipo)
+    assert campos.u.dtype == np.float32
+
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    assert "já era conhecida pelo seu fenótipo" in capsys.readouterr().out
+    assert projeto_teste.adaptação == adaptação
+    assert np.allclose(projeto_teste.u, u, rtol=1e-6)
+    assert np.allclose(projeto_teste.u_em_grade, U, rtol=1e-6, equal_nan=True)
+
+    # Fora dos melhores, o projeto reaproveitado fica sem campos até que sejam reconstruídos
+    placa_em_balanço.campos_dos_melhores.limpar()
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    assert projeto_teste.u is None and projeto_teste.malha is None
+    assert projeto_teste.adaptação == adaptação
+
+    placa_em_balanço.reconstruir_campos(projeto_teste)
+    assert np.allclose(projeto_teste.u, u)
+    assert np.allclose(projeto_teste.f, f, equal_nan=True)
+    assert len(projeto_teste.malha.nós) == len(u) // 2
+
+
+def teste_campos_guardados_só_dos_melhores(parâmetros_de_teste, projeto_teste):
+    parâmetros_de_teste["MÁXIMO_DE_CAMPOS_GUARDADOS"] = 1
+    placa_em_balanço = PlacaEmBalanço(parâmetros_de_teste)
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    # Um fenótipo com mais material, e por isso menos adaptado, não desloca o guardado
+    projeto_teste.gene[:, :4] = True
+    placa_em_balanço.testar_adaptação(projeto_teste)
+
+    assert len(placa_em_balanço.fenótipos_testados) == 2
+    assert len(placa_em_balanço.campos_dos_melhores) == 1
+    assert placa_em_balanço.campos_dos_melhores.despejos == 0
+
+
+def teste_cache_persistente_de_fenótipos(parâmetros_de_teste, projeto_teste, tmp_path, capsys):
+    parâmetros_de_teste["CACHE_PERSISTENTE_DE_FENÓTIPOS"] = str(tmp_path / "fenótipos.sqlite")
+    PlacaEmBalanço(dict(parâmetros_de_teste)).testar_adaptação(projeto_teste)
+    adaptação = projeto_teste.adaptação
+    capsys.readouterr()
+
+    # Uma nova execução, mesmo com outra espessura, reaproveita o resultado
+    nova_execução = PlacaEmBalanço({**parâmetros_de_teste, "ESPESSURA_DO_ELEMENTO": 0.001})
+    nova_execução.testar_adaptação(projeto_teste)
+    assert "já era conhecida pelo seu fenótipo" in capsys.readouterr().out
+    assert projeto_teste.adaptação < adaptação
+
+    # Outro coeficiente de Poisson muda a física e invalida o resultado
+    outra_física = PlacaEmBalanço({**parâmetros_de_teste, "COEFICIENTE_DE_POYSSON": 0.25})
+    assert outra_física.impressão_física() != nova_execução.impressão_física()
+    outra_física.testar_adaptação(projeto_teste)
+    assert "já era conhecida pelo seu fenótipo" not in capsys.readouterr().out
+
+
+def teste_adaptação_em_lote_equivale_à_individual(parâmetros_de_teste, projeto_teste):
+    desconectado = projeto_teste.gene.copy()
+    desconectado[:, 0] = False
+    genes = np.stack([projeto_teste.gene, desconectado, projeto_teste.gene])
+
+    avaliação = PlacaEmBalanço(parâmetros_de_teste).testar_adaptação_em_lote(genes)
+    PlacaEmBalanço(parâmetros_de_teste).testar_adaptação(projeto_teste)
+
+    assert list(avaliação.adaptação) == [projeto_teste.adaptação, 0, projeto_teste.adaptação]
+    assert (avaliação.Acon[0], avaliação.Ades[0], avaliação.Dmax[0]) == projeto_teste.respostas[:3]
+    assert np.isnan(avaliação.Dmax[1]) and (avaliação.inferior[1], avaliação.superior[1]) == (0, 0)
+    assert len(PlacaEmBalanço(parâmetros_de_teste).testar_adaptação_em_lote(genes[:0]).adaptação) == 0
+
+
+def teste_lote_resolve_cada_fenótipo_uma_só_vez(placa_em_balanço, projeto_teste, monkeypatch):
+    gene_com_célula_isolada = projeto_teste.gene.copy()
+    i, j = next((i, j) for i in range(1, 19) for j in range(1, 39)
+                if not projeto_teste.gene[i - 1:i + 2, j - 1:j + 2].any())
+    gene_com_célula_isolada[i, j] = True
+    assert placa_em_balanço.identificar_fenótipo(gene_com_célula_isolada) == \
+           placa_em_balanço.identificar_fenótipo(projeto_teste.gene)
+
+    resolver_para = Mock(wraps=placa_em_balanço.resolver_para)
+    monkeypatch.setattr(placa_em_balanço, "resolver_para", resolver_para)
+    avaliação = placa_em_balanço.testar_adaptação_em_lote([projeto_teste.gene, gene_com_célula_isolada])
+
+    assert resolver_para.call_count == 1
+    assert avaliação.Dmax[0] == avaliação.Dmax[1] and avaliação.Ades[1] > avaliação.Ades[0]
+
+
+def teste_células_conectadas_coincidem_com_o_fenótipo(placa_em_balanço):
+    gerador = np.random.default_rng(0)
+    genes = [gerador.random((placa_em_balanço.n, 2 * placa_em_balanço.n)) < densidade
+             for densidade in (0.4, 0.6, 0.6, 0.8)]
+
+    # Numa pilha de genes, cada fenótipo é rotulado sem ligação com os genes vizinhos
+    chaves, fenótipos = placa_em_balanço.identificar_fenótipos(genes)
+    for gene, chave, fenótipo_do_lote in zip(genes, chaves, fenótipos):
+        fenótipo, borda_alcançada, *_ = placa_em_balanço._determinar_fenótipo(gene,
+                                                                               placa_em_balanço.lado_dos_elementos)
+
+        assert np.array_equal(placa_em_balanço._células_conectadas(gene), fenótipo)
+        assert np.array_equal(fenótipo_do_lote, fenótipo)
+        assert chave == placa_em_balanço.identificar_fenótipo(gene) == (resumo_do_gene(fenótipo), borda_alcançada)
+
+
+def teste_lote_só_constrói_malhas_dos_fenótipos_resolvidos(placa_em_balanço, projeto_teste, monkeypatch):
+    desconectado = projeto_teste.gene.copy()
+    desconectado[:, 0] = False
+    placa_em_balanço.testar_adaptação_em_lote([projeto_teste.gene])
+
+    # O fenótipo já conhecido e o desconectado da borda dispensam a busca que constrói nós e elementos
+    determinar_fenótipo = Mock(wraps=placa_em_balanço._determinar_fenótipo)
+    monkeypatch.setattr(placa_em_balanço, "_determinar_fenótipo", determinar_fenótipo)
+    placa_em_balanço.testar_adaptação_em_lote([projeto_teste.gene, desconectado])
+
+    assert determinar_fenótipo.call_count == 0
+
+
+def teste_estimativa_dos_graus_de_liberdade(placa_em_balanço, projeto_teste):
+    placa_em_balanço.testar_adaptação(projeto_teste)
+    graus_de_liberdade = placa_em_balanço.determinar_graus_de_liberdade(projeto_teste.malha)
+    fenótipo, *_ = placa_em_balanço._determinar_fenótipo(projeto_teste.gene, placa_em_balanço.lado_dos_elementos)
+
+    # A estimativa coincide com a malha quando só há material conectado, e a supera quando há desconectado
+    assert placa_em_balanço.estimar_graus_de_liberdade(fenótipo) == graus_de_liberdade
+    assert placa_em_balanço.estimar_graus_de_liberdade(projeto_teste.gene) > graus_de_liberdade
+
+    # Uma célula isolada acrescenta os seus quatro nós
+    gene = np.pad(fenótipo, 1)
+    isolados = [(i, j) for i, j in np.argwhere(~fenótipo) if not gene[i:i + 3, j:j + 3].any()]
+    fenótipo[isolados[0]] = True
+    assert placa_em_balanço.estimar_graus_de_liberdade(fenótipo) == graus_de_liberdade + 8
@@ -1,4 +1,3 @@
-import random
 from unittest.mock import Mock
 
 import pytest
@@ -16,9 +15,8 @@ def projeto_teste(placa_em_balanço):
     proj = Mock()
     proj.nome = "ProjetoTeste"
 
-    random.seed(0)
-    np.random.seed(0)
-    proj.gene = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2)[0]
+    proj.gene = placa_em_balanço.geração_0(n_de_indivíduos=1, espessura_interna_mínima=2,
+                                           geradores=[np.random.default_rng(0)])[0]
 
     return proj
 
@@ -34,7 +32,7 @@ def teste_geração_0(placa_em_balanço):
 def teste_testar_adaptação(placa_em_balanço, capsys, projeto_teste):
     placa_em_balanço.testar_adaptação(projeto_teste)
     assert projeto_teste.adaptação_testada
-    assert projeto_teste.adaptação == 0.9438414346389805
+    assert projeto_teste.adaptação == 0.941619585687382
 
     projeto_teste.gene[-1, 0] = False
     placa_em_balanço.testar_adaptação(projeto_teste)
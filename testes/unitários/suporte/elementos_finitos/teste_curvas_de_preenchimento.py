@@ -0,0 +1,49 @@
+import pytest
+
+from suporte.elementos_finitos.curvas_de_preenchimento import *
+
+
+@pytest.fixture
+def grade_8x8():
+    I, J = np.meshgrid(range(8), range(8), indexing="ij")
+    return I.flatten(), J.flatten()
+
+
+def teste_chaves_de_morton():
+    assert list(chaves_de_morton([0, 0, 1, 1, 2], [0, 1, 0, 1, 0])) == [0, 1, 2, 3, 8]
+
+
+@pytest.mark.parametrize("curva", ["morton", "hilbert"])
+def teste_chaves_são_uma_permutação(grade_8x8, curva):
+    I, J = grade_8x8
+    chaves = chaves_da_curva[curva](I, J)
+
+    assert sorted(chaves) == list(range(64))
+
+
+def teste_curva_de_hilbert_percorre_vizinhos(grade_8x8):
+    I, J = grade_8x8
+    ordem = np.argsort(chaves_de_hilbert(I, J, 3))
+    passos = np.abs(np.diff(I[ordem])) + np.abs(np.diff(J[ordem]))
+
+    assert np.all(passos == 1)
+
+
+def teste_reordenar():
+    nós = [Nó(0, 0, etiqueta="a"), Nó(1, 0, etiqueta="b"), Nó(2, 0, etiqueta="c")]
+    elementos = [Elemento((nós[1], nós[2])), Elemento((nós[0], nós[1]))]
+    me = np.array([[2, 0],
+                   [3, 1],
+                   [4, 2],
+                   [5, 3]])
+
+    elementos, nós, me = reordenar(elementos, nós, me,
+                                   chaves_dos_elementos=np.array([1, 0]),
+                                   chaves_dos_nós=np.array([2, 1, 0]))
+
+    assert [nó.etiqueta for nó in nós] == ["c", "b", "a"]
+    assert [[nó.etiqueta for nó in e.nós] for e in elementos] == [["a", "b"], ["b", "c"]]
+    assert np.all(me == np.array([[4, 2],
+                                  [5, 3],
+                                  [2, 0],
+                                  [3, 1]]))
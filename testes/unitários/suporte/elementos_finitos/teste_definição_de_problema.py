@@ -38,3 +38,8 @@ def teste_resolver_para(problema_teste):
     assert np.all(f == np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, -1, 0, 0]))
     assert np.all(u == np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, -1, 0, 0]))
     assert malha == "malha"
+
+
+def teste_avaliação_em_lote_é_opcional(problema_teste):
+    with pytest.raises(NotImplementedError):
+        problema_teste.testar_adaptação_em_lote([np.ones((2, 4), dtype=bool)])
@@ -115,3 +115,30 @@ def teste_Ke_base_pronta(Ke_base, monkeypatch):
         patch.setattr(pickle, "dump", fazer_nada)
 
         assert Ke_base.matriz == KeBaseImplementada.pronta(cache="qualquer").matriz
+
+
+def teste_MalhaAdaptativa_condensar_e_interpolar():
+    # Nó 1 é pendente entre os nós 0 e 2, com pesos 0.25 e 0.75
+    restrições = {1: [(0, 0.25), (2, 0.75)]}
+    malha = MalhaAdaptativa([], [Nó(0, 0), Nó(1, 0), Nó(4, 0)], np.zeros((8, 0)), restrições=restrições)
+
+    np.random.seed(0)
+    A = np.random.random((6, 6))
+    K = A @ A.T
+
+    T = np.identity(6)
+    for g in (0, 1):
+        T[2 + g, :] = 0
+        T[2 + g, g] = 0.25
+        T[2 + g, 4 + g] = 0.75
+
+    K_esperada = T.T @ K @ T
+    K_esperada[2:4, :] = K_esperada[:, 2:4] = 0
+    K_esperada[2, 2] = K_esperada[3, 3] = 1
+
+    malha.condensar(K)
+    assert np.allclose(K, K_esperada)
+
+    u = np.array([1.0, 2.0, np.nan, np.nan, 5.0, 6.0])
+    malha.interpolar_nós_pendentes(u)
+    assert np.allclose(u, [1, 2, 4, 5, 5, 6])
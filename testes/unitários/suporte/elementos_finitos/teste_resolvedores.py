@@ -0,0 +1,80 @@
+import pickle
+
+import pytest
+
+from suporte.elementos_finitos.resolvedores import *
+
+
+@pytest.fixture
+def sistema_spd():
+    np.random.seed(0)
+    A = np.random.random((30, 30))
+    K = A @ A.T + 30 * np.eye(30)
+    f = np.random.random(30)
+    return K, f
+
+
+def teste_gradientes_conjugados_converge_para_a_solução_direta(sistema_spd):
+    K, f = sistema_spd
+    resultado = gradientes_conjugados(K, f, tolerância=1e-12)
+
+    assert np.allclose(resultado.u, np.linalg.solve(K, f))
+    assert resultado.resíduo_relativo <= 1e-12
+    assert 0 < resultado.iterações <= 30
+
+
+def teste_erro_estimado_acompanha_o_erro(sistema_spd):
+    K, f = sistema_spd
+    u_exato = np.linalg.solve(K, f)
+
+    frouxo = gradientes_conjugados(K, f, tolerância=1e-2)
+    apertado = gradientes_conjugados(K, f, tolerância=1e-8)
+
+    assert apertado.erro_estimado < frouxo.erro_estimado
+    assert np.linalg.norm(frouxo.u - u_exato) <= 10 * frouxo.erro_estimado
+
+
+def teste_chute_inicial_exato_dispensa_iterações(sistema_spd):
+    K, f = sistema_spd
+    resultado = gradientes_conjugados(K, f, chute_inicial=np.linalg.solve(K, f), tolerância=1e-8)
+
+    assert resultado.iterações == 0
+    assert resultado.erro_estimado == 0
+
+
+def teste_pré_condicionador_compartilhado(sistema_spd):
+    K, f = sistema_spd
+    etiquetas = [(i, 0) for i in range(30)]
+    compartilhado = PréCondicionadorCompartilhado(K, etiquetas, discrepância_máxima=0.3)
+
+    # O próprio sistema representativo é resolvido numa única iteração
+    assert gradientes_conjugados(K, f, compartilhado.para(K, etiquetas), tolerância=1e-10).iterações == 1
+
+    # Um sistema semelhante, com graus de liberdade a menos e a mais, converge mais rápido que com Jacobi
+    outras_etiquetas = etiquetas[5:] + [(30, 0), (31, 0)]
+    K_outro = np.eye(27) * K[0, 0]
+    K_outro[:25, :25] = K[5:, 5:]
+    f_outro = np.ones(27)
+
+    compartilhado_adaptado = gradientes_conjugados(K_outro, f_outro, compartilhado.para(K_outro, outras_etiquetas),
+                                                   tolerância=1e-10)
+    jacobi = gradientes_conjugados(K_outro, f_outro, tolerância=1e-10)
+
+    assert np.allclose(compartilhado_adaptado.u, np.linalg.solve(K_outro, f_outro))
+    assert compartilhado_adaptado.iterações < jacobi.iterações
+
+    # 7 de 27 graus de liberdade sem correspondente excedem a discrepância máxima padrão
+    assert PréCondicionadorCompartilhado(K, etiquetas).para(K_outro, outras_etiquetas) is None
+
+
+def teste_pré_condicionador_compartilhado_serializa_só_a_rigidez(sistema_spd):
+    K, f = sistema_spd
+    etiquetas = [(i, 0) for i in range(30)]
+    compartilhado = PréCondicionadorCompartilhado(K, etiquetas)
+
+    # A fatoração aplica a inversa da rigidez sem formá-la
+    assert np.allclose(compartilhado.para(K, etiquetas)(f), np.linalg.solve(K, f))
+
+    cópia = pickle.loads(pickle.dumps(compartilhado))
+    assert cópia._fator is None
+    assert np.allclose(cópia.para(K, etiquetas)(f), np.linalg.solve(K, f))
@@ -0,0 +1,40 @@
+import pickle
+
+import numpy as np
+
+from suporte.aleatoriedade import *
+
+
+def teste_fluxos_independem_da_ordem_de_consumo():
+    em_ordem, invertidos = FluxosAleatórios(7), FluxosAleatórios(7)
+
+    sorteios = [em_ordem.gerador(3, "mutação", i).random(5) for i in range(4)]
+    sorteios_invertidos = [invertidos.gerador(3, "mutação", i).random(5) for i in reversed(range(4))][::-1]
+
+    assert all(np.array_equal(a, b) for a, b in zip(sorteios, sorteios_invertidos))
+    assert not np.array_equal(sorteios[0], sorteios[1])
+
+    # A mesma chave dá o mesmo fluxo numa cópia enviada a outro processo
+    cópia = pickle.loads(pickle.dumps(FluxosAleatórios(7)))
+    assert np.array_equal(cópia.gerador(3, "mutação", 2).random(5), sorteios[2])
+
+
+def teste_fluxo_continua_na_mesma_geração():
+    fluxos = FluxosAleatórios(0)
+    primeiro = fluxos.gerador(0, "crossover", 1).random()
+
+    assert fluxos.gerador(0, "crossover", 1).random() != primeiro
+    assert fluxos.gerador(1, "crossover", 1).random() != primeiro
+
+    # Voltar a uma geração reabre os seus fluxos do início
+    assert fluxos.gerador(0, "crossover", 1).random() == primeiro
+
+
+def teste_semente_sorteada_do_gerador_global():
+    np.random.seed(0)
+    semente = FluxosAleatórios().semente
+    np.random.seed(0)
+
+    assert FluxosAleatórios().semente == semente
+    assert FluxosAleatórios(semente).gerador(0, "reprodução").random() != FluxosAleatórios(semente + 1).gerador(
+        0, "reprodução").random()
@@ -1,6 +1,8 @@
 import pytest
+from unittest.mock import Mock
 
 from suporte.algoritmo_genético import *
+from suporte.cache import FiltroDeBloom, resumo_do_gene, tamanho_aproximado
 
 
 @pytest.fixture
@@ -31,7 +33,7 @@ def ambiente_teste(indivíduos_teste):
                 bit_virado = "0" if ind.gene[i] == "1" else "1"
                 ind.gene = ind.gene[:i] + bit_virado + ind.gene[i+1:]
 
-    return AmbienteTeste()
+    return AmbienteTeste(semente=0)
 
 
 def teste_comparação_de_indivíduos(indivíduos_teste):
@@ -41,12 +43,11 @@ def teste_comparação_de_indivíduos(indivíduos_teste):
 
 
 def teste_avançar_geração(ambiente_teste, indivíduos_teste):
-    resultante = [Indivíduo(gene='1100', nome='G0_4', adaptação=12, adaptação_testada=True),
+    resultante = [Indivíduo(gene='1011', nome='G0_2', adaptação=15, adaptação_testada=True),
+                  Indivíduo(gene='1100', nome='G0_4', adaptação=12, adaptação_testada=True),
                   Indivíduo(gene='1011', nome='G0_3', adaptação=11, adaptação_testada=True),
-                  Indivíduo(gene='0000', nome='G0_1', adaptação=8, adaptação_testada=False),
-                  Indivíduo(gene='1100', nome='G0_2', adaptação=8, adaptação_testada=False)]
+                  Indivíduo(gene='0000', nome='G0_1', adaptação=8, adaptação_testada=True)]
 
-    np.random.seed(0)
     ambiente_teste.avançar_gerações(1)
 
     assert ambiente_teste.n_da_geração == 1
@@ -66,8 +67,7 @@ def teste_seleção_natural(ambiente_teste, indivíduos_teste):
 
 
 def teste_reprodução(ambiente_teste, indivíduos_teste):
-    np.random.seed(1)
-    indivíduos_esperados = [Indivíduo(gene='1010', nome='G0_1', adaptação=10, adaptação_testada=True),
+    indivíduos_esperados = [Indivíduo(gene='1001', nome='G0_1', adaptação=9, adaptação_testada=True),
                             Indivíduo(gene='1010', nome='G0_2', adaptação=10, adaptação_testada=True)]
     indivíduos_retornados = ambiente_teste.reprodução(indivíduos_teste[:2])
 
@@ -83,3 +83,191 @@ def teste_reprodução(ambiente_teste, indivíduos_teste):
 def teste_representação_do_ambiente(ambiente_teste):
     assert repr(ambiente_teste).startswith("Geração 0 de População de 4 indivíduos:")
     assert str(ambiente_teste).startswith("População de 4 indivíduos em sua geração 0:\n")
+
+
+def teste_intervalos_ambíguos():
+    inferiores = np.array([0.90, 0.85, 0.50, 0.10, 0.10])
+    superiores = np.array([1.00, 0.95, 0.60, 0.55, 0.55])
+
+    # Só os dois primeiros disputam a elite; o terceiro e as duas cópias disputam o corte dos 3 melhores
+    assert list(intervalos_ambíguos(inferiores, superiores, cortes=(1,))) == [True, True, False, False, False]
+    assert list(intervalos_ambíguos(inferiores, superiores, cortes=(3,))) == [False, False, True, True, True]
+    assert list(intervalos_ambíguos(inferiores, superiores, cortes=(2,))) == [False, False, False, False, False]
+
+
+def teste_cache_de_genes_próprio_de_cada_ambiente(ambiente_teste, indivíduos_teste):
+    ambiente_teste.genes_vistos = FiltroDeBloom(100)
+    ambiente_teste.seleção_natural()
+
+    # Genes nunca vistos são testados sem consulta ao cache
+    assert ambiente_teste.genes_testados.estatísticas()["falhas"] == 0
+    assert len(ambiente_teste.genes_testados) == 2
+
+    outro_ambiente = type(ambiente_teste)(máximo_de_genes_testados=1)
+    assert len(outro_ambiente.genes_testados) == 0
+
+    # Genes repetidos são restaurados do cache
+    ambiente_teste._conseguir_adaptação(Indivíduo("1011", "G1_1"))
+    assert ambiente_teste.genes_testados.acertos == 1
+
+
+def teste_identificador_acompanha_o_gene(indivíduos_teste):
+    ind = indivíduos_teste[0]
+    id_original = ind.id
+
+    ind.gene = "1111"
+    assert ind.id != id_original
+    assert ind.id == Indivíduo("1111", "outro").id
+
+    # Modificações no lugar só são vistas após invalidar o identificador guardado
+    ind = Indivíduo(np.zeros(4, dtype=bool), "no_lugar")
+    id_original = ind.id
+    ind.gene[0] = True
+    assert ind.id == id_original
+    ind.invalidar_id()
+    assert ind.id == resumo_do_gene(ind.gene) != id_original
+
+
+def teste_filtro_de_genes_vistos_só_quando_dimensionado(ambiente_teste):
+    assert ambiente_teste.genes_vistos is None
+    assert type(ambiente_teste)(avaliações_esperadas=100).genes_vistos.bits == 959
+
+
+@pytest.mark.parametrize("registro", ["filtro", "cache"])
+def teste_reprodução_evita_duplicatas(ambiente_teste, indivíduos_teste, registro):
+    # Sem o filtro de genes vistos, as duplicatas são reconhecidas pelo cache de genes
+    if registro == "filtro":
+        ambiente_teste.genes_vistos = FiltroDeBloom(100)
+    for ind in indivíduos_teste:
+        if registro == "filtro":
+            ambiente_teste.genes_vistos.registrar(ind.id)
+        else:
+            ambiente_teste.genes_testados[ind.id] = ind.adaptação
+
+    # Os pais só geram filhos novos por acaso: o crossover sorteia um entre os pais como primeiro
+    def crossover_aleatório(pai1, pai2, i):
+        pai = pai1 if np.random.random() < 0.5 else pai2
+        return Indivíduo(pai.gene[:2] + ("00" if np.random.random() < 0.2 else pai.gene[2:]), f"G1_{i}")
+
+    ambiente_teste.crossover = crossover_aleatório
+    ambiente_teste.n_de_indivíduos = 3
+    np.random.seed(0)
+
+    genes_vistos = {ind.gene for ind in indivíduos_teste}
+
+    ambiente_teste.evitar_duplicatas = False
+    assert ambiente_teste.reprodução(indivíduos_teste[:2])[0].gene in genes_vistos
+
+    ambiente_teste.evitar_duplicatas = True
+    assert ambiente_teste.reprodução(indivíduos_teste[:2])[0].gene == "1000"
+
+
+def teste_orçamento_de_memória_descarta_as_gerações_passadas(ambiente_teste):
+    np.random.seed(0)
+    ambiente_teste.avançar_gerações(2)
+    assert len(ambiente_teste.gerações) == 3
+    assert orçamento_de_memória.uso()["gerações"] > 0
+
+    try:
+        orçamento_de_memória.configurar(1)
+        orçamento_de_memória.reequilibrar()
+    finally:
+        orçamento_de_memória.configurar(None)
+
+    assert len(ambiente_teste.gerações) == 1 and ambiente_teste.gerações[0] is ambiente_teste.população
+    assert len(ambiente_teste.genes_testados) == 0
+
+
+def teste_bytes_das_gerações_guardados_por_geração(ambiente_teste):
+    np.random.seed(0)
+    ambiente_teste.avançar_gerações(3)
+
+    # Cada indivíduo passado é contado na última geração em que aparece
+    correntes = {id(ind) for ind in ambiente_teste.população}
+    última_geração_de = {id(ind): k for k, geração in enumerate(ambiente_teste.gerações) for ind in geração
+                         if id(ind) not in correntes}
+    bytes_antes = ambiente_teste._bytes_das_gerações()
+    assert bytes_antes == sum(tamanho_aproximado(valor)
+                              for k, geração in enumerate(ambiente_teste.gerações)
+                              for valor in {id(valor): valor for ind in geração if última_geração_de.get(id(ind)) == k
+                                            for valor in vars(ind).values()}.values())
+
+    # Gerações seguidas por outras não são recalculadas, e as descartadas liberam os bytes guardados
+    ambiente_teste._bytes_da_geração = Mock(side_effect=AssertionError("Nenhuma geração deve ser recalculada"))
+    assert ambiente_teste._bytes_das_gerações() == bytes_antes
+    liberados = ambiente_teste._liberar_gerações(1)
+    assert len(ambiente_teste.gerações) == 3 and 0 < liberados
+    assert ambiente_teste._bytes_das_gerações() == bytes_antes - liberados
+
+
+class AmbienteDeSoma(Ambiente):
+    # Definido no módulo para que processos possam recebê-lo
+
+    def geração_0(self) -> List[Indivíduo]:
+        return [Indivíduo(gene, f"G0_{i}") for i, gene in enumerate(("1001", "1010", "1011", "1100", "0110", "0011"))]
+
+    def testar_adaptação(self, indivíduo: Indivíduo) -> None:
+        indivíduo.adaptação = int(indivíduo.gene, 2) + 1
+        indivíduo.adaptação_testada = True
+
+    def crossover(self, pai1: Indivíduo, pai2: Indivíduo, i: int) -> Indivíduo:
+        return Indivíduo(pai1.gene[:2] + pai2.gene[2:], f"G{self.n_da_geração}_{i}")
+
+    def mutação(self, geração: List[Indivíduo]) -> None:
+        pass
+
+
+@pytest.mark.parametrize("executor", ["threads", "processos"])
+def teste_executores_avaliam_como_em_série(executor):
+    populações = []
+    for ambiente in (AmbienteDeSoma(semente=0), AmbienteDeSoma(executor=executor, processos=2, semente=0)):
+        ambiente.avançar_gerações(3)
+        ambiente.encerrar_executor()
+        populações.append([(ind.gene, ind.adaptação, ind.adaptação_testada) for ind in ambiente.população])
+
+    assert populações[0] == populações[1]
+
+
+def teste_executor_desconhecido():
+    with pytest.raises(ValueError):
+        AmbienteDeSoma(executor="gpu")
+
+
+class AmbienteDeSomaEstacionário(AmbienteEstacionário, AmbienteDeSoma):
+    pass
+
+
+@pytest.mark.parametrize("executor, substituição", [("serial", "pior"), ("threads", "torneio"), ("processos", "pior")])
+def teste_ambiente_estacionário(executor, substituição):
+    np.random.seed(0)
+    ambiente = AmbienteDeSomaEstacionário(executor=executor, processos=2, substituição=substituição)
+    adaptações_iniciais = sorted(int(ind.gene, 2) + 1 for ind in ambiente.população)
+
+    ambiente.avançar_gerações(2)
+    ambiente.encerrar_executor()
+
+    # Cada geração equivalente recebe tantos filhos quanto a população tem indivíduos
+    assert ambiente.n_da_geração == 2 and len(ambiente.gerações) == 3
+    assert len(ambiente.população) == 6 and ambiente.população == sorted(ambiente.população, reverse=True)
+    assert all(ind.adaptação == int(ind.gene, 2) + 1 for ind in ambiente.população)
+
+    # Filhos só substituem indivíduos menos adaptados
+    assert all(atual >= inicial for atual, inicial in zip(sorted(ind.adaptação for ind in ambiente.população),
+                                                           adaptações_iniciais))
+    melhores = [estatísticas["melhor"] for estatísticas in ambiente.estatísticas_das_gerações]
+    assert melhores == sorted(melhores) and melhores[0] >= adaptações_iniciais[-1]
+    assert all(0 <= estatísticas["ocupação"] <= 1 for estatísticas in ambiente.estatísticas_das_gerações)
+
+    with pytest.raises(ValueError):
+        AmbienteDeSomaEstacionário(substituição="roleta")
+
+
+def teste_gerações_equivalentes_fechadas_não_mudam():
+    ambiente = AmbienteDeSomaEstacionário(semente=0)
+    ambiente.avançar_gerações(3)
+
+    assert ambiente.gerações[-1] is not ambiente.população
+    for geração, estatísticas in zip(ambiente.gerações[1:], ambiente.estatísticas_das_gerações):
+        adaptações = [ind.adaptação for ind in geração]
+        assert adaptações == sorted(adaptações, reverse=True)
+        assert adaptações[0] == estatísticas["melhor"] and np.mean(adaptações) == estatísticas["média"]
@@ -0,0 +1,148 @@
+import os
+import pickle
+import multiprocessing
+
+import numpy as np
+
+from suporte.cache import *
+
+
+def teste_resumo_do_gene():
+    gene = np.zeros((20, 40), dtype=bool)
+    gene[3, 5] = True
+
+    assert len(resumo_do_gene(gene)) == 16
+    assert resumo_do_gene(gene) == resumo_do_gene(gene.copy())
+    assert resumo_do_gene(gene) != resumo_do_gene(~gene)
+
+    # Os mesmos bits compactados em outro formato não colidem
+    assert resumo_do_gene(np.zeros((4, 2), dtype=bool)) != resumo_do_gene(np.zeros((2, 4), dtype=bool))
+
+    assert resumo_do_gene("1001") != resumo_do_gene("1010")
+
+
+def teste_despejo_por_entradas():
+    cache = CacheLRU(máximo_de_entradas=2)
+    cache["a"], cache["b"] = 1, 2
+
+    # Obter "a" o renova, de modo que "b" é o despejado
+    assert cache.obter("a") == 1
+    cache["c"] = 3
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.obter("b") is None
+    estatísticas = cache.estatísticas()
+    assert estatísticas.pop("bytes_ocupados") == cache.bytes_ocupados > 0
+    assert estatísticas == {"entradas": 2, "acertos": 1, "falhas": 1, "despejos": 1}
+
+
+def teste_despejo_por_bytes():
+    cache = CacheLRU(máximo_de_bytes=2500, tamanho_de=lambda objeto: objeto.nbytes if hasattr(objeto, "nbytes") else 0)
+    for k in range(5):
+        cache[k] = np.zeros(1000, dtype=np.uint8)
+
+    assert len(cache) == 2
+    assert cache.bytes_ocupados == 2000
+    assert cache.despejos == 3
+
+    # Uma entrada maior que o limite ainda é mantida, sozinha
+    cache["grande"] = np.zeros(3000, dtype=np.uint8)
+    assert len(cache) == 1 and "grande" in cache
+
+    cache.limpar()
+    assert len(cache) == 0 and cache.bytes_ocupados == 0 and cache.despejos == 0
+
+
+def teste_cache_é_serializável():
+    cache = CacheLRU(máximo_de_entradas=3)
+    cache["a"] = (1.0, (0.5, 0.1, 0.002, 0.0))
+
+    cópia = pickle.loads(pickle.dumps(cache))
+    assert cópia["a"] == cache["a"]
+    assert cópia.máximo_de_entradas == 3
+
+
+def teste_cache_dos_melhores():
+    cache = CacheDosMelhores(capacidade=2)
+
+    assert cache.guardar("a", 1, mérito=0.5)
+    assert cache.guardar("b", 2, mérito=0.7)
+    assert not cache.guardar("c", 3, mérito=0.1)
+
+    assert cache.guardar("d", 4, mérito=0.9)
+    assert "a" not in cache and cache.despejos == 1
+    assert cache.obter("d") == 4 and cache.obter("a") is None
+    estatísticas = cache.estatísticas()
+    assert estatísticas.pop("bytes_ocupados") == cache.bytes_ocupados > 0
+    assert estatísticas == {"entradas": 2, "acertos": 1, "falhas": 1, "despejos": 1}
+
+
+def _registrar_no(cache, chave):
+    cache[chave] = os.getpid()
+    return cache.obter("mestre")
+
+
+def teste_cache_compartilhado_entre_processos():
+    local = CacheLRU(máximo_de_entradas=10)
+    local["mestre"] = 0
+
+    with multiprocessing.Manager() as gerenciador:
+        cache = tornar_compartilhado(local, gerenciador.dict())
+
+        # Os trabalhadores veem as entradas anteriores ao compartilhamento, e o mestre vê as que eles escrevem
+        with multiprocessing.Pool(2) as fila:
+            assert fila.starmap(_registrar_no, [(cache, k) for k in range(4)]) == [0, 0, 0, 0]
+
+        assert len(cache) == 5 and len(cache.local) == 1
+        assert cache.obter(3) is not None
+        assert cache.obter(3) is not None
+        assert cache.estatísticas()["acertos_remotos"] == 1
+
+        cópia = pickle.dumps(cache)
+
+    # Sem o gerenciador, uma cópia segue apenas com sua parte local
+    cópia = pickle.loads(cópia)
+    assert cópia.remoto is None
+    assert cópia.obter("mestre") is None
+    cópia["nova"] = 1
+    assert cópia.obter("nova") == 1
+
+
+def teste_cache_persistente(tmp_path):
+    cache = CachePersistente(tmp_path / "cache.sqlite", espaço="física_1")
+    cache[b"a"] = (1.0, 0.0, 1e-8)
+    assert cache.obter(b"a") == (1.0, 0.0, 1e-8)
+    assert cache.obter(b"b") is None
+
+    # Outra execução, noutro processo ou depois desta, lê o que foi escrito
+    outra_execução = pickle.loads(pickle.dumps(cache))
+    assert b"a" in outra_execução and len(outra_execução) == 1
+
+    # Um espaço diferente não enxerga as entradas do anterior
+    outra_física = CachePersistente(tmp_path / "cache.sqlite", espaço="física_2")
+    assert outra_física.obter(b"a") is None
+    outra_física[b"c"] = 2
+
+    assert outra_física.descartar_outros_espaços() == 1
+    assert len(cache) == 0 and len(outra_física) == 1
+    assert cache.estatísticas() == {"entradas": 0, "acertos": 1, "falhas": 1}
+
+    cache.fechar()
+    outra_física.limpar()
+    assert len(outra_física) == 0
+
+
+def teste_filtro_de_bloom():
+    filtro = FiltroDeBloom(chaves_esperadas=1000, taxa_de_falsos_positivos=0.01)
+    registradas = [resumo_do_gene(np.array([k], dtype=np.int64)) for k in range(1000)]
+    for chave in registradas:
+        filtro.registrar(chave)
+
+    # Nenhum falso negativo, e falsos positivos próximos da taxa pedida
+    assert all(chave in filtro for chave in registradas)
+    falsos_positivos = np.mean([resumo_do_gene(np.array([k], dtype=np.int64)) in filtro for k in range(1000, 11000)])
+    assert falsos_positivos < 0.03
+    assert filtro.taxa_de_falsos_positivos_estimada() < 0.03
+
+    # Cerca de 9,6 bits por chave
+    assert filtro.bits == 9586 and filtro.posições == 7
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from suporte.algoritmo_genético import Ambiente, Indivíduo
+from suporte.ilhas import *
+
+
+class AmbienteDeBits(Ambiente):
+    # Definido no módulo para que os processos das ilhas possam recebê-lo
+
+    def geração_0(self):
+        return [Indivíduo("".join(random.choice("01") for _ in range(8)), f"G0_{i}") for i in range(6)]
+
+    def testar_adaptação(self, indivíduo):
+        indivíduo.adaptação = int(indivíduo.gene, 2) + 1
+        indivíduo.adaptação_testada = True
+
+    def crossover(self, pai1, pai2, i):
+        corte = random.randrange(1, 8)
+        return Indivíduo(pai1.gene[:corte] + pai2.gene[corte:], f"G{self.n_da_geração}_{i}")
+
+    def mutação(self, geração):
+        for ind in geração:
+            k = random.randrange(8)
+            ind.gene = ind.gene[:k] + ("1" if ind.gene[k] == "0" else "0") + ind.gene[k + 1:]
+
+
+def construir_ambiente(ilha):
+    return AmbienteDeBits()
+
+
+def teste_destinos_da_migração():
+    assert destinos_da_migração("anel", 4, semente=0, migração=1) == [1, 2, 3, 0]
+
+    for migração in range(5):
+        destinos = destinos_da_migração("aleatória", 5, semente=0, migração=migração)
+        assert sorted(destinos) == list(range(5)) and all(destino != k for k, destino in enumerate(destinos))
+        assert destinos == destinos_da_migração("aleatória", 5, semente=0, migração=migração)
+
+    with pytest.raises(ValueError):
+        destinos_da_migração("estrela", 4, semente=0, migração=1)
+
+
+@pytest.mark.parametrize("topologia", topologias)
+def teste_evoluir_em_ilhas(topologia):
+    resultado = evoluir_em_ilhas(construir_ambiente, n_de_ilhas=3, gerações=4, migrantes=1, intervalo=2,
+                                 topologia=topologia, semente=1)
+
+    assert resultado.melhores.shape == resultado.tempos.shape == (4, 3)
+    assert all(len(ambiente.população) == 6 and ambiente.n_da_geração == 4 for ambiente in resultado.ambientes)
+
+    # O melhor de cada ilha é preservado pela seleção, e as migrações só trocam os piores
+    assert (resultado.convergência[1:] >= resultado.convergência[:-1]).all()
+
+    # Cada ilha evolui com a sua própria semente
+    assert len({tuple(ind.gene for ind in ambiente.gerações[0]) for ambiente in resultado.ambientes}) == 3
+
+
+def teste_comparar_com_população_única():
+    comparação = comparar_com_população_única(construir_ambiente, n_de_ilhas=2, gerações=3, intervalo=1)
+
+    assert len(comparação["convergência_da_população_única"]) == len(comparação["convergência_das_ilhas"]) == 3
+    assert comparação["aceleração"] > 0 and comparação["aceleração_até_a_mesma_adaptação"] > 0
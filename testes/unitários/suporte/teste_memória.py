@@ -0,0 +1,70 @@
+import gc
+
+import pytest
+
+from suporte.cache import CacheLRU, CacheDosMelhores, FiltroDeBloom
+from suporte.memória import *
+
+
+def teste_interpretar_tamanho():
+    assert interpretar_tamanho("8GB") == 8 * 10 ** 9
+    assert interpretar_tamanho("512 MiB") == 512 * 2 ** 20
+    assert interpretar_tamanho("1.5kb") == 1500
+    assert interpretar_tamanho(1000) == 1000
+    assert interpretar_tamanho(None) is None
+
+    with pytest.raises(ValueError):
+        interpretar_tamanho("8 gigas")
+
+
+def _cache_com(entradas: int, acertos: int) -> CacheLRU:
+    cache = CacheLRU(tamanho_de=lambda objeto: 100)
+    for k in range(entradas):
+        cache[k] = k
+    for _ in range(acertos):
+        cache.obter(0)
+    return cache
+
+
+def teste_liberação_começa_pelo_menor_valor_por_byte():
+    orçamento = OrçamentoDeMemória("4kB")
+    pouco_usado, muito_usado = _cache_com(10, acertos=1), _cache_com(10, acertos=50)
+    orçamento.registrar("pouco_usado", pouco_usado)
+    orçamento.registrar("muito_usado", muito_usado)
+    orçamento.registrar("muito_usado", muito_usado)
+
+    # Cada entrada ocupa 200 bytes, entre chave e valor: 4 kB no total, sem contar o registro repetido
+    assert orçamento.uso() == {"pouco_usado": 2000, "muito_usado": 2000}
+    assert orçamento.reequilibrar() == 0
+
+    muito_usado[10] = 10
+    assert orçamento.reequilibrar() == 200
+    assert len(pouco_usado) == 9 and len(muito_usado) == 11
+
+    # Componentes de tamanho fixo ficam por último e não liberam nada
+    orçamento.registrar("filtro", FiltroDeBloom(1000))
+    orçamento.configurar(1000)
+    orçamento.reequilibrar()
+    assert len(pouco_usado) == 0 and len(muito_usado) == 5
+
+
+def teste_cache_dos_melhores_libera_os_de_menor_mérito():
+    cache = CacheDosMelhores(capacidade=3, tamanho_de=lambda objeto: 100)
+    for chave, mérito in (("a", 0.5), ("b", 0.9), ("c", 0.1)):
+        cache.guardar(chave, chave, mérito)
+
+    assert cache.bytes_ocupados == 600
+    assert cache.liberar(300) == 400
+    assert "b" in cache and len(cache) == 1
+
+
+def teste_componentes_descartados_saem_do_orçamento():
+    orçamento = OrçamentoDeMemória()
+    cache = _cache_com(3, acertos=0)
+    orçamento.registrar("cache", cache)
+    orçamento.registrar("avulso", Componente(lambda: 123))
+
+    del cache
+    gc.collect()
+    assert orçamento.uso() == {}
+    assert "sem limite" in orçamento.relatório()
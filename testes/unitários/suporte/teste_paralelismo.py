@@ -0,0 +1,148 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from suporte.paralelismo import *
+from suporte.paralelismo import _faixas_por_custo
+
+
+def _somar_bits(contexto, gene):
+    return contexto + int(gene.sum()), os.getpid()
+
+
+def teste_empacotar_gene():
+    gene = np.random.default_rng(0).random((5, 11)) > 0.5
+    pacote = empacotar_gene(gene)
+
+    assert pacote[0].nbytes == 7
+    assert np.array_equal(desempacotar_gene(pacote), gene)
+    assert desempacotar_gene(empacotar_gene("1001")) == "1001"
+
+
+def teste_fila_de_avaliação_reaproveita_os_trabalhadores():
+    genes = [np.eye(4, dtype=bool), np.zeros((4, 4), dtype=bool), np.ones((4, 4), dtype=bool)]
+
+    with FilaDeAvaliação(_somar_bits, 100, processos=2) as fila:
+        resultados = fila.avaliar_genes(genes)
+        assert [valor for valor, _ in resultados] == [104, 100, 116]
+
+        processos = {pid for _, pid in resultados} | {pid for _, pid in fila.avaliar_genes(genes)}
+        assert len(processos) <= 2 and os.getpid() not in processos
+
+        # Um novo contexto reinicia os trabalhadores
+        fila.atualizar(0)
+        assert [valor for valor, _ in fila.avaliar_genes(genes)] == [4, 0, 16]
+
+    assert fila._pool is None
+
+
+def _contar_linhas(contexto, gene):
+    return gene.sum(axis=1)[:contexto]
+
+
+def teste_fila_de_avaliação_por_memória_compartilhada():
+    genes = [np.tri(3, 5, k, dtype=bool) for k in range(-1, 4)]
+
+    with FilaDeAvaliação(_contar_linhas, 2, processos=2, tarefas_por_processo=2, valores_por_resultado=2) as fila:
+        resultados = fila.avaliar_genes(genes)
+        assert isinstance(resultados, np.ndarray) and resultados.shape == (5, 2)
+        assert np.array_equal(resultados, [gene.sum(axis=1)[:2] for gene in genes])
+
+        # Os blocos são reaproveitados enquanto comportarem a população
+        bloco = fila._bloco_dos_genes
+        fila.avaliar_genes(genes[:3])
+        assert fila._bloco_dos_genes is bloco
+
+        # Genes de formatos diferentes seguem serializados
+        assert isinstance(fila.avaliar_genes([np.ones((2, 2), dtype=bool), np.ones((3, 3), dtype=bool)]), list)
+
+    assert fila._bloco_dos_genes is None
+
+
+def _contar_ou_travar(contexto, gene):
+    # O gene todo preenchido simula uma resolução que nunca termina
+    if gene.all():
+        time.sleep(60)
+    return [float(gene.sum())] * contexto
+
+
+@pytest.mark.parametrize("valores_por_resultado", [None, 1])
+def teste_fila_de_avaliação_abandona_tarefas_que_excedem_o_prazo(valores_por_resultado):
+    genes = [np.eye(3, dtype=bool), np.ones((3, 3), dtype=bool), np.zeros((3, 3), dtype=bool), np.tri(3, dtype=bool)]
+    esgotado = [-1.0]
+
+    with FilaDeAvaliação(_contar_ou_travar, 1, processos=2, valores_por_resultado=valores_por_resultado,
+                         fator_de_espera=5, espera_mínima=0.5, resultado_esgotado=esgotado) as fila:
+        início = time.time()
+        resultados = fila.avaliar_genes(genes)
+
+        assert time.time() - início < 10
+        assert [list(resultado) for resultado in resultados] == [[3.0], esgotado, [0.0], [6.0]]
+        assert fila.latências[-1]["esgotadas"] == 1 and fila.latências[-1]["concluídas"] == 3
+        assert fila.latências[-1]["mediana"] <= fila.latências[-1]["máxima"] < 0.5
+
+        # O trabalhador preso é descartado, e a próxima chamada começa com outros
+        assert fila._pool is None
+        assert [list(resultado) for resultado in fila.avaliar_genes(genes[2:])] == [[0.0], [6.0]]
+
+
+def _registrar_ordem(contexto, gene):
+    return float(gene.sum()), time.perf_counter()
+
+
+@pytest.mark.parametrize("valores_por_resultado", [None, 2])
+def teste_fila_de_avaliação_envia_primeiro_os_genes_mais_caros(valores_por_resultado):
+    genes = [np.tri(4, 4, k, dtype=bool) for k in range(-3, 4)]
+    custos = [1.0, 5.0, 2.0, 7.0, 3.0, 4.0, 6.0]
+
+    with FilaDeAvaliação(_registrar_ordem, None, processos=1, valores_por_resultado=valores_por_resultado) as fila:
+        resultados = fila.avaliar_genes(genes, custos)
+        somas, instantes = zip(*resultados)
+
+        # Os resultados voltam na ordem dos genes, mas um único trabalhador os avaliou do mais ao menos caro
+        assert list(somas) == [float(gene.sum()) for gene in genes]
+        assert list(np.argsort(instantes)) == list(np.argsort(custos)[::-1])
+        assert fila.durações.shape == (7,) and (fila.durações > 0).all()
+
+
+def teste_faixas_por_custo_isolam_os_genes_caros():
+    assert _faixas_por_custo(np.array([8.0, 4.0, 1.0, 1.0, 1.0, 1.0]), 4) == [(0, 1), (1, 2), (2, 6)]
+    assert _faixas_por_custo(np.array([2.0, 2.0]), 1) == [(0, 2)]
+
+
+def teste_modelo_de_custo_se_calibra_pelas_durações():
+    modelo = ModeloDeCusto()
+    graus_de_liberdade = np.array([100, 200, 400, 800])
+    durações = 2e-8 * graus_de_liberdade ** 2.5
+
+    calibração = modelo.calibrar(graus_de_liberdade, durações)
+    assert np.isclose(calibração["razão_mediana"], np.median(durações / (1e-9 * graus_de_liberdade ** 3)))
+    assert np.isclose(calibração["correlação"], 1)
+    assert np.isclose(modelo.expoente, 2.5) and np.isclose(modelo.coeficiente, 2e-8)
+    assert np.allclose(modelo.prever(graus_de_liberdade), durações)
+
+    # Avaliações abandonadas não entram no ajuste
+    assert modelo.calibrar([100, 300], [np.nan, 2e-8 * 300 ** 2.5])["medições"] == 1
+    assert np.isclose(modelo.expoente, 2.5)
+
+
+def teste_modelo_de_custo_só_reajusta_o_expoente_plausível():
+    # Numa faixa estreita de graus de liberdade, durações ruidosas não alteram o expoente, só o coeficiente
+    modelo = ModeloDeCusto()
+    graus_de_liberdade = np.array([1000, 1100, 1200, 1300])
+    durações = np.array([2e-3, 1e-3, 4e-3, 1.5e-3])
+    modelo.calibrar(graus_de_liberdade, durações)
+    assert modelo.expoente == 3.0
+    assert np.isclose(np.median(durações / modelo.prever(graus_de_liberdade)), 1, rtol=0.5)
+
+    # Com faixa ampla e boa correlação, o expoente ajustado é limitado aos plausíveis
+    modelo = ModeloDeCusto(expoente=2.0)
+    graus_de_liberdade = np.array([100, 200, 400, 800])
+    modelo.calibrar(graus_de_liberdade, 1e-20 * graus_de_liberdade ** 7.0)
+    assert modelo.expoente == 3.0
+
+    modelo = ModeloDeCusto(expoente=2.0)
+    modelo.calibrar(graus_de_liberdade, 1e-5 * graus_de_liberdade ** 0.5)
+    assert modelo.expoente == 1.0
@@ -0,0 +1,42 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+import otag
+from otag import acrescentar_à_tabela, execuções_em_paralelo, _iniciar_processo_de_semente
+from suporte.algoritmo_genético import Ambiente
+
+
+def teste_processos_acrescentam_à_tabela_um_de_cada_vez(tmp_path):
+    arquivo = tmp_path / "comparação_de_resultados.csv"
+    linhas = [pd.DataFrame({"Semente": [sem], "Gerações": [300], "Indivíduo_mais_apto": [f"Proj_{sem}"],
+                            "Adaptação": [0.5], "Índice_de_Convergência": [0.9], "alfa_0": [10], "e": [0.1]})
+              for sem in range(12)]
+
+    contexto = multiprocessing.get_context()
+    with ProcessPoolExecutor(4, mp_context=contexto, initializer=_iniciar_processo_de_semente,
+                             initargs=({"memória_máxima": None}, contexto.Lock())) as executor:
+        for futuro in [executor.submit(acrescentar_à_tabela, arquivo, linha) for linha in linhas]:
+            futuro.result()
+
+    assert sorted(pd.read_csv(arquivo)["Semente"]) == list(range(12))
+
+
+class _ProblemaInválido:
+    def __init__(self, parâmetros_do_problema):
+        raise ValueError("Parâmetros inválidos")
+
+
+def teste_execuções_em_paralelo_relatam_a_semente_que_falhou():
+    with pytest.raises(RuntimeError, match="A semente 1 falhou(.|\n)*Parâmetros inválidos"):
+        execuções_em_paralelo(1, [1, 2], (Ambiente, _ProblemaInválido, {}), processos=1)
+
+
+def teste_cache_persistente_de_fenótipos_só_quando_pedido(monkeypatch, tmp_path):
+    assert "CACHE_PERSISTENTE_DE_FENÓTIPOS" not in otag._carregar_parâmetros("padrão.json")
+
+    caminho = str(tmp_path / "fenótipos.sqlite")
+    monkeypatch.setattr(otag, "cache_persistente_de_fenótipos", caminho)
+    assert otag._carregar_parâmetros("padrão.json")["CACHE_PERSISTENTE_DE_FENÓTIPOS"] == caminho
@@ -109,6 +109,10 @@ def _definir_bordas(malha: 'Malha') -> Tuple[set, set]:
 def mostrar_ambiente(amb: 'Ambiente', semente: int = 0, k: int = 20, arquivo: Path = None) -> None:
     proj = amb.população[0]
 
+    # Projetos reaproveitados do cache de fenótipos podem não carregar malha e deslocamentos
+    if hasattr(amb.problema, "reconstruir_campos"):
+        amb.problema.reconstruir_campos(proj)
+
     fig, gráficos = plt.subplots(2, 2, figsize=(12, 8))
 
     ((                gráfico_do_gene,     gráfico_da_malha_deformada),
@@ -116,7 +120,10 @@ def mostrar_ambiente(amb: 'Ambiente', semente: int = 0, k: int = 20, arquivo: Pa
 
     plotar_gene(proj, gráfico_do_gene)
     plotar_malha(proj, gráfico_da_malha_deformada, k=k)
-    plotar_malha_com_cores(proj, gráfico_da_deformação_em_cores)
+    if getattr(proj, "u_em_grade", None) is not None:
+        plotar_grade_com_cores(proj, gráfico_da_deformação_em_cores)
+    else:
+        plotar_malha_com_cores(proj, gráfico_da_deformação_em_cores)
     plotar_mapa_de_convergência(amb, gráfico_do_mapa_de_convergência)
 
     fig.suptitle(f"Geração final do ambiente começado com semente {semente}\n"
@@ -170,6 +177,24 @@ def plotar_malha_com_cores(proj: 'Projeto', gráfico: plt.Axes, k: int = 0,
     plt.colorbar(im, ax=gráfico)
 
 
+def plotar_grade_com_cores(proj: 'Projeto', gráfico: plt.Axes,
+                           paleta: str = "magma", inverter_cores: bool = False) -> None:
+    # A grade dispensa a malha: cada posição [i, j] já carrega o deslocamento do nó de etiqueta (i, j)
+    D = np.sqrt(np.sum(proj.u_em_grade ** 2, axis=-1))
+
+    paleta_final = paleta + "_r" if inverter_cores else paleta
+
+    gráfico.set_title(f"Deformações em {proj.nome}")
+    im = gráfico.imshow(np.ma.masked_invalid(D), cmap=paleta_final, interpolation="bilinear", extent=(0, 2, 0, 1))
+    plt.colorbar(im, ax=gráfico)
+
+
+def diferença_entre_deslocamentos(proj_1: 'Projeto', proj_2: 'Projeto') -> np.ndarray:
+    """Retorna o módulo da diferença entre os campos de deslocamento em grade de dois projetos, com NaN onde ao menos
+    um deles não tem material."""
+    return np.sqrt(np.sum((proj_1.u_em_grade - proj_2.u_em_grade) ** 2, axis=-1))
+
+
 def plotar_mapa_de_convergência(amb: 'Ambiente', gráfico: plt.Axes) -> None:
     conv, i_conv = calcular_convergência(amb)
 